@@ -0,0 +1,294 @@
+import os
+import sqlite3
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+class ImageCatalog:
+    """SQLite catalog of everything learned about ingested images.
+
+    One row per image file holds its fingerprint, capture time, camera,
+    dimensions, orientation, rotation, thumbnail, perceptual hash and
+    colour statistics, with the columns used for filtering and sorting
+    indexed. Reloading a folder reuses the rows of files whose size and
+    modification time are unchanged instead of decoding them again, so
+    it survives across sessions.
+
+    The database runs in WAL mode: every thread gets its own connection,
+    readers never block each other or the writer, and ingest results are
+    written in a single bulk upsert per folder.
+    """
+
+    # Record keys stored as columns, in table order
+    COLUMNS = (
+        'path', 'folder', 'filename', 'fingerprint', 'size', 'mtime_ns',
+        'thumbnail_path', 'date_time', 'timestamp', 'utc_offset',
+        'camera_model', 'width', 'height', 'orientation', 'rotation',
+        'dhash', 'content_hash', 'date_source', 'lab_l', 'lab_a', 'lab_b',
+        'exposure', 'histogram'
+    )
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS images (
+            path TEXT PRIMARY KEY,
+            folder TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            thumbnail_path TEXT NOT NULL,
+            date_time TEXT NOT NULL,
+            timestamp REAL,
+            utc_offset INTEGER,
+            camera_model TEXT NOT NULL DEFAULT '',
+            width INTEGER NOT NULL,
+            height INTEGER NOT NULL,
+            orientation INTEGER NOT NULL DEFAULT 1,
+            rotation INTEGER NOT NULL DEFAULT 0,
+            dhash INTEGER,
+            content_hash TEXT,
+            date_source TEXT,
+            lab_l REAL,
+            lab_a REAL,
+            lab_b REAL,
+            exposure REAL,
+            histogram BLOB,
+            exif BLOB
+        );
+        CREATE INDEX IF NOT EXISTS images_folder ON images (folder);
+        CREATE INDEX IF NOT EXISTS images_fingerprint ON images (fingerprint);
+        CREATE INDEX IF NOT EXISTS images_timestamp ON images (timestamp);
+        CREATE INDEX IF NOT EXISTS images_camera ON images (camera_model);
+        CREATE INDEX IF NOT EXISTS images_size ON images (width, height);
+        CREATE INDEX IF NOT EXISTS images_orientation ON images (orientation);
+        CREATE INDEX IF NOT EXISTS images_rotation ON images (rotation);
+    '''
+
+    # Columns added since the first schema, with their definitions
+    ADDED_COLUMNS = {
+        'dhash': 'INTEGER',
+        'content_hash': 'TEXT',
+        'date_source': 'TEXT',
+        'lab_l': 'REAL',
+        'lab_a': 'REAL',
+        'lab_b': 'REAL',
+        'exposure': 'REAL',
+        'histogram': 'BLOB'
+    }
+
+    APP_NAME = 'Contact Sheet Pro'
+    FILENAME = 'catalog.db'
+
+    def __init__(self, db_path: Optional[str] = None):
+        """Open (creating if needed) the catalog at db_path.
+
+        Without db_path the catalog lives in the user's data folder.
+        """
+        if db_path is None:
+            db_path = self.default_path()
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        connection = self._connection()
+        connection.executescript(self.SCHEMA)
+        existing = {
+            row['name']
+            for row in connection.execute("PRAGMA table_info(images)")
+        }
+        for column, definition in self.ADDED_COLUMNS.items():
+            if column not in existing:
+                connection.execute(
+                    f"ALTER TABLE images ADD COLUMN {column} {definition}"
+                )
+
+    @classmethod
+    def default_path(cls) -> str:
+        """Return the catalog path in the platform's per-user data folder.
+
+        %LOCALAPPDATA% on Windows, ~/Library/Application Support on macOS
+        and $XDG_DATA_HOME (~/.local/share) elsewhere, so the database and
+        its WAL files never land in the directory the app was started in.
+        """
+        home = os.path.expanduser('~')
+        if sys.platform == 'win32':
+            base = os.environ.get('LOCALAPPDATA') or os.path.join(
+                home, 'AppData', 'Local'
+            )
+        elif sys.platform == 'darwin':
+            base = os.path.join(home, 'Library', 'Application Support')
+        else:
+            base = os.environ.get('XDG_DATA_HOME') or os.path.join(
+                home, '.local', 'share'
+            )
+        return os.path.join(base, cls.APP_NAME, cls.FILENAME)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    @classmethod
+    def _record(cls, row: sqlite3.Row) -> Dict:
+        """Turn a catalog row into an image record."""
+        info = {key: row[key] for key in cls.COLUMNS}
+        del info['folder']
+        return info
+
+    def folder_records(self, folder: str) -> Dict[str, Dict]:
+        """Return the catalogued records of a folder keyed by filename."""
+        rows = self._connection().execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM images WHERE folder = ?",
+            (os.path.abspath(folder),)
+        )
+        return {row['filename']: self._record(row) for row in rows}
+
+    def by_fingerprints(
+        self,
+        fingerprints: Iterable[str]
+    ) -> Dict[str, List[Dict]]:
+        """Return the records of any folder with the given fingerprints."""
+        fingerprints = list(fingerprints)
+        matches: Dict[str, List[Dict]] = {}
+        # Stay well below SQLite's limit on query parameters
+        for start in range(0, len(fingerprints), 500):
+            chunk = fingerprints[start:start + 500]
+            rows = self._connection().execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM images "
+                f"WHERE fingerprint IN ({', '.join('?' for _ in chunk)})",
+                chunk
+            )
+            for row in rows:
+                matches.setdefault(row['fingerprint'], []).append(
+                    self._record(row)
+                )
+        return matches
+
+    def exif_blobs(self, paths: Iterable[str]) -> Dict[str, bytes]:
+        """Return the raw EXIF blocks stored for paths."""
+        paths = list(paths)
+        blobs = {}
+        for start in range(0, len(paths), 500):
+            chunk = paths[start:start + 500]
+            rows = self._connection().execute(
+                "SELECT path, exif FROM images "
+                f"WHERE path IN ({', '.join('?' for _ in chunk)})",
+                chunk
+            )
+            blobs.update((row['path'], row['exif']) for row in rows)
+        return blobs
+
+    def paths(
+        self,
+        where: str,
+        params: Iterable = (),
+        folders: Iterable[str] = ()
+    ) -> List[str]:
+        """Return the paths of images matching a condition.
+
+        folders, when given, limits the search to those folders.
+        """
+        params = list(params)
+        conditions = [f"({where})"] if where else []
+        folders = [os.path.abspath(folder) for folder in folders]
+        if folders:
+            conditions.append(
+                f"folder IN ({', '.join('?' for _ in folders)})"
+            )
+            params.extend(folders)
+        sql = "SELECT path FROM images"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        return [
+            row[0] for row in self._connection().execute(sql, params)
+        ]
+
+    def upsert_many(
+        self,
+        records: Iterable[Dict],
+        exif_blobs: Optional[Dict[str, bytes]] = None
+    ) -> None:
+        """Insert or replace records in one transaction."""
+        exif_blobs = exif_blobs or {}
+        rows = [
+            tuple(
+                os.path.dirname(os.path.abspath(info['path']))
+                if key == 'folder' else info.get(key)
+                for key in self.COLUMNS
+            ) + (exif_blobs.get(info['path']),)
+            for info in records
+        ]
+        if not rows:
+            return
+        columns = self.COLUMNS + ('exif',)
+        updates = ', '.join(
+            f"{key} = excluded.{key}" for key in columns if key != 'path'
+        )
+        with self._write_lock, self._connection() as connection:
+            connection.executemany(
+                f"INSERT INTO images ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)}) "
+                f"ON CONFLICT (path) DO UPDATE SET {updates}",
+                rows
+            )
+
+    def update_edits(self, records: Iterable[Dict]) -> None:
+        """Store the rotation and file changes made by a rotation."""
+        self._update(records, (
+            'rotation', 'orientation', 'width', 'height', 'fingerprint',
+            'content_hash', 'size', 'mtime_ns'
+        ))
+
+    def update_thumbnail_stats(self, records: Iterable[Dict]) -> None:
+        """Store the perceptual hashes and colour statistics of records."""
+        self._update(records, (
+            'dhash', 'lab_l', 'lab_a', 'lab_b', 'exposure', 'histogram'
+        ))
+
+    def update_dates(self, records: Iterable[Dict]) -> None:
+        """Store re-resolved capture dates."""
+        self._update(
+            records,
+            ('date_time', 'timestamp', 'utc_offset', 'date_source')
+        )
+
+    def update_content_hashes(self, records: Iterable[Dict]) -> None:
+        """Store the full content hashes of records."""
+        self._update(records, ('content_hash',))
+
+    def _update(self, records: Iterable[Dict], columns: Iterable[str]) -> None:
+        """Write some columns of existing rows from their records."""
+        columns = tuple(columns)
+        rows = [
+            tuple(info[key] for key in columns) + (info['path'],)
+            for info in records
+        ]
+        if not rows:
+            return
+        assignments = ', '.join(f"{key} = ?" for key in columns)
+        with self._write_lock, self._connection() as connection:
+            connection.executemany(
+                f"UPDATE images SET {assignments} WHERE path = ?",
+                rows
+            )
+
+    def remove_missing(self, folder: str, filenames: Iterable[str]) -> None:
+        """Drop the rows of a folder's files that no longer exist."""
+        folder = os.path.abspath(folder)
+        present = set(filenames)
+        missing = [
+            (os.path.join(folder, filename),)
+            for filename in self.folder_records(folder)
+            if filename not in present
+        ]
+        if not missing:
+            return
+        with self._write_lock, self._connection() as connection:
+            connection.executemany("DELETE FROM images WHERE path = ?", missing)
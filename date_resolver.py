@@ -0,0 +1,154 @@
+import re
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import piexif
+
+
+class CaptureDateResolver:
+    """Works out when a photo was taken from whatever records it.
+
+    Sources are tried from most to least trustworthy: the EXIF capture,
+    digitized and modification times (each with its offset tag when
+    present), XMP dates, a date in the filename as written by phones,
+    cameras and screenshot tools, and finally the file's modification
+    time. Everything comes from the header metadata Pillow reads when a
+    file is opened, so no pixels are decoded.
+    """
+
+    EXIF_ORIGINAL = 'DateTimeOriginal'
+    EXIF_DIGITIZED = 'DateTimeDigitized'
+    EXIF_MODIFIED = 'DateTime'
+    XMP = 'XMP'
+    FILENAME = 'Filename'
+    FILE_MODIFIED = 'File Modified'
+
+    EXIF_FORMAT = '%Y:%m:%d %H:%M:%S'
+
+    # (source, IFD, date tag, offset tag) in order of preference
+    EXIF_TAGS = (
+        (
+            EXIF_ORIGINAL, 'Exif',
+            piexif.ExifIFD.DateTimeOriginal,
+            piexif.ExifIFD.OffsetTimeOriginal
+        ),
+        (
+            EXIF_DIGITIZED, 'Exif',
+            piexif.ExifIFD.DateTimeDigitized,
+            piexif.ExifIFD.OffsetTimeDigitized
+        ),
+        (
+            EXIF_MODIFIED, '0th',
+            piexif.ImageIFD.DateTime, piexif.ExifIFD.OffsetTime
+        )
+    )
+
+    # Attribute or element forms of the XMP capture dates
+    XMP_DATE = re.compile(
+        r'(?:exif:DateTimeOriginal|photoshop:DateCreated|xmp:CreateDate)'
+        r'(?:\s*=\s*["\']|>)\s*([^"\'<\s]+)'
+    )
+
+    # IMG_20230914_101112, PXL_20230914_101112345, IMG-20230914-WA0001,
+    # Screenshot_2023-09-14-10-11-12, Screenshot 2023-09-14 at 10.11.12
+    FILENAME_DATE = re.compile(
+        r'(?<!\d)(?P<year>(?:19|20)\d{2})[-_.]?'
+        r'(?P<month>0[1-9]|1[0-2])[-_.]?'
+        r'(?P<day>0[1-9]|[12]\d|3[01])'
+        r'(?:(?:[-_ T.]|\s+at\s+)?'
+        r'(?P<hour>[01]\d|2[0-3])[-_.:h]?'
+        r'(?P<minute>[0-5]\d)[-_.:m]?'
+        r'(?P<second>[0-5]\d))?'
+    )
+
+    def resolve(
+        self,
+        exif_dict: Dict,
+        xmp: Optional[str],
+        filename: str,
+        mtime: Optional[float]
+    ) -> Tuple[Optional[datetime], Optional[str]]:
+        """Return the capture time and the name of the source it came from.
+
+        The time is offset-aware when its source records the UTC offset,
+        and naive local time otherwise.
+        """
+        for source, ifd, date_tag, offset_tag in self.EXIF_TAGS:
+            taken = self._from_exif(exif_dict, ifd, date_tag, offset_tag)
+            if taken is not None:
+                return taken, source
+        if xmp:
+            taken = self._from_xmp(xmp)
+            if taken is not None:
+                return taken, self.XMP
+        taken = self._from_filename(filename)
+        if taken is not None:
+            return taken, self.FILENAME
+        if mtime is not None:
+            try:
+                return datetime.fromtimestamp(mtime), self.FILE_MODIFIED
+            except (OverflowError, OSError, ValueError):
+                pass
+        return None, None
+
+    @staticmethod
+    def _text(value) -> str:
+        """Decode an EXIF ASCII value, dropping padding."""
+        if isinstance(value, bytes):
+            value = value.decode('utf-8', errors='replace')
+        return value.strip('\x00 ')
+
+    def _from_exif(
+        self,
+        exif_dict: Dict,
+        ifd: str,
+        date_tag: int,
+        offset_tag: int
+    ) -> Optional[datetime]:
+        """Parse an EXIF date tag, pinned to its offset tag if present."""
+        value = exif_dict.get(ifd, {}).get(date_tag)
+        if not value:
+            return None
+        try:
+            taken = datetime.strptime(self._text(value), self.EXIF_FORMAT)
+        except ValueError:
+            # Unset dates are written as blanks or '0000:00:00 00:00:00'
+            return None
+        offset = exif_dict.get('Exif', {}).get(offset_tag)
+        if offset:
+            try:
+                taken = taken.replace(tzinfo=timezone(
+                    datetime.strptime(self._text(offset), '%z').utcoffset()
+                ))
+            except ValueError:
+                pass
+        return taken
+
+    def _from_xmp(self, xmp: str) -> Optional[datetime]:
+        """Return the first parseable XMP capture date."""
+        for match in self.XMP_DATE.finditer(xmp):
+            value = match.group(1)
+            if value.endswith('Z'):
+                value = value[:-1] + '+00:00'
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                continue
+        return None
+
+    def _from_filename(self, filename: str) -> Optional[datetime]:
+        """Return the first valid date and time written in a filename."""
+        for match in self.FILENAME_DATE.finditer(filename):
+            fields = match.groupdict()
+            try:
+                return datetime(
+                    int(fields['year']),
+                    int(fields['month']),
+                    int(fields['day']),
+                    int(fields['hour'] or 0),
+                    int(fields['minute'] or 0),
+                    int(fields['second'] or 0)
+                )
+            except ValueError:
+                continue
+        return None
@@ -0,0 +1,248 @@
+import hashlib
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+
+class FileHash:
+    """Byte-level hashes that identify a file and its exact copies.
+
+    The fingerprint only reads the first and last blocks, so it is cheap
+    enough for every file of a folder; it keys the edit sidecars and the
+    catalog. The full content hash is only computed for files whose
+    fingerprints collide, to tell exact copies apart.
+    """
+
+    BLOCK_SIZE = 64 * 1024
+
+    @classmethod
+    def fingerprint(cls, path: str) -> str:
+        """Return the size and head/tail hash identifying a file."""
+        size = os.path.getsize(path)
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            digest.update(f.read(cls.BLOCK_SIZE))
+            if size > cls.BLOCK_SIZE:
+                f.seek(max(cls.BLOCK_SIZE, size - cls.BLOCK_SIZE))
+                digest.update(f.read(cls.BLOCK_SIZE))
+        return f"{size}-{digest.hexdigest()}"
+
+    @classmethod
+    def content_hash(cls, path: str) -> str:
+        """Return the SHA-1 of a file's whole contents, read in blocks."""
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(16 * cls.BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+
+class PerceptualHash:
+    """64-bit difference hash (dHash) of an image's downscaled luminance.
+
+    Each bit says whether a pixel of a 9x8 greyscale reduction is
+    brighter than its right-hand neighbour, so re-encoding, resizing and
+    small exposure changes leave most bits alone. Hashes are stored as
+    signed 64-bit integers so that SQLite can hold them.
+    """
+
+    @staticmethod
+    def dhash(img: Image.Image) -> int:
+        """Return the difference hash of an image."""
+        gray = img.convert('L').resize((9, 8), Image.Resampling.BOX)
+        pixels = np.asarray(gray, dtype=np.int16)
+        bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+        return int(np.packbits(bits).view('>i8')[0])
+
+
+class NearDuplicateIndex:
+    """Clusters of images whose perceptual hashes are nearly equal.
+
+    Uses multi-index hashing: the 64 hash bits are cut into threshold+1
+    chunks, and two hashes within threshold bits of each other must
+    agree exactly on at least one chunk. Only hashes that share a chunk
+    value are compared, with vectorized XOR and popcount over each
+    bucket, so the work grows with the bucket sizes rather than with
+    the square of the collection.
+
+    Matches are joined transitively, so a burst forms one cluster even
+    when its first and last frames differ by more than the threshold,
+    but the chaining is bounded: each cluster is seeded by its earliest
+    image, and two clusters only merge while their seeds are within
+    chain_limit bits. Hashes with fewer than MIN_DETAIL set or clear
+    bits come from nearly flat images such as blank scans and dark
+    frames; they say too little about the content to compare, so those
+    images are left unclustered.
+    """
+
+    THRESHOLD = 6  # Most differing bits between near duplicates
+    MIN_DETAIL = 8  # Fewest set and fewest clear bits of a usable hash
+    BLOCK_ELEMENTS = 1 << 22  # Bound on each pairwise distance block
+
+    def __init__(
+        self,
+        hashes: Sequence[Optional[int]],
+        threshold: int = THRESHOLD
+    ):
+        """Cluster hashes; None marks an image that has no hash."""
+        self.threshold = threshold
+        self.chain_limit = 2 * threshold
+        self.size = len(hashes)
+        # Every image's cluster, as the index of the cluster's first image
+        self._labels = list(range(self.size))
+
+        hashed = [i for i, value in enumerate(hashes) if value is not None]
+        if not hashed:
+            return
+        values = np.array(
+            [hashes[i] for i in hashed],
+            dtype=np.int64
+        ).view(np.uint64)
+        detail = _popcount(values).astype(np.int64)
+        usable = (detail >= self.MIN_DETAIL) & (detail <= 64 - self.MIN_DETAIL)
+        hashed = [i for i, keep in zip(hashed, usable) if keep]
+        values = values[usable]
+        if not hashed:
+            return
+
+        # Identical hashes are joined first and compared once; distinct
+        # hashes are numbered by first appearance so that every root is
+        # the earliest hash of its cluster
+        unique, first, inverse = np.unique(
+            values,
+            return_index=True,
+            return_inverse=True
+        )
+        order = np.argsort(first, kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        self._values = unique[order]
+        self._parent = np.arange(len(order))
+
+        self._join_near()
+        roots = self._roots(np.arange(len(order)))
+        first = first[order]
+        for i, u in enumerate(rank[inverse.ravel()]):
+            self._labels[hashed[i]] = hashed[first[roots[u]]]
+
+    def _join_near(self) -> None:
+        """Join the clusters of distinct hashes within the threshold."""
+        values = self._values
+        chunks = self.threshold + 1
+        bounds = np.linspace(0, 64, chunks + 1).astype(int)
+        for low, high in zip(bounds[:-1], bounds[1:]):
+            mask = np.uint64((1 << int(high - low)) - 1)
+            keys = (values >> np.uint64(low)) & mask
+            order = np.argsort(keys, kind='stable')
+            splits = np.flatnonzero(np.diff(keys[order])) + 1
+            for bucket in np.split(order, splits):
+                if len(bucket) > 1:
+                    self._join_bucket(bucket)
+
+    def _join_bucket(self, bucket: np.ndarray) -> None:
+        """Join the near hashes among the members of one bucket."""
+        bucket_values = self._values[bucket]
+        rows = max(1, self.BLOCK_ELEMENTS // len(bucket))
+        for start in range(0, len(bucket) - 1, rows):
+            # Row i of the block is member start + i and column j is
+            # member start + 1 + j; only j >= i is the upper triangle
+            stop = min(start + rows, len(bucket) - 1)
+            block = (
+                bucket_values[start:stop, None] ^ bucket_values[start + 1:]
+            )
+            near = _popcount(block) <= self.threshold
+            near &= (
+                np.arange(block.shape[1])[None, :]
+                >= np.arange(block.shape[0])[:, None]
+            )
+            for i in np.flatnonzero(near.any(axis=1)):
+                self._join(
+                    bucket[start + i],
+                    bucket[start + 1 + np.flatnonzero(near[i])]
+                )
+
+    def _join(self, node: int, partners: np.ndarray) -> None:
+        """Join node's cluster with those of its near partners.
+
+        Partners already in node's cluster are skipped as a whole, and
+        only clusters whose seed is within chain_limit of the seed of
+        node's cluster are merged.
+        """
+        root = int(self._roots(np.array([node]))[0])
+        others = np.unique(self._roots(partners))
+        others = others[others != root]
+        if not others.size:
+            return
+        seed = self._values[root]
+        others = others[
+            _popcount(self._values[others] ^ seed) <= self.chain_limit
+        ]
+        for other in others.tolist():
+            # Merging may have moved the root to an earlier, other seed
+            if _hamming(self._values[root], self._values[other]) > (
+                self.chain_limit
+            ):
+                continue
+            low, high = min(root, other), max(root, other)
+            self._parent[high] = low
+            root = low
+
+    def _roots(self, nodes: np.ndarray) -> np.ndarray:
+        """Return the roots of nodes' clusters, compressing their paths."""
+        parent = self._parent
+        roots = parent[nodes]
+        while True:
+            up = parent[roots]
+            if np.array_equal(up, roots):
+                break
+            roots = up
+        parent[nodes] = roots
+        return roots
+
+    def clusters(self) -> List[List[int]]:
+        """Return the index clusters, ordered by their first member."""
+        members: Dict[int, List[int]] = {}
+        for i, label in enumerate(self._labels):
+            members.setdefault(label, []).append(i)
+        return list(members.values())
+
+    @classmethod
+    def collapse(cls, images_info: List[Dict]) -> List[Dict]:
+        """Keep one image per cluster of near duplicates, in list order.
+
+        The representative is the cluster's largest image, shown in the
+        place of the cluster's first member.
+        """
+        index = cls([info.get('dhash') for info in images_info])
+        representatives = []
+        for cluster in index.clusters():
+            best = max(
+                cluster,
+                key=lambda i: (
+                    images_info[i]['width'] * images_info[i]['height'],
+                    -i
+                )
+            )
+            representatives.append(images_info[best])
+        return representatives
+
+
+def _hamming(a: np.uint64, b: np.uint64) -> int:
+    """Return the number of differing bits of two hashes."""
+    return bin(int(a ^ b)).count('1')
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Return the number of set bits of each uint64."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    as_bytes = values.view(np.uint8).reshape(values.shape + (8,))
+    return _BYTE_BITS[as_bytes].sum(axis=-1)
+
+
+_BYTE_BITS = np.array(
+    [bin(i).count('1') for i in range(256)],
+    dtype=np.uint8
+)
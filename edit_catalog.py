@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Iterable
+
+
+class EditCatalog:
+    """Non-destructive edits kept in a sidecar file next to the images.
+
+    Each folder gets a small JSON catalog mapping a file fingerprint to
+    the edits made to that file, currently just its rotation. Originals
+    are never rewritten: edits are applied when a cell is rendered. The
+    fingerprint (see FileHash) is the file size plus a hash of its first
+    and last blocks, so edits follow a file that is renamed or moved
+    together with the catalog and are not applied to a different file
+    that reuses the name.
+    """
+
+    FILENAME = '.contact_sheet_edits.json'
+
+    def __init__(self):
+        """Initialize with no catalogs loaded."""
+        # folder -> {fingerprint: edits}
+        self._catalogs: Dict[str, Dict[str, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def _catalog_path(self, folder: str) -> str:
+        """Return the sidecar file of a folder."""
+        return os.path.join(folder, self.FILENAME)
+
+    def _catalog(self, folder: str) -> Dict[str, Dict]:
+        """Return the edits of a folder, reading its sidecar on first use."""
+        catalog = self._catalogs.get(folder)
+        if catalog is None:
+            catalog = {}
+            path = self._catalog_path(folder)
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        catalog = json.load(f).get('edits', {})
+                except Exception as e:
+                    print(f"Error reading edit catalog {path}: {e}")
+            self._catalogs[folder] = catalog
+        return catalog
+
+    def rotation(self, info: Dict) -> int:
+        """Return the stored rotation of an image, 0 if it has none."""
+        with self._lock:
+            catalog = self._catalog(os.path.dirname(info['path']))
+            return catalog.get(info['fingerprint'], {}).get('rotation', 0)
+
+    def set_rotations(self, images: Iterable[Dict]) -> None:
+        """Record the current rotation of images, one write per folder."""
+        with self._lock:
+            folders = set()
+            for info in images:
+                folder = os.path.dirname(info['path'])
+                catalog = self._catalog(folder)
+                edits = catalog.setdefault(info['fingerprint'], {})
+                if info['rotation']:
+                    edits['rotation'] = info['rotation']
+                else:
+                    edits.pop('rotation', None)
+                if not edits:
+                    del catalog[info['fingerprint']]
+                folders.add(folder)
+            for folder in folders:
+                self._write(folder)
+
+    def rekey(self, info: Dict, old_fingerprint: str) -> None:
+        """Move the edits of a file whose contents were rewritten."""
+        with self._lock:
+            folder = os.path.dirname(info['path'])
+            catalog = self._catalog(folder)
+            edits = catalog.pop(old_fingerprint, None)
+            if edits is not None:
+                catalog[info['fingerprint']] = edits
+                self._write(folder)
+
+    def _write(self, folder: str) -> None:
+        """Replace a folder's sidecar atomically."""
+        path = self._catalog_path(folder)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        except OSError as e:
+            print(f"Error writing edit catalog {path}: {e}")
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'edits': self._catalogs[folder]}, f, indent=1)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error writing edit catalog {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, List
+
+
+class ExportJob:
+    """Checkpoint manifest that lets an interrupted export resume.
+
+    The manifest sits next to the output and records the export plan
+    (layout, output settings and a digest of the input files) together
+    with the pages already written. It is replaced atomically after every
+    page, so a crash leaves either the previous or the new checkpoint on
+    disk, never a torn file. Running the same job again skips the pages
+    it finds committed; any change to the plan starts the job over.
+    """
+
+    def __init__(self, manifest_path: str, plan: Dict):
+        """Load a matching checkpoint from manifest_path, if there is one."""
+        self.manifest_path = manifest_path
+        # Round-trip through JSON so tuples compare equal to stored lists
+        self.plan = json.loads(json.dumps(plan))
+        self.committed_pages: List[int] = []
+        self.sink_state: Dict = {}
+        self._load()
+
+    @staticmethod
+    def fingerprint_inputs(images_info: List[Dict]) -> str:
+        """Return a digest of the ordered input files and their edits."""
+        digest = hashlib.sha1()
+        for info in images_info:
+            try:
+                stat = os.stat(info['path'])
+                size, mtime = stat.st_size, stat.st_mtime_ns
+            except OSError:
+                size, mtime = -1, -1
+            digest.update(
+                f"{info['path']}\0{size}\0{mtime}\0{info['rotation']}\n"
+                .encode('utf-8')
+            )
+        return digest.hexdigest()
+
+    def _load(self) -> None:
+        """Restore committed pages from a manifest with the same plan."""
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error reading export manifest: {e}")
+            return
+
+        if data.get('plan') != self.plan:
+            print("Export inputs or settings changed; starting over.")
+            return
+        self.committed_pages = sorted(data.get('committed_pages', []))
+        self.sink_state = data.get('sink_state', {})
+
+    def is_committed(self, page_num: int) -> bool:
+        """Check whether a page was written by an earlier run."""
+        return page_num in self.committed_pages
+
+    def commit_page(self, page_num: int, sink_state: Dict) -> None:
+        """Record a finished page and the output state after writing it."""
+        if page_num not in self.committed_pages:
+            self.committed_pages.append(page_num)
+        self.sink_state = sink_state
+        self._write()
+
+    def reset(self) -> None:
+        """Forget all committed pages."""
+        self.committed_pages = []
+        self.sink_state = {}
+
+    def finish(self) -> None:
+        """Remove the manifest once every page has been written."""
+        try:
+            if os.path.exists(self.manifest_path):
+                os.remove(self.manifest_path)
+        except OSError as e:
+            print(f"Error removing export manifest: {e}")
+
+    def _write(self) -> None:
+        """Write the manifest to a temporary file and rename it in place."""
+        data = {
+            'plan': self.plan,
+            'committed_pages': self.committed_pages,
+            'sink_state': self.sink_state
+        }
+        folder = os.path.dirname(self.manifest_path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.manifest_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
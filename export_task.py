@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+
+class ExportSignals(QObject):
+    """Signals emitted by an ExportTask back to the GUI thread."""
+
+    # pages done, total pages, images done
+    progress = pyqtSignal(int, int, int)
+    # success, cancelled
+    finished = pyqtSignal(bool, bool)
+
+
+class ExportTask(QRunnable):
+    """Runs one contact sheet export on a worker thread.
+
+    The task works on a snapshot of the processor and of the selected
+    image records, so the GUI stays free to change settings or load the
+    next folder while the export runs. Cancelling stops the export after
+    the page being written.
+    """
+
+    def __init__(self, image_processor, images_info: List[Dict]):
+        """Initialize with the processor and the images to export."""
+        super().__init__()
+        self.image_processor = image_processor.snapshot()
+        self.images_info = [dict(info) for info in images_info]
+        self.signals = ExportSignals()
+        self._cancelled = threading.Event()
+        self._keep_partial = True
+
+    def cancel(self, keep_partial: bool = True) -> None:
+        """Stop after the current page, keeping or removing the output."""
+        self._keep_partial = keep_partial
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        """Check whether the task has been cancelled."""
+        return self._cancelled.is_set()
+
+    def keep_partial(self) -> bool:
+        """Check whether output of a cancelled export should be kept."""
+        return self._keep_partial
+
+    def run(self) -> None:
+        """Export the images and report the outcome to the GUI thread."""
+        success = self.image_processor.create_contact_sheet(
+            self.images_info,
+            self.signals.progress.emit,
+            self.is_cancelled,
+            self.keep_partial
+        )
+        cancelled = self.is_cancelled() and not success
+        self.signals.finished.emit(success, cancelled)
+
+
+class ExportProgress:
+    """Turns page progress reports into a status line with rates and ETA.
+
+    Rates are measured from the first report, so pages skipped because
+    an earlier run already wrote them do not inflate the throughput.
+    """
+
+    def __init__(self):
+        """Initialize before the first report."""
+        self._start: Optional[float] = None
+        self._start_pages = 0
+        self._start_images = 0
+
+    def describe(
+        self,
+        pages_done: int,
+        total_pages: int,
+        images_done: int
+    ) -> str:
+        """Return a status message for the latest progress report."""
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+            self._start_pages = pages_done
+            self._start_images = images_done
+
+        message = f"Exporting page {pages_done} of {total_pages}"
+        elapsed = now - self._start
+        pages = pages_done - self._start_pages
+        if elapsed <= 0 or pages <= 0:
+            return message + "..."
+
+        pages_per_second = pages / elapsed
+        images_per_second = (images_done - self._start_images) / elapsed
+        remaining = (total_pages - pages_done) / pages_per_second
+        minutes, seconds = divmod(int(remaining + 0.5), 60)
+        return (
+            f"{message} - {pages_per_second:.2f} pages/s, "
+            f"{images_per_second:.1f} images/s, "
+            f"ETA {minutes}:{seconds:02d}"
+        )
@@ -0,0 +1,1080 @@
+import html
+import io
+import itertools
+import json
+import math
+import os
+import re
+import shutil
+import tarfile
+import time
+import zipfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+
+class DeepZoomExporter:
+    """Writes a contact sheet as a Deep Zoom (DZI) tile pyramid.
+
+    The whole selection is laid out as one large mosaic. Full-resolution
+    tiles are rendered band by band straight from the cells that overlap
+    them, and every lower level is built by merging the four tiles above
+    it, so the complete mosaic never has to exist in memory.
+    """
+
+    TILE_SIZE = 256
+    CELL_SIZE = 256
+    CAPTION_HEIGHT = 40
+    MARGIN = 16
+    TILE_FORMAT = 'jpg'
+
+    def __init__(self, image_processor):
+        """Initialize with the image processor used to render cells."""
+        self.image_processor = image_processor
+        self.settings_manager = image_processor.settings_manager
+
+    def export(
+        self,
+        images_info: List[Dict],
+        save_folder: str,
+        progress: Optional[Callable[[int, int, int], None]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        keep_partial: Optional[Callable[[], bool]] = None
+    ) -> bool:
+        """Export the images as a .dzi descriptor plus tile folders.
+
+        progress, is_cancelled and keep_partial work as for page exports,
+        with every row of full-resolution tiles and every smaller level
+        counted as a page. A cancelled export stops between them and
+        returns False, removing its tiles if keep_partial returns False.
+        """
+        try:
+            name = self.settings_manager.filename_pattern.replace(
+                '{number}',
+                '001'
+            )
+            tiles_dir = os.path.join(save_folder, f"{name}_files")
+            cols = self._calculate_columns(len(images_info))
+            size = self._mosaic_size(len(images_info), cols)
+            max_level = self._max_level(size)
+            base_dir = os.path.join(tiles_dir, str(max_level))
+            tile_rows = self._tile_count(size)[1]
+            total_steps = tile_rows + max_level
+
+            def cancelled() -> bool:
+                if not (is_cancelled and is_cancelled()):
+                    return False
+                if keep_partial and not keep_partial():
+                    _remove_tree(tiles_dir)
+                return True
+
+            if progress:
+                progress(0, total_steps, 0)
+            os.makedirs(base_dir, exist_ok=True)
+            caption_font = self.image_processor._get_font('Arial', 14)
+            cells: Dict[int, Image.Image] = {}
+            for tile_row in range(tile_rows):
+                if cancelled():
+                    return False
+                images_done = self._write_base_row(
+                    images_info,
+                    cols,
+                    size,
+                    base_dir,
+                    tile_row,
+                    cells,
+                    caption_font
+                )
+                if progress:
+                    progress(tile_row + 1, total_steps, images_done)
+
+            for level in range(max_level - 1, -1, -1):
+                if cancelled():
+                    return False
+                self._write_reduced_level(tiles_dir, level, max_level, size)
+                if progress:
+                    progress(
+                        total_steps - level,
+                        total_steps,
+                        len(images_info)
+                    )
+
+            self._write_descriptor(
+                os.path.join(save_folder, f"{name}.dzi"),
+                size
+            )
+            return True
+        except Exception as e:
+            print(f"Error exporting Deep Zoom image: {e}")
+            return False
+
+    def _cell_pitch(self) -> Tuple[int, int]:
+        """Return the horizontal and vertical distance between cells."""
+        return (
+            self.CELL_SIZE + self.MARGIN,
+            self.CELL_SIZE + self.CAPTION_HEIGHT + self.MARGIN
+        )
+
+    def _calculate_columns(self, total_images: int) -> int:
+        """Pick a column count that keeps the mosaic roughly square."""
+        pitch_x, pitch_y = self._cell_pitch()
+        return max(1, math.ceil(math.sqrt(total_images * pitch_y / pitch_x)))
+
+    def _mosaic_size(self, total_images: int, cols: int) -> Tuple[int, int]:
+        """Return the full-resolution mosaic size in pixels."""
+        pitch_x, pitch_y = self._cell_pitch()
+        rows = max(1, math.ceil(total_images / cols))
+        return (
+            self.MARGIN + cols * pitch_x,
+            self.MARGIN + rows * pitch_y
+        )
+
+    @staticmethod
+    def _max_level(size: Tuple[int, int]) -> int:
+        """Return the index of the full-resolution pyramid level."""
+        return max(0, math.ceil(math.log2(max(size))))
+
+    @staticmethod
+    def _level_size(
+        size: Tuple[int, int],
+        level: int,
+        max_level: int
+    ) -> Tuple[int, int]:
+        """Return the pixel size of a pyramid level."""
+        scale = 2 ** (max_level - level)
+        return (
+            max(1, math.ceil(size[0] / scale)),
+            max(1, math.ceil(size[1] / scale))
+        )
+
+    def _tile_count(self, level_size: Tuple[int, int]) -> Tuple[int, int]:
+        """Return the number of tile columns and rows for a level."""
+        return (
+            math.ceil(level_size[0] / self.TILE_SIZE),
+            math.ceil(level_size[1] / self.TILE_SIZE)
+        )
+
+    def _render_cell(self, info: Dict, caption_font) -> Image.Image:
+        """Render one cell: the scaled image with its caption below."""
+        cell = Image.new(
+            'RGB',
+            (self.CELL_SIZE, self.CELL_SIZE + self.CAPTION_HEIGHT),
+            'white'
+        )
+        try:
+            img = self.image_processor._load_cell_image(
+                info,
+                self.CELL_SIZE,
+                self.CELL_SIZE,
+                use_thumbnail_cache=True
+            )
+            cell.paste(
+                img,
+                (
+                    (self.CELL_SIZE - img.width) // 2,
+                    (self.CELL_SIZE - img.height) // 2
+                )
+            )
+        except Exception as e:
+            print(f"Error rendering cell for {info['filename']}: {e}")
+
+        ImageDraw.Draw(cell).text(
+            (0, self.CELL_SIZE + 2),
+            f"{info['filename']}\n{info['date_time']}",
+            fill='black',
+            font=caption_font
+        )
+        return cell
+
+    def _write_base_row(
+        self,
+        images_info: List[Dict],
+        cols: int,
+        size: Tuple[int, int],
+        level_dir: str,
+        tile_row: int,
+        cells: Dict[int, Image.Image],
+        caption_font
+    ) -> int:
+        """Render one horizontal band of full-resolution tiles.
+
+        cells carries rendered cells over to the next band. Only the
+        cells of the rows crossing the current band are kept, so memory
+        stays bounded by a couple of cell rows whatever the number of
+        images. Returns the number of images drawn so far.
+        """
+        pitch_x, pitch_y = self._cell_pitch()
+        tile_cols = self._tile_count(size)[0]
+        quality = self.settings_manager.quality
+
+        y0 = tile_row * self.TILE_SIZE
+        y1 = min(y0 + self.TILE_SIZE, size[1])
+        first_row = max(0, (y0 - self.MARGIN) // pitch_y)
+        last_row = max(0, (y1 - 1 - self.MARGIN) // pitch_y)
+
+        # Drop cells from rows that are entirely above this band
+        for idx in [i for i in cells if i // cols < first_row]:
+            del cells[idx]
+
+        for tile_col in range(tile_cols):
+            x0 = tile_col * self.TILE_SIZE
+            x1 = min(x0 + self.TILE_SIZE, size[0])
+            tile = Image.new('RGB', (x1 - x0, y1 - y0), 'white')
+            first_col = max(0, (x0 - self.MARGIN) // pitch_x)
+            last_col = min(cols - 1, (x1 - 1 - self.MARGIN) // pitch_x)
+
+            for row in range(first_row, last_row + 1):
+                for col in range(first_col, last_col + 1):
+                    idx = row * cols + col
+                    if idx >= len(images_info):
+                        continue
+                    if idx not in cells:
+                        cells[idx] = self._render_cell(
+                            images_info[idx],
+                            caption_font
+                        )
+                    tile.paste(
+                        cells[idx],
+                        (
+                            self.MARGIN + col * pitch_x - x0,
+                            self.MARGIN + row * pitch_y - y0
+                        )
+                    )
+
+            tile.save(
+                os.path.join(
+                    level_dir,
+                    f"{tile_col}_{tile_row}.{self.TILE_FORMAT}"
+                ),
+                'JPEG',
+                quality=quality
+            )
+        return min(len(images_info), (last_row + 1) * cols)
+
+    def _write_reduced_level(
+        self,
+        tiles_dir: str,
+        level: int,
+        max_level: int,
+        size: Tuple[int, int]
+    ) -> None:
+        """Build a level by halving 2x2 groups of tiles from the level above."""
+        level_dir = os.path.join(tiles_dir, str(level))
+        upper_dir = os.path.join(tiles_dir, str(level + 1))
+        os.makedirs(level_dir, exist_ok=True)
+        level_size = self._level_size(size, level, max_level)
+        upper_size = self._level_size(size, level + 1, max_level)
+        tile_cols, tile_rows = self._tile_count(level_size)
+        quality = self.settings_manager.quality
+        tile_size = self.TILE_SIZE
+
+        for tile_row in range(tile_rows):
+            for tile_col in range(tile_cols):
+                merged = Image.new(
+                    'RGB',
+                    (
+                        min(2 * tile_size, upper_size[0] - 2 * tile_col * tile_size),
+                        min(2 * tile_size, upper_size[1] - 2 * tile_row * tile_size)
+                    ),
+                    'white'
+                )
+                for dy in (0, 1):
+                    for dx in (0, 1):
+                        upper_path = os.path.join(
+                            upper_dir,
+                            f"{2 * tile_col + dx}_{2 * tile_row + dy}"
+                            f".{self.TILE_FORMAT}"
+                        )
+                        if os.path.exists(upper_path):
+                            with Image.open(upper_path) as upper:
+                                merged.paste(
+                                    upper,
+                                    (dx * tile_size, dy * tile_size)
+                                )
+
+                tile = merged.resize(
+                    (
+                        min(tile_size, level_size[0] - tile_col * tile_size),
+                        min(tile_size, level_size[1] - tile_row * tile_size)
+                    ),
+                    Image.Resampling.BOX
+                )
+                tile.save(
+                    os.path.join(
+                        level_dir,
+                        f"{tile_col}_{tile_row}.{self.TILE_FORMAT}"
+                    ),
+                    'JPEG',
+                    quality=quality
+                )
+
+    def _write_descriptor(self, path: str, size: Tuple[int, int]) -> None:
+        """Write the .dzi XML descriptor."""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008"\n'
+                f'       Format="{self.TILE_FORMAT}" Overlap="0" '
+                f'TileSize="{self.TILE_SIZE}">\n'
+                f'    <Size Width="{size[0]}" Height="{size[1]}"/>\n'
+                '</Image>\n'
+            )
+
+
+class GalleryExporter:
+    """Writes a static HTML gallery backed by thumbnail sprite atlases.
+
+    The list thumbnails created at load time are packed into a few large
+    atlas images, so a browser can show thousands of cells with a handful
+    of requests and nothing has to be decoded from the originals again.
+    """
+
+    ATLAS_SIZE = 4096
+    ATLAS_QUALITY = 85
+
+    def __init__(self, image_processor):
+        """Initialize with the image processor holding the thumbnails."""
+        self.image_processor = image_processor
+        self.settings_manager = image_processor.settings_manager
+        self.slot_size = image_processor.THUMBNAIL_SIZE
+
+    def export(
+        self,
+        page_batches: List[List[Dict]],
+        save_folder: str,
+        cols: int,
+        images_per_page: int,
+        progress: Optional[Callable[[int, int, int], None]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        keep_partial: Optional[Callable[[], bool]] = None
+    ) -> bool:
+        """Export the atlases, a JSON cell index and an HTML page.
+
+        progress, is_cancelled and keep_partial work as for page exports,
+        with every atlas counted as a page. A cancelled export stops
+        between atlases and returns False, removing the atlases written
+        so far if keep_partial returns False.
+        """
+        try:
+            name = self.settings_manager.filename_pattern.replace(
+                '{number}',
+                '001'
+            )
+            images_info = [info for batch in page_batches for info in batch]
+            slot_w, slot_h = self.slot_size
+            per_atlas = (
+                (self.ATLAS_SIZE // slot_w) * (self.ATLAS_SIZE // slot_h)
+            )
+            atlas_batches = [
+                images_info[start:start + per_atlas]
+                for start in range(0, len(images_info), per_atlas)
+            ]
+            atlases: List[str] = []
+            cells: List[Dict] = []
+            if progress:
+                progress(0, len(atlas_batches), 0)
+            for batch in atlas_batches:
+                if is_cancelled and is_cancelled():
+                    if keep_partial and not keep_partial():
+                        for atlas in atlases:
+                            _remove_file(os.path.join(save_folder, atlas))
+                    return False
+                atlas_name = f"{name}_atlas_{len(atlases):03d}.jpg"
+                cells.extend(self._write_atlas(
+                    batch,
+                    len(atlases),
+                    os.path.join(save_folder, atlas_name)
+                ))
+                atlases.append(atlas_name)
+                if progress:
+                    progress(len(atlases), len(atlas_batches), len(cells))
+
+            pages = (
+                page_num
+                for page_num, batch in enumerate(page_batches, 1)
+                for _ in batch
+            )
+            for cell, page_num in zip(cells, pages):
+                cell['page'] = page_num
+
+            index = {
+                'atlases': atlases,
+                'cols': cols,
+                'images_per_page': images_per_page,
+                'cells': cells
+            }
+            with open(
+                os.path.join(save_folder, f"{name}.json"),
+                'w',
+                encoding='utf-8'
+            ) as f:
+                json.dump(index, f, indent=1)
+
+            with open(
+                os.path.join(save_folder, f"{name}.html"),
+                'w',
+                encoding='utf-8'
+            ) as f:
+                f.write(self._build_html(index))
+            return True
+        except Exception as e:
+            print(f"Error exporting HTML gallery: {e}")
+            return False
+
+    def _write_atlas(
+        self,
+        images_info: List[Dict],
+        atlas_index: int,
+        path: str
+    ) -> List[Dict]:
+        """Pack thumbnails into one atlas image and return their cells."""
+        slot_w, slot_h = self.slot_size
+        per_row = self.ATLAS_SIZE // slot_w
+        rows = math.ceil(len(images_info) / per_row)
+        atlas = Image.new(
+            'RGB',
+            (min(len(images_info), per_row) * slot_w, rows * slot_h),
+            'white'
+        )
+        cells: List[Dict] = []
+
+        for idx, info in enumerate(images_info):
+            x = (idx % per_row) * slot_w
+            y = (idx // per_row) * slot_h
+            width, height = self.slot_size
+            try:
+                with Image.open(info['thumbnail_path']) as thumb:
+                    thumb = thumb.convert('RGB')
+                    if info['rotation']:
+                        thumb = thumb.rotate(
+                            info['rotation'],
+                            expand=True
+                        )
+                    thumb.thumbnail(self.slot_size)
+                    atlas.paste(thumb, (x, y))
+                    width, height = thumb.size
+            except Exception as e:
+                print(f"Error reading thumbnail for {info['filename']}: {e}")
+
+            cells.append({
+                'filename': info['filename'],
+                'date_time': info['date_time'],
+                'path': info['path'],
+                'atlas': atlas_index,
+                'x': x,
+                'y': y,
+                'width': width,
+                'height': height
+            })
+
+        atlas.save(path, 'JPEG', quality=self.ATLAS_QUALITY)
+        return cells
+
+    def _build_html(self, index: Dict) -> str:
+        """Build a script-free page that shows every cell from the atlases."""
+        slot_w, slot_h = self.slot_size
+        title = html.escape(
+            self.settings_manager.context_text or 'Contact Sheet'
+        )
+        total_pages = max(
+            (cell['page'] for cell in index['cells']),
+            default=1
+        )
+        atlas_rules = '\n'.join(
+            f".a{i}{{background-image:url('{html.escape(atlas)}')}}"
+            for i, atlas in enumerate(index['atlases'])
+        )
+
+        parts = [
+            '<!DOCTYPE html>',
+            '<html><head><meta charset="utf-8">',
+            f'<title>{title}</title>',
+            '<style>',
+            'body{font-family:sans-serif;margin:16px}',
+            f'.grid{{display:grid;gap:12px;'
+            f'grid-template-columns:repeat({index["cols"]},{slot_w}px)}}',
+            'figure{margin:0;font-size:11px;word-break:break-all}',
+            f'.c{{width:{slot_w}px;height:{slot_h}px;'
+            'display:flex;align-items:center;justify-content:center}',
+            '.t{background-repeat:no-repeat}',
+            atlas_rules,
+            '</style></head><body>',
+            f'<h1>{title}</h1>'
+        ]
+        # Cells are stored in page order
+        for page, page_cells in itertools.groupby(
+            index['cells'],
+            key=lambda cell: cell['page']
+        ):
+            parts.append(
+                f'<h2>Page {page} of {total_pages}</h2><div class="grid">'
+            )
+            for cell in page_cells:
+                parts.append(
+                    '<figure><div class="c">'
+                    f'<div class="t a{cell["atlas"]}" title="'
+                    f'{html.escape(cell["path"])}" style="width:'
+                    f'{cell["width"]}px;height:{cell["height"]}px;'
+                    f'background-position:-{cell["x"]}px -{cell["y"]}px">'
+                    '</div></div><figcaption>'
+                    f'{html.escape(cell["filename"])}<br>'
+                    f'{html.escape(cell["date_time"])}'
+                    '</figcaption></figure>'
+                )
+            parts.append('</div>')
+        if self.settings_manager.watermark_text:
+            parts.append(
+                f'<footer>{html.escape(self.settings_manager.watermark_text)}'
+                '</footer>'
+            )
+        parts.append('</body></html>')
+        return '\n'.join(parts)
+
+
+def _remove_tree(path: str) -> None:
+    """Delete a folder and everything in it, reporting failures."""
+    try:
+        if os.path.exists(path):
+            shutil.rmtree(path)
+    except OSError as e:
+        print(f"Error removing {path}: {e}")
+
+
+def _remove_file(path: str) -> None:
+    """Delete a file if it exists, reporting failures."""
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        print(f"Error removing {path}: {e}")
+
+
+class PageSink:
+    """Destination for rendered contact sheet pages, written one by one."""
+
+    def __init__(self, settings):
+        """Initialize with the settings that name and encode the output."""
+        self.settings = settings
+
+    def resume(self, committed_pages: List[int], state: Dict) -> bool:
+        """Pick up after committed_pages; return False if that is impossible."""
+        return True
+
+    def write_page(self, page: Image.Image, page_num: int) -> None:
+        """Write a single page."""
+        raise NotImplementedError
+
+    def checkpoint(self) -> Dict:
+        """Return the state needed to resume after the last written page."""
+        return {}
+
+    def close(self) -> None:
+        """Finish the output once all pages have been written."""
+
+    def discard(self, committed_pages: List[int]) -> None:
+        """Remove the output of a closed, unfinished export."""
+
+    def write_index(self, page_batches: List[List[Dict]]) -> None:
+        """Record which images landed in which output file, if supported."""
+
+
+class ImageFilePageSink(PageSink):
+    """Saves every page as its own JPEG or PNG file."""
+
+    def _page_path(self, page_num: int) -> str:
+        """Return the output path of a page."""
+        filename = self.settings.filename_pattern.replace(
+            '{number}',
+            str(page_num).zfill(3)
+        )
+        return os.path.join(
+            self.settings.save_folder,
+            f"{filename}.{self.settings.export_format.lower()}"
+        )
+
+    def resume(self, committed_pages: List[int], state: Dict) -> bool:
+        """Resume only if every committed page file is still present."""
+        return all(
+            os.path.exists(self._page_path(page_num))
+            for page_num in committed_pages
+        )
+
+    def write_page(self, page: Image.Image, page_num: int) -> None:
+        """Encode a page to its own file."""
+        output_path = self._page_path(page_num)
+        export_format = self.settings.export_format.lower()
+        if export_format in ['jpg', 'jpeg']:
+            page.save(output_path, 'JPEG', quality=self.settings.quality)
+        elif export_format == 'png':
+            compress = int((100 - self.settings.quality) / 10)
+            page.save(output_path, 'PNG', compress_level=compress)
+        else:
+            page.save(output_path)
+
+    def discard(self, committed_pages: List[int]) -> None:
+        """Remove the page files written so far."""
+        for page_num in committed_pages:
+            _remove_file(self._page_path(page_num))
+
+
+class ArchivePageSink(ImageFilePageSink):
+    """Streams encoded JPEG or PNG pages straight into a ZIP or TAR archive.
+
+    Pages are encoded in memory and added as archive members as soon as
+    they are rendered, so no per-page files are written and read back.
+    The archive can go to a file in the save folder or to any writable
+    binary stream such as stdout. An interrupted TAR file is resumed by
+    truncating it to the end of the last committed member; ZIP archives
+    and streams start over.
+    """
+
+    ARCHIVE_FORMATS = ('ZIP', 'ZIP (Stored)', 'TAR')
+
+    def __init__(self, settings, stream=None):
+        """Initialize with settings and an optional output stream."""
+        super().__init__(settings)
+        self.archive_format = settings.archive_format
+        self.stream = stream
+        extension = 'tar' if self.archive_format == 'TAR' else 'zip'
+        self.output_path = os.path.join(
+            settings.save_folder,
+            f"{settings.filename_pattern.replace('{number}', 'pages')}"
+            f".{extension}"
+        )
+        self.archive = None
+        self._fileobj = None
+
+    def _member_name(self, page_num: int) -> str:
+        """Return the name of a page inside the archive."""
+        return os.path.basename(self._page_path(page_num))
+
+    def resume(self, committed_pages: List[int], state: Dict) -> bool:
+        """Open the archive, continuing a TAR file after its checkpoint.
+
+        Returns False, with no archive open, when the committed pages
+        cannot be kept; resume([], {}) then starts a fresh archive.
+        """
+        if committed_pages:
+            if self.stream is not None or self.archive_format != 'TAR':
+                return False
+            size = state.get('bytes', 0)
+            if not os.path.exists(self.output_path):
+                return False
+            if os.path.getsize(self.output_path) < size:
+                return False
+            self._fileobj = open(self.output_path, 'r+b')
+            self._fileobj.truncate(size)
+            self._fileobj.seek(size)
+        elif self.stream is None:
+            self._fileobj = open(self.output_path, 'wb')
+        else:
+            self._fileobj = self.stream
+
+        if self.archive_format == 'TAR':
+            self.archive = tarfile.open(
+                fileobj=self._fileobj,
+                mode='w' if self.stream is None else 'w|'
+            )
+        else:
+            compression = (
+                zipfile.ZIP_STORED
+                if self.archive_format == 'ZIP (Stored)'
+                else zipfile.ZIP_DEFLATED
+            )
+            self.archive = zipfile.ZipFile(
+                self._fileobj,
+                'w',
+                compression=compression,
+                allowZip64=True
+            )
+        return True
+
+    def write_page(self, page: Image.Image, page_num: int) -> None:
+        """Encode a page and add it to the archive."""
+        buffer = io.BytesIO()
+        if self.settings.export_format.lower() == 'png':
+            compress = int((100 - self.settings.quality) / 10)
+            page.save(buffer, 'PNG', compress_level=compress)
+        else:
+            page.save(buffer, 'JPEG', quality=self.settings.quality)
+        data = buffer.getvalue()
+
+        name = self._member_name(page_num)
+        if self.archive_format == 'TAR':
+            member = tarfile.TarInfo(name)
+            member.size = len(data)
+            member.mtime = int(time.time())
+            self.archive.addfile(member, io.BytesIO(data))
+        else:
+            self.archive.writestr(
+                zipfile.ZipInfo(name, time.localtime()[:6]),
+                data,
+                compress_type=self.archive.compression
+            )
+
+    def checkpoint(self) -> Dict:
+        """Return the archive size after the last complete member."""
+        if self.archive_format == 'TAR' and self.stream is None:
+            return {'bytes': self.archive.offset}
+        return {}
+
+    def close(self) -> None:
+        """Write the archive trailer and close the output."""
+        if self.archive is None:
+            return
+        self.archive.close()
+        self.archive = None
+        if self.stream is None:
+            self._fileobj.close()
+        else:
+            self.stream.flush()
+
+    def discard(self, committed_pages: List[int]) -> None:
+        """Remove the archive file; a stream cannot be taken back."""
+        if self.stream is None:
+            _remove_file(self.output_path)
+
+
+class PdfWriter:
+    """Writes JPEG-encoded pages into a PDF through one open file.
+
+    Each page is appended as an image, a content stream and a page
+    object, and only the byte offsets of the objects are kept, so adding
+    a page costs the same on page 2000 as on page 1. The page tree,
+    cross-reference table and trailer are written once by close(). Pages
+    hang from leaf nodes of at most LEAF_SIZE kids, so no object in the
+    tree grows with the page count except the root's list of leaves.
+
+    A file cut off after any page can be continued: open() with that
+    size walks the object headers written so far to rebuild the offsets
+    and the page tree, skipping over the image data by its length.
+    """
+
+    HEADER = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    CATALOG = 1
+    ROOT = 2
+    LEAF_SIZE = 64
+
+    # Object header, its one-line dictionary and an optional stream start
+    _OBJECT = re.compile(rb'(\d+) 0 obj\n([^\n]*)\n(stream\n)?')
+    _LENGTH = re.compile(rb'/Length (\d+)')
+    _PARENT = re.compile(rb'^<< /Type /Page /Parent (\d+) 0 R')
+
+    def __init__(self, path: str, resolution: int = 300):
+        """Initialize for the PDF at path, with pages at resolution DPI."""
+        self.path = path
+        self.resolution = resolution
+        self.offsets: Dict[int, int] = {}
+        self.pages: List[int] = []
+        self.leaves: List[int] = []
+        self.next_number = self.ROOT + 1
+        self._file = None
+
+    def open(self, size: int = 0) -> None:
+        """Start a new PDF, or continue one cut back to size bytes.
+
+        Raises ValueError if the first size bytes are not whole objects
+        written by this class.
+        """
+        if not size:
+            self._file = open(self.path, 'wb')
+            self._file.write(self.HEADER)
+            return
+        self._file = open(self.path, 'r+b')
+        try:
+            self._scan(size)
+        except Exception:
+            self._file.close()
+            self._file = None
+            raise
+        self._file.truncate(size)
+        self._file.seek(size)
+
+    def _scan(self, size: int) -> None:
+        """Rebuild the object offsets and page tree of the first size bytes."""
+        f = self._file
+        if f.read(len(self.HEADER)) != self.HEADER:
+            raise ValueError("Not a PDF written by this exporter")
+        position = len(self.HEADER)
+        while position < size:
+            f.seek(position)
+            head = f.read(1024)
+            match = self._OBJECT.match(head)
+            if not match:
+                raise ValueError(f"No PDF object at byte {position}")
+            number = int(match.group(1))
+            dictionary = match.group(2)
+            self.offsets[number] = position
+            self.next_number = max(self.next_number, number + 1)
+            parent = self._PARENT.match(dictionary)
+            if parent:
+                self.pages.append(number)
+                leaf = int(parent.group(1))
+                if not self.leaves or self.leaves[-1] != leaf:
+                    self.leaves.append(leaf)
+                self.next_number = max(self.next_number, leaf + 1)
+            position += match.end()
+            if match.group(3):
+                length = self._LENGTH.search(dictionary)
+                if not length:
+                    raise ValueError(f"PDF stream without length at {position}")
+                position += int(length.group(1)) + len(b'\nendstream\n')
+            position += len(b'endobj\n')
+        if position != size:
+            raise ValueError("PDF checkpoint is not at an object boundary")
+
+    def _reserve(self) -> int:
+        """Return a new object number, to be written later."""
+        number = self.next_number
+        self.next_number += 1
+        return number
+
+    def _write_object(
+        self,
+        number: int,
+        dictionary: str,
+        stream: Optional[bytes] = None
+    ) -> None:
+        """Write an object with a one-line dictionary and optional stream."""
+        self.offsets[number] = self._file.tell()
+        parts = [f"{number} 0 obj\n{dictionary}\n".encode('latin-1')]
+        if stream is not None:
+            parts += [b'stream\n', stream, b'\nendstream\n']
+        parts.append(b'endobj\n')
+        self._file.write(b''.join(parts))
+
+    def add_page(self, jpeg: bytes, size: Tuple[int, int]) -> None:
+        """Append a page showing a JPEG image of size pixels."""
+        if len(self.pages) % self.LEAF_SIZE == 0:
+            self.leaves.append(self._reserve())
+        image, contents, page = (
+            self._reserve(), self._reserve(), self._reserve()
+        )
+        width = size[0] * 72 / self.resolution
+        height = size[1] * 72 / self.resolution
+        self._write_object(
+            image,
+            f"<< /Type /XObject /Subtype /Image /Width {size[0]} "
+            f"/Height {size[1]} /ColorSpace /DeviceRGB "
+            f"/BitsPerComponent 8 /Filter /DCTDecode /Length {len(jpeg)} >>",
+            jpeg
+        )
+        drawing = f"q {width:.2f} 0 0 {height:.2f} 0 0 cm /Im0 Do Q".encode()
+        self._write_object(
+            contents,
+            f"<< /Length {len(drawing)} >>",
+            drawing
+        )
+        self._write_object(
+            page,
+            f"<< /Type /Page /Parent {self.leaves[-1]} 0 R "
+            f"/MediaBox [0 0 {width:.2f} {height:.2f}] "
+            f"/Resources << /XObject << /Im0 {image} 0 R >> >> "
+            f"/Contents {contents} 0 R >>"
+        )
+        self.pages.append(page)
+
+    def position(self) -> int:
+        """Return the size of the file up to the end of the last page."""
+        return self._file.tell()
+
+    def flush(self) -> None:
+        """Push the pages written so far to the operating system."""
+        self._file.flush()
+
+    def closing_bytes(self) -> int:
+        """Estimate what close() will add to the file."""
+        return (
+            20 * self.next_number
+            + 60 * len(self.leaves)
+            + 12 * len(self.pages)
+            + 200
+        )
+
+    def close(self) -> None:
+        """Write the page tree, cross-reference table and trailer."""
+        if self._file is None:
+            return
+        for i, leaf in enumerate(self.leaves):
+            kids = self.pages[i * self.LEAF_SIZE:(i + 1) * self.LEAF_SIZE]
+            self._write_object(
+                leaf,
+                f"<< /Type /Pages /Parent {self.ROOT} 0 R "
+                f"/Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] "
+                f"/Count {len(kids)} >>"
+            )
+        self._write_object(
+            self.ROOT,
+            f"<< /Type /Pages "
+            f"/Kids [{' '.join(f'{leaf} 0 R' for leaf in self.leaves)}] "
+            f"/Count {len(self.pages)} >>"
+        )
+        self._write_object(
+            self.CATALOG,
+            f"<< /Type /Catalog /Pages {self.ROOT} 0 R >>"
+        )
+
+        xref = self._file.tell()
+        lines = [f"xref\n0 {self.next_number}\n0000000000 65535 f \n"]
+        lines += [
+            f"{self.offsets[number]:010d} 00000 n \n"
+            for number in range(1, self.next_number)
+        ]
+        lines.append(
+            f"trailer\n<< /Size {self.next_number} "
+            f"/Root {self.CATALOG} 0 R >>\n"
+            f"startxref\n{xref}\n%%EOF\n"
+        )
+        self._file.write(''.join(lines).encode('latin-1'))
+        self._file.close()
+        self._file = None
+
+
+class PdfPageSink(PageSink):
+    """Streams pages into PDF files, appending one page at a time.
+
+    Pages go through a PdfWriter that stays open for the whole part, so
+    only one page is held in memory and each page costs the same to add.
+    The file size after each page is the checkpoint: resuming truncates
+    anything a crashed run appended past it and carries on from there.
+    The PDF becomes readable once the part is closed, which also happens
+    when an export is cancelled with its partial output kept.
+
+    When a page or size limit is configured the output is split into
+    <name>_part001.pdf, <name>_part002.pdf, ... The running size is known
+    after every page, so a new part is started as soon as the next page
+    would cross a limit, without a second pass over the output.
+    """
+
+    def __init__(self, settings):
+        """Initialize with the settings that name and bound the PDF."""
+        super().__init__(settings)
+        self.base_name = settings.filename_pattern.replace('{number}', '001')
+        self.max_pages = settings.pdf_max_pages
+        self.max_bytes = settings.pdf_max_mb * 1024 * 1024
+        self.split = self.max_pages > 0 or self.max_bytes > 0
+        # [first_page, last_page] of every part started so far
+        self.parts: List[List[int]] = []
+        self.part_pages = 0
+        self.bytes_written = 0
+        self.last_page_bytes = 0
+        self.writer = None
+
+    def _part_path(self, part: int) -> str:
+        """Return the output path of a part, numbered from 1."""
+        if self.split:
+            filename = f"{self.base_name}_part{part:03d}.pdf"
+        else:
+            filename = f"{self.base_name}.pdf"
+        return os.path.join(self.settings.save_folder, filename)
+
+    def resume(self, committed_pages: List[int], state: Dict) -> bool:
+        """Resume from the last committed page if the PDF still holds it."""
+        if not committed_pages:
+            return True
+        parts = state.get('parts', [])
+        size = state.get('bytes', 0)
+        if not parts:
+            return False
+        output_path = self._part_path(len(parts))
+        if not os.path.exists(output_path):
+            return False
+        if os.path.getsize(output_path) < size:
+            return False
+        writer = PdfWriter(output_path)
+        try:
+            writer.open(size)
+        except (OSError, ValueError) as e:
+            print(f"Error resuming PDF export: {e}")
+            return False
+        self.writer = writer
+        self.parts = parts
+        self.part_pages = state.get('part_pages', 0)
+        self.bytes_written = size
+        self.last_page_bytes = state.get('last_page_bytes', 0)
+        return True
+
+    def _should_start_part(self) -> bool:
+        """Check whether the next page would push the part past a limit."""
+        if self.writer is None:
+            return True
+        if not self.split or self.part_pages == 0:
+            return False
+        if self.max_pages and self.part_pages >= self.max_pages:
+            return True
+        return bool(
+            self.max_bytes
+            and self.bytes_written + self.last_page_bytes
+            + self.writer.closing_bytes() > self.max_bytes
+        )
+
+    def write_page(self, page: Image.Image, page_num: int) -> None:
+        """Append a page, starting a new part when a limit is reached."""
+        if self._should_start_part():
+            if self.writer is not None:
+                self.writer.close()
+            self.parts.append([page_num, page_num])
+            self.part_pages = 0
+            self.writer = PdfWriter(self._part_path(len(self.parts)))
+            self.writer.open()
+            self.bytes_written = self.writer.position()
+
+        page = page.convert('RGB')
+        buffer = io.BytesIO()
+        page.save(buffer, 'JPEG')
+        self.writer.add_page(buffer.getvalue(), page.size)
+        size = self.writer.position()
+        self.last_page_bytes = size - self.bytes_written
+        self.bytes_written = size
+        self.part_pages += 1
+        self.parts[-1][1] = page_num
+
+    def checkpoint(self) -> Dict:
+        """Return the parts so far and the size of the current one."""
+        self.writer.flush()
+        return {
+            'parts': self.parts,
+            'part_pages': self.part_pages,
+            'bytes': self.bytes_written,
+            'last_page_bytes': self.last_page_bytes
+        }
+
+    def close(self) -> None:
+        """Finish the current part."""
+        if self.writer is not None:
+            self.writer.close()
+
+    def discard(self, committed_pages: List[int]) -> None:
+        """Remove every part written so far."""
+        for part in range(1, len(self.parts) + 1):
+            _remove_file(self._part_path(part))
+
+    def write_index(self, page_batches: List[List[Dict]]) -> None:
+        """Write <name>_index.json listing the images in every part."""
+        if not self.settings.pdf_split_index:
+            return
+        index = []
+        for part, (first_page, last_page) in enumerate(self.parts, 1):
+            index.append({
+                'file': os.path.basename(self._part_path(part)),
+                'pages': [first_page, last_page],
+                'images': [
+                    {
+                        'page': page_num,
+                        'filename': info['filename'],
+                        'path': info['path']
+                    }
+                    for page_num in range(first_page, last_page + 1)
+                    for info in page_batches[page_num - 1]
+                ]
+            })
+        with open(
+            os.path.join(
+                self.settings.save_folder,
+                f"{self.base_name}_index.json"
+            ),
+            'w',
+            encoding='utf-8'
+        ) as f:
+            json.dump({'parts': index}, f, indent=1)
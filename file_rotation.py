@@ -0,0 +1,188 @@
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Dict
+
+import piexif
+from PIL import Image
+
+
+class FileRotator:
+    """Rotates image files without decoding and re-encoding their pixels.
+
+    The orientation mode only rewrites the EXIF Orientation tag, leaving
+    the compressed image data byte for byte as it was. The lossless mode
+    runs jpegtran, which rotates JPEG data in the DCT domain and copies
+    every marker, so the result is the same image with no generation
+    loss. Either mode returns False when it cannot handle a file, so the
+    caller can fall back to a non-destructive rotation.
+    """
+
+    # Setting values for ImageProcessor.rotate_file
+    CATALOG = 'Non-destructive'
+    ORIENTATION = 'EXIF Orientation'
+    LOSSLESS = 'Lossless JPEG'
+    MODES = (CATALOG, ORIENTATION, LOSSLESS)
+
+    JPEG_EXTENSIONS = ('.jpg', '.jpeg')
+
+    # Orientation tags that show the stored pixels mirrored
+    MIRRORED = (2, 4, 5, 7)
+
+    # Orientation tag after turning the displayed image 90 degrees
+    # counter-clockwise (the direction of PIL's positive angles)
+    _ROTATED_CCW = {1: 8, 2: 5, 3: 6, 4: 7, 5: 4, 6: 1, 7: 2, 8: 3}
+
+    # Transpose that displays stored pixels as their orientation tag says
+    _TRANSPOSE = {
+        2: Image.Transpose.FLIP_LEFT_RIGHT,
+        3: Image.Transpose.ROTATE_180,
+        4: Image.Transpose.FLIP_TOP_BOTTOM,
+        5: Image.Transpose.TRANSPOSE,
+        6: Image.Transpose.ROTATE_270,
+        7: Image.Transpose.TRANSVERSE,
+        8: Image.Transpose.ROTATE_90
+    }
+
+    def rotate(self, info: Dict, angle: int, mode: str) -> bool:
+        """Rotate a file in the given mode; return False if it was not."""
+        if mode == self.LOSSLESS and self.rotate_lossless(info, angle):
+            return True
+        if mode in (self.ORIENTATION, self.LOSSLESS):
+            return self.rotate_orientation(info, angle)
+        return False
+
+    @classmethod
+    def apply_orientation(
+        cls,
+        img: Image.Image,
+        orientation: int
+    ) -> Image.Image:
+        """Return stored pixels turned the way their orientation tag says."""
+        transpose = cls._TRANSPOSE.get(orientation)
+        return img.transpose(transpose) if transpose is not None else img
+
+    @staticmethod
+    def is_sideways(info: Dict) -> bool:
+        """Check whether orientation and rotation together turn 90 degrees."""
+        quarter_turns = info['rotation'] // 90
+        if info['orientation'] in (5, 6, 7, 8):
+            quarter_turns += 1
+        return quarter_turns % 2 == 1
+
+    @classmethod
+    def rotated_orientation(cls, orientation: int, angle: int) -> int:
+        """Return the orientation tag after rotating by angle degrees."""
+        if orientation not in cls._ROTATED_CCW:
+            orientation = 1
+        for _ in range((angle // 90) % 4):
+            orientation = cls._ROTATED_CCW[orientation]
+        return orientation
+
+    def rotate_orientation(self, info: Dict, angle: int) -> bool:
+        """Rotate a JPEG by rewriting only its EXIF Orientation tag."""
+        path = info['path']
+        if not path.lower().endswith(self.JPEG_EXTENSIONS):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            exif_dict = piexif.load(data)
+            orientation = self.rotated_orientation(
+                exif_dict['0th'].get(piexif.ImageIFD.Orientation, 1),
+                angle
+            )
+            exif_dict['0th'][piexif.ImageIFD.Orientation] = orientation
+
+            # piexif.insert only swaps the APP1 segment
+            output = io.BytesIO()
+            piexif.insert(piexif.dump(exif_dict), data, output)
+            self._replace(path, output.getvalue())
+        except Exception as e:
+            print(f"Error writing orientation of {info['filename']}: {e}")
+            return False
+
+        info['orientation'] = orientation
+        self._rotate_thumbnail(info, angle)
+        return True
+
+    def rotate_lossless(self, info: Dict, angle: int) -> bool:
+        """Rotate a JPEG losslessly with jpegtran, keeping all metadata.
+
+        -perfect makes jpegtran refuse images whose size is not a whole
+        number of blocks rather than trimming the edge blocks.
+        """
+        path = info['path']
+        jpegtran = shutil.which('jpegtran')
+        if not jpegtran or not path.lower().endswith(self.JPEG_EXTENSIONS):
+            return False
+
+        # jpegtran turns the stored pixels clockwise; a mirrored
+        # orientation shows them turning the other way
+        if info['orientation'] in self.MIRRORED:
+            clockwise = angle % 360
+        else:
+            clockwise = (-angle) % 360
+        if clockwise == 0:
+            return True
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path),
+            suffix='.tmp'
+        )
+        os.close(fd)
+        try:
+            result = subprocess.run(
+                [
+                    jpegtran, '-copy', 'all', '-perfect',
+                    '-rotate', str(clockwise),
+                    '-outfile', tmp_path, path
+                ],
+                capture_output=True
+            )
+            if result.returncode != 0:
+                print(
+                    f"Lossless rotation not possible for {info['filename']}: "
+                    f"{result.stderr.decode(errors='replace').strip()}"
+                )
+                return False
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error rotating {info['filename']} losslessly: {e}")
+            return False
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        if clockwise != 180:
+            info['width'], info['height'] = info['height'], info['width']
+        self._rotate_thumbnail(info, angle)
+        return True
+
+    @staticmethod
+    def _replace(path: str, data: bytes) -> None:
+        """Write data to a temporary file and rename it over path."""
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path),
+            suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _rotate_thumbnail(info: Dict, angle: int) -> None:
+        """Turn the list thumbnail to match the rotated file."""
+        path = info['thumbnail_path']
+        try:
+            with Image.open(path) as thumb:
+                rotated = thumb.rotate(angle, expand=True)
+            rotated.save(path, 'JPEG')
+        except Exception as e:
+            print(f"Error rotating thumbnail {path}: {e}")
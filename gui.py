@@ -1,15 +1,28 @@
 import os
 from PyQt5.QtWidgets import (
-    QWidget, QLabel, QPushButton, QFileDialog, QListWidget,
+    QWidget, QLabel, QPushButton, QFileDialog, QListView,
     QVBoxLayout, QHBoxLayout, QGroupBox, QComboBox,
-    QCheckBox, QLineEdit, QTextEdit, QListWidgetItem, QSplitter,
+    QCheckBox, QLineEdit, QTextEdit, QSplitter, QAbstractItemView,
     QGraphicsView, QGraphicsScene, QAction, QMenuBar, QStatusBar,
-    QSlider, QMessageBox, QSizePolicy
+    QSlider, QMessageBox, QSizePolicy, QSpinBox, QProgressBar
 )
-from PyQt5.QtGui import QIcon, QPixmap, QFont
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QFont
+from PyQt5.QtCore import Qt, QThreadPool
 from image_processor import ImageProcessor
+from image_list_model import ImageListModel
+from colour_stats import ContentOrder
+from export_task import ExportProgress, ExportTask
+from file_rotation import FileRotator
+from query import QueryError
+from rotation_task import RotationBatch
+from preview import (
+    PreviewLayoutTask,
+    PreviewPageCache,
+    PreviewScheduler,
+    PreviewTask
+)
 from settings_manager import SettingsManager
+from timeline import TimestampIndex
 from resources import Resources
 
 
@@ -28,7 +41,35 @@ class ContactSheetCreatorGUI(QWidget):
         # Preview state
         self.current_preview_page = 1
         self.total_preview_pages = 1
+        self.preview_generation = 0
+        self.preview_task = None
+        self.layout_task = None
+        self.prefetch_tasks = []
+        # Key of the page waited for, which a prefetch may deliver
+        self.preview_key = None
+        self.preview_page_cache = PreviewPageCache()
+        self.preview_thread_pool = QThreadPool()
+        self.preview_thread_pool.setMaxThreadCount(1)
+        self.preview_images = []
+        self.preview_pages = []
+        self.preview_scheduler = PreviewScheduler(self)
+        self.preview_scheduler.render_requested.connect(self.updatePreview)
+
+        # Images matched by the filter, None to use the selection
+        self.filtered_images = None
+
+        # Export state
+        self.export_task = None
+        self.export_progress = None
+        self.export_thread_pool = QThreadPool()
+        self.export_thread_pool.setMaxThreadCount(1)
         
+        # Rotation state
+        self.rotation_batch = RotationBatch(self)
+        self.rotation_batch.row_rotated.connect(self._onImageRotated)
+        self.rotation_batch.progress.connect(self._onRotationProgress)
+        self.rotation_batch.finished.connect(self._onRotationFinished)
+
         # Load settings
         self.settings_manager = SettingsManager()
         self.image_processor = ImageProcessor(self.settings_manager)
@@ -56,6 +97,12 @@ class ContactSheetCreatorGUI(QWidget):
         # System message label (left side)
         self.status_message = QLabel('Ready')
         self.status_bar.addWidget(self.status_message, stretch=1)
+
+        # Export progress (hidden while no export runs)
+        self.export_progress_bar = QProgressBar()
+        self.export_progress_bar.setMaximumWidth(200)
+        self.export_progress_bar.hide()
+        self.status_bar.addPermanentWidget(self.export_progress_bar)
         
         # Copyright label (right side)
         copyright_label = QLabel("© 2024 Patrick DeLuca")
@@ -98,7 +145,9 @@ class ContactSheetCreatorGUI(QWidget):
         ]
         self.font_combo_box.addItems(fonts)
         self.font_combo_box.setCurrentText('Segoe UI')
-        self.font_combo_box.currentTextChanged.connect(self.updatePreview)
+        self.font_combo_box.currentTextChanged.connect(
+            self._onTextSettingChanged
+        )
         return self.font_combo_box
 
     def initializeFields(self):
@@ -111,6 +160,16 @@ class ContactSheetCreatorGUI(QWidget):
         self.quality_slider.setValue(settings.quality)
         pattern = settings.filename_pattern
         self.filename_pattern_line_edit.setText(pattern)
+        self.archive_format_combo_box.setCurrentText(settings.archive_format)
+        self.pdf_max_pages_spin_box.setValue(settings.pdf_max_pages)
+        self.pdf_max_size_spin_box.setValue(settings.pdf_max_mb)
+        self.pdf_index_checkbox.setChecked(settings.pdf_split_index)
+        self.rotation_mode_combo_box.setCurrentText(settings.rotation_mode)
+        self.sort_by_combo_box.setCurrentText(settings.sort_by)
+        self.group_by_combo_box.setCurrentText(settings.group_by)
+        self.collapse_duplicates_checkbox.setChecked(
+            settings.collapse_duplicates
+        )
         self.include_metadata_checkbox.setChecked(settings.include_metadata)
         self.watermark_text_line_edit.setText(settings.watermark_text)
         self.save_folder_line_edit.setText(settings.save_folder)
@@ -219,18 +278,41 @@ class ContactSheetCreatorGUI(QWidget):
         left_layout.setContentsMargins(0, 0, 0, 0)  # Remove margins
 
         # Image List
-        self.image_list_widget = QListWidget()
-        self.image_list_widget.setSelectionMode(
-            QListWidget.ExtendedSelection
+        self.image_list_model = ImageListModel(self.image_processor, self)
+        self.image_list_view = QListView()
+        self.image_list_view.setModel(self.image_list_model)
+        self.image_list_view.setUniformItemSizes(True)
+        self.image_list_view.setSelectionMode(
+            QAbstractItemView.ExtendedSelection
         )
-        self.image_list_widget.itemSelectionChanged.connect(
-            self.updatePreview
+        self.image_list_view.selectionModel().selectionChanged.connect(
+            self._onSelectionChanged
         )
 
+        # Filter expression selecting the sheet's images
+        filter_label = QLabel('Filter:')
+        self.filter_line_edit = QLineEdit()
+        self.filter_line_edit.setPlaceholderText(
+            'e.g. date:2024-05 camera:canon orientation:portrait'
+        )
+        self.filter_line_edit.setToolTip(
+            'Use the images matching this filter instead of the '
+            'selection.\nFields: date, camera, name, folder, orientation, '
+            'width, height, mp, filesize, rotated.\nCombine terms with '
+            'spaces, OR, parentheses and a leading - to negate.'
+        )
+        self.filter_line_edit.setClearButtonEnabled(True)
+        self.filter_line_edit.returnPressed.connect(self.applyFilter)
+        self.filter_line_edit.textChanged.connect(self._onFilterTextChanged)
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(filter_label)
+        filter_layout.addWidget(self.filter_line_edit)
+
         # Drag and Drop Support
-        self.image_list_widget.setAcceptDrops(True)
-        self.image_list_widget.dragEnterEvent = self.dragEnterEvent
-        self.image_list_widget.dropEvent = self.dropEvent
+        self.image_list_view.setAcceptDrops(True)
+        self.image_list_view.dragEnterEvent = self.dragEnterEvent
+        self.image_list_view.dragMoveEvent = self.dragEnterEvent
+        self.image_list_view.dropEvent = self.dropEvent
 
         # View Toggle Button
         self.view_toggle_button = QPushButton('Toggle View')
@@ -249,13 +331,14 @@ class ContactSheetCreatorGUI(QWidget):
         editing_layout.addWidget(rotate_right_button)
 
         # CREATE Button
-        create_button = QPushButton('CREATE')
-        create_button.setFont(QFont('Arial', 14, QFont.Bold))
-        create_button.clicked.connect(self.createContactSheet)
+        self.create_button = QPushButton('CREATE')
+        self.create_button.setFont(QFont('Arial', 14, QFont.Bold))
+        self.create_button.clicked.connect(self.createContactSheet)
 
         left_layout.addLayout(editing_layout)
-        left_layout.addWidget(self.image_list_widget)
-        left_layout.addWidget(create_button)
+        left_layout.addLayout(filter_layout)
+        left_layout.addWidget(self.image_list_view)
+        left_layout.addWidget(self.create_button)
         left_widget.setLayout(left_layout)
 
         # Right Panel (Settings and Preview)
@@ -306,9 +389,17 @@ class ContactSheetCreatorGUI(QWidget):
             ('Context Text:', self._createContextTextEdit()),
             ('Font:', self._createFontComboBox()),
             ('Size:', self._createFontSizeComboBox()),
+            ('Order By:', self._createSortByComboBox()),
+            ('Group By:', self._createGroupByComboBox()),
+            (None, self._createCollapseDuplicatesCheckbox()),
             ('Export Format:', self._createExportFormatComboBox()),
             ('Quality:', self._createQualitySlider()),
             ('Filename Pattern:', self._createFilenamePatternEdit()),
+            ('Archive:', self._createArchiveFormatComboBox()),
+            ('PDF Pages per File:', self._createPdfMaxPagesSpinBox()),
+            ('PDF Max File Size (MB):', self._createPdfMaxSizeSpinBox()),
+            (None, self._createPdfIndexCheckbox()),
+            ('Rotation:', self._createRotationModeComboBox()),
             (None, self._createMetadataCheckbox()),
             ('Watermark Text:', self._createWatermarkEdit())
         ]
@@ -325,7 +416,7 @@ class ContactSheetCreatorGUI(QWidget):
         """Create the context text edit control."""
         self.context_text_edit = QTextEdit()
         self.context_text_edit.setMaximumHeight(100)  # Limit height
-        self.context_text_edit.textChanged.connect(self.updatePreview)
+        self.context_text_edit.textChanged.connect(self._onTextSettingChanged)
         return self.context_text_edit
 
     def _createFontSizeComboBox(self):
@@ -334,16 +425,46 @@ class ContactSheetCreatorGUI(QWidget):
         sizes = [str(size) for size in range(12, 31, 2)]
         self.font_size_combo_box.addItems(sizes)
         self.font_size_combo_box.currentTextChanged.connect(
-            self.updatePreview
+            self._onTextSettingChanged
         )
         return self.font_size_combo_box
 
+    def _createSortByComboBox(self):
+        """Create the combo box ordering by time, brightness or colour."""
+        self.sort_by_combo_box = QComboBox()
+        self.sort_by_combo_box.addItems(ContentOrder.MODES)
+        self.sort_by_combo_box.currentTextChanged.connect(
+            self._onLayoutSettingChanged
+        )
+        return self.sort_by_combo_box
+
+    def _createGroupByComboBox(self):
+        """Create the combo box starting a new page per day, week or month."""
+        self.group_by_combo_box = QComboBox()
+        self.group_by_combo_box.addItems(TimestampIndex.GROUP_PERIODS)
+        self.group_by_combo_box.currentTextChanged.connect(
+            self._onLayoutSettingChanged
+        )
+        return self.group_by_combo_box
+
+    def _createCollapseDuplicatesCheckbox(self):
+        """Create the checkbox showing one image per near-duplicate group."""
+        self.collapse_duplicates_checkbox = QCheckBox(
+            'Collapse Near-Duplicates'
+        )
+        self.collapse_duplicates_checkbox.stateChanged.connect(
+            self._onLayoutSettingChanged
+        )
+        return self.collapse_duplicates_checkbox
+
     def _createExportFormatComboBox(self):
         """Create the export format combo box."""
         self.export_format_combo_box = QComboBox()
-        self.export_format_combo_box.addItems(['JPEG', 'PNG', 'PDF'])
+        self.export_format_combo_box.addItems(
+            ['JPEG', 'PNG', 'PDF', 'DZI', 'HTML']
+        )
         self.export_format_combo_box.currentTextChanged.connect(
-            self.updatePreview
+            self._onOutputSettingChanged
         )
         return self.export_format_combo_box
 
@@ -353,7 +474,7 @@ class ContactSheetCreatorGUI(QWidget):
         self.quality_slider.setMinimum(1)
         self.quality_slider.setMaximum(100)
         self.quality_slider.setValue(80)
-        self.quality_slider.valueChanged.connect(self.updatePreview)
+        self.quality_slider.valueChanged.connect(self._onOutputSettingChanged)
         return self.quality_slider
 
     def _createFilenamePatternEdit(self):
@@ -361,17 +482,54 @@ class ContactSheetCreatorGUI(QWidget):
         self.filename_pattern_line_edit = QLineEdit('contact_sheet_{number}')
         return self.filename_pattern_line_edit
 
+    def _createArchiveFormatComboBox(self):
+        """Create the archive format combo box for image exports."""
+        self.archive_format_combo_box = QComboBox()
+        self.archive_format_combo_box.addItems(
+            ['None', 'ZIP', 'ZIP (Stored)', 'TAR']
+        )
+        return self.archive_format_combo_box
+
+    def _createPdfMaxPagesSpinBox(self):
+        """Create the spin box limiting the pages in each PDF file."""
+        self.pdf_max_pages_spin_box = QSpinBox()
+        self.pdf_max_pages_spin_box.setRange(0, 100000)
+        self.pdf_max_pages_spin_box.setSpecialValueText('No limit')
+        return self.pdf_max_pages_spin_box
+
+    def _createPdfMaxSizeSpinBox(self):
+        """Create the spin box limiting the size of each PDF file."""
+        self.pdf_max_size_spin_box = QSpinBox()
+        self.pdf_max_size_spin_box.setRange(0, 100000)
+        self.pdf_max_size_spin_box.setSpecialValueText('No limit')
+        return self.pdf_max_size_spin_box
+
+    def _createPdfIndexCheckbox(self):
+        """Create the checkbox for writing a PDF part index."""
+        self.pdf_index_checkbox = QCheckBox('Write PDF Part Index')
+        return self.pdf_index_checkbox
+
+    def _createRotationModeComboBox(self):
+        """Create the combo box choosing how images are rotated."""
+        self.rotation_mode_combo_box = QComboBox()
+        self.rotation_mode_combo_box.addItems(FileRotator.MODES)
+        return self.rotation_mode_combo_box
+
     def _createMetadataCheckbox(self):
         """Create the metadata checkbox control."""
         self.include_metadata_checkbox = QCheckBox('Include EXIF Data')
         self.include_metadata_checkbox.setChecked(True)
-        self.include_metadata_checkbox.stateChanged.connect(self.updatePreview)
+        self.include_metadata_checkbox.stateChanged.connect(
+            self._onOutputSettingChanged
+        )
         return self.include_metadata_checkbox
 
     def _createWatermarkEdit(self):
         """Create the watermark text edit control."""
         self.watermark_text_line_edit = QLineEdit()
-        self.watermark_text_line_edit.textChanged.connect(self.updatePreview)
+        self.watermark_text_line_edit.textChanged.connect(
+            self._onTextSettingChanged
+        )
         return self.watermark_text_line_edit
 
     def _createPreviewSection(self):
@@ -425,15 +583,35 @@ class ContactSheetCreatorGUI(QWidget):
         """Show previous preview page."""
         if self.current_preview_page > 1:
             self.current_preview_page -= 1
-            self.updatePreview()
-            self._updateNavigationButtons()
+            self._showPreviewPage()
 
     def nextPreviewPage(self):
         """Show next preview page."""
         if self.current_preview_page < self.total_preview_pages:
             self.current_preview_page += 1
-            self.updatePreview()
-            self._updateNavigationButtons()
+            self._showPreviewPage()
+
+    def _showPreviewPage(self):
+        """Render the current preview page without waiting for a burst."""
+        self._updateNavigationButtons()
+        self.preview_scheduler.invalidate(PreviewScheduler.PAGE)
+        self.preview_scheduler.flush()
+
+    def _onSelectionChanged(self):
+        """Schedule a preview for a changed image selection."""
+        self.preview_scheduler.invalidate(PreviewScheduler.LAYOUT)
+
+    def _onLayoutSettingChanged(self):
+        """Schedule a preview for a changed pagination setting."""
+        self.preview_scheduler.invalidate(PreviewScheduler.LAYOUT)
+
+    def _onTextSettingChanged(self):
+        """Schedule a preview for a changed header, caption or font."""
+        self.preview_scheduler.invalidate(PreviewScheduler.TEXT)
+
+    def _onOutputSettingChanged(self):
+        """Record an export-only setting; the preview is unaffected."""
+        self.preview_scheduler.invalidate(PreviewScheduler.OUTPUT)
 
     def _updateNavigationButtons(self):
         """Update the state of navigation buttons."""
@@ -469,27 +647,64 @@ class ContactSheetCreatorGUI(QWidget):
         self.status_message.setText(message)
 
     def loadImages(self):
-        """Load and display images in the list widget."""
-        self.image_list_widget.clear()
-        for info in self.image_processor.images_info:
-            item = QListWidgetItem(info['filename'])
-            item.setData(Qt.UserRole, info)
-            if self.thumbnail_view:
-                pixmap = QPixmap(info['thumbnail_path'])
-                scaled_pixmap = pixmap.scaled(
-                    100, 100,
-                    Qt.KeepAspectRatio
-                )
-                item.setIcon(QIcon(scaled_pixmap))
-            self.image_list_widget.addItem(item)
-
+        """Show the processor's images in the list view."""
+        self.image_list_model.reload()
         msg = f"Loaded {len(self.image_processor.images_info)} images."
         self.showStatusMessage(msg)
+        if self.filtered_images is not None:
+            self.applyFilter()
+
+    def _selectedRows(self):
+        """Return the selected row numbers in list order."""
+        rows = []
+        selection = self.image_list_view.selectionModel().selection()
+        for selection_range in selection:
+            rows.extend(
+                range(selection_range.top(), selection_range.bottom() + 1)
+            )
+        return sorted(rows)
+
+    def _selectedImages(self):
+        """Return the image records of the selected rows."""
+        return [
+            self.image_list_model.image_at(row)
+            for row in self._selectedRows()
+        ]
+
+    def _sheetImages(self):
+        """Return the images for the sheet: filtered, else selected."""
+        if self.filtered_images is not None:
+            return self.filtered_images
+        return self._selectedImages()
+
+    def applyFilter(self):
+        """Use the images matching the filter expression for the sheet."""
+        expression = self.filter_line_edit.text().strip()
+        if not expression:
+            self.filtered_images = None
+        else:
+            try:
+                self.filtered_images = self.image_processor.filter_images(
+                    expression
+                )
+            except QueryError as e:
+                self.filtered_images = None
+                self.showStatusMessage(f"Invalid filter: {e}")
+                return
+            self.showStatusMessage(
+                f"Filter matched {len(self.filtered_images)} images."
+            )
+        self.preview_scheduler.invalidate(PreviewScheduler.LAYOUT)
+
+    def _onFilterTextChanged(self, text):
+        """Go back to the selection once the filter is cleared."""
+        if not text.strip() and self.filtered_images is not None:
+            self.applyFilter()
 
     def toggleView(self):
         """Toggle between thumbnail and list view."""
         self.thumbnail_view = not self.thumbnail_view
-        self.loadImages()
+        self.image_list_model.set_show_thumbnails(self.thumbnail_view)
 
     def rotateLeft(self):
         """Rotate selected images left."""
@@ -500,9 +715,9 @@ class ContactSheetCreatorGUI(QWidget):
         self._rotateImages(90)
 
     def _rotateImages(self, angle):
-        """Rotate selected images by the specified angle."""
-        selected_items = self.image_list_widget.selectedItems()
-        if not selected_items:
+        """Rotate selected images by the specified angle in the background."""
+        rows = self._selectedRows()
+        if not rows:
             QMessageBox.warning(
                 self,
                 "No Images Selected",
@@ -510,49 +725,239 @@ class ContactSheetCreatorGUI(QWidget):
             )
             return
 
-        for item in selected_items:
-            info = item.data(Qt.UserRole)
-            self.image_processor.rotate_image(info, angle)
-        self.loadImages()
+        images = [self.image_list_model.image_at(row) for row in rows]
+        mode = self.rotation_mode_combo_box.currentText()
+        self.settings_manager.rotation_mode = mode
+        queued = self.rotation_batch.start(
+            self.image_processor,
+            rows,
+            images,
+            angle,
+            mode
+        )
+        if queued < len(rows):
+            self.showStatusMessage(
+                f"Skipped {len(rows) - queued} images still being rotated."
+            )
+
+    def _onImageRotated(self, row, info):
+        """Refresh the row of a rotated image if it is still shown."""
+        model = self.image_list_model
+        if row < model.rowCount() and model.image_at(row) is info:
+            model.rows_changed([row])
+
+    def _onRotationProgress(self, done, total):
+        """Show the progress of the running rotation batch."""
+        self.showStatusMessage(f"Rotating images... {done} of {total}")
+
+    def _onRotationFinished(self):
+        """Report the finished batch and redraw the preview once."""
+        self.showStatusMessage(
+            f"Rotated {self.rotation_batch.total} images.",
+            5000
+        )
+        self.preview_scheduler.invalidate(PreviewScheduler.IMAGES)
+
+    def updatePreview(self, stages=None):
+        """Request a preview render of the current page in the background.
+
+        stages is the set of PreviewScheduler stages that changed; the
+        selection is only re-read when the layout stage is dirty.
+        """
+        if stages is None:
+            stages = {PreviewScheduler.LAYOUT}
+        if self.layout_task is not None:
+            # The ordering being replaced never arrived
+            stages = set(stages) | {PreviewScheduler.LAYOUT}
+        self._cancelPreview()
+        self._updateSettings()
+        if PreviewScheduler.LAYOUT in stages:
+            # Ordering walks the whole selection, so it runs on the
+            # preview thread and the page is rendered when it is done
+            self.layout_task = PreviewLayoutTask(
+                self.image_processor,
+                self._sheetImages(),
+                self.preview_generation
+            )
+            self.layout_task.signals.finished.connect(self._onPreviewLayout)
+            self.preview_thread_pool.start(self.layout_task)
+            return
+
+        self._showPreviewPages(
+            self.image_processor.get_preview_pages(self.preview_images)
+            if self.preview_images else []
+        )
 
-    def updatePreview(self):
-        """Update the preview display."""
-        selected_items = self.image_list_widget.selectedItems()
-        if not selected_items:
+    def _onPreviewLayout(self, generation, images, pages):
+        """Take the ordered images and render the current page."""
+        if generation != self.preview_generation:
+            return
+        self.layout_task = None
+        self.preview_images = images
+        self._showPreviewPages(pages)
+
+    def _showPreviewPages(self, pages):
+        """Show the current page of freshly paginated preview images."""
+        if not pages:
+            self._cancelPrefetches()
+            self.preview_pages = []
             self.preview_graphics_scene.clear()
             self.total_preview_pages = 1
             self.current_preview_page = 1
             self._updateNavigationButtons()
             return
 
-        selected_images = [item.data(Qt.UserRole) for item in selected_items]
-        self._updateSettings()
-
-        # Get total pages first
-        self.total_preview_pages = self.image_processor.get_total_pages(
-            len(selected_images)
-        )
-        
-        # Ensure current page is valid
+        self.preview_pages = pages
+        self.total_preview_pages = len(self.preview_pages)
         self.current_preview_page = min(
             self.current_preview_page,
             self.total_preview_pages
         )
 
-        preview_image = self.image_processor.generate_preview(
-            selected_images,
-            self.current_preview_page
+        key = self._previewPageKey(self.current_preview_page)
+        self._cancelPrefetches(
+            [key] + [
+                self._previewPageKey(page_num)
+                for page_num in self._neighbourPages()
+            ]
         )
-        
-        if preview_image:
-            self._updatePreviewDisplay(preview_image)
-            self.page_label.setText(
-                f'Page {self.current_preview_page} of {self.total_preview_pages}'
+        cached = self.preview_page_cache.get(key)
+        if cached is not None:
+            self._showPreview(cached)
+            self._prefetchNeighbourPages()
+            return
+
+        self.preview_key = key
+        if any(task.key == key for task in self.prefetch_tasks):
+            # The page is already being prefetched; show that render
+            return
+        self.preview_task = self._startPreviewTask(
+            self.current_preview_page,
+            self.preview_generation,
+            key
+        )
+
+    def _startPreviewTask(self, page_num, generation, key, priority=0):
+        """Queue a background render of one preview page."""
+        task = PreviewTask(
+            self.image_processor,
+            self.preview_images,
+            page_num,
+            generation,
+            key
+        )
+        task.signals.finished.connect(self._onPreviewRendered)
+        self.preview_thread_pool.start(task, priority)
+        return task
+
+    def _previewPageKey(self, page_num):
+        """Build a key identifying everything drawn on a preview page."""
+        settings = self.settings_manager
+        return (
+            page_num,
+            self.total_preview_pages,
+            tuple(
+                (
+                    info['path'],
+                    info['mtime_ns'],
+                    info['rotation'],
+                    info['orientation'],
+                    info['width'],
+                    info['height']
+                )
+                for info in self.preview_pages[page_num - 1]
+            ),
+            settings.context_text,
+            settings.watermark_text,
+            settings.font_name,
+            settings.font_size
+        )
+
+    def _neighbourPages(self):
+        """Return the page numbers either side of the current page."""
+        return [
+            page_num
+            for page_num in (
+                self.current_preview_page + 1,
+                self.current_preview_page - 1
             )
-            self._updateNavigationButtons()
+            if 1 <= page_num <= self.total_preview_pages
+        ]
+
+    def _prefetchNeighbourPages(self):
+        """Render the pages either side of the current one in advance."""
+        for page_num in self._neighbourPages():
+            key = self._previewPageKey(page_num)
+            if key in self.preview_page_cache or any(
+                task.key == key for task in self.prefetch_tasks
+            ):
+                continue
+            # Prefetches use an unreachable generation so they are never shown
+            self.prefetch_tasks.append(
+                self._startPreviewTask(page_num, -1, key, priority=-1)
+            )
+
+    def _cancelPreview(self):
+        """Invalidate any queued or running preview render.
+
+        Prefetches keep running; _cancelPrefetches drops them once the
+        new page and its neighbours are known.
+        """
+        self.preview_generation += 1
+        self.preview_key = None
+        if self.layout_task:
+            self.layout_task.cancel()
+            self.layout_task = None
+        if self.preview_task:
+            self.preview_task.cancel()
+            self.preview_task = None
+
+    def _cancelPrefetches(self, keep=()):
+        """Cancel the prefetches of pages whose key is not in keep."""
+        for task in self.prefetch_tasks:
+            if task.key not in keep:
+                task.cancel()
+        self.prefetch_tasks = [
+            task for task in self.prefetch_tasks if task.key in keep
+        ]
+
+    def _onPreviewRendered(
+        self,
+        generation,
+        page_num,
+        total_pages,
+        image,
+        key
+    ):
+        """Cache a finished page and show it if it is still wanted."""
+        if image is not None and key is not None:
+            self.preview_page_cache.put(key, image)
+        self.prefetch_tasks = [
+            task for task in self.prefetch_tasks if task.key != key
+        ]
+        if generation != self.preview_generation and (
+            key is None or key != self.preview_key
+        ):
+            return
+        self.preview_task = None
+        self.preview_key = None
+        self.total_preview_pages = total_pages
+        self.current_preview_page = page_num
+
+        if image is not None:
+            self._showPreview(image)
+            self._prefetchNeighbourPages()
         else:
             self.preview_graphics_scene.clear()
 
+    def _showPreview(self, image):
+        """Display a rendered preview page and update the navigation."""
+        self._updatePreviewDisplay(image)
+        self.page_label.setText(
+            f'Page {self.current_preview_page} of {self.total_preview_pages}'
+        )
+        self._updateNavigationButtons()
+
     def _updateSettings(self):
         """Update settings from GUI inputs."""
         settings = self.settings_manager
@@ -562,14 +967,24 @@ class ContactSheetCreatorGUI(QWidget):
         settings.export_format = self.export_format_combo_box.currentText()
         settings.quality = self.quality_slider.value()
         settings.filename_pattern = self.filename_pattern_line_edit.text()
+        settings.archive_format = self.archive_format_combo_box.currentText()
+        settings.pdf_max_pages = self.pdf_max_pages_spin_box.value()
+        settings.pdf_max_mb = self.pdf_max_size_spin_box.value()
+        settings.pdf_split_index = self.pdf_index_checkbox.isChecked()
+        settings.rotation_mode = self.rotation_mode_combo_box.currentText()
+        settings.sort_by = self.sort_by_combo_box.currentText()
+        settings.group_by = self.group_by_combo_box.currentText()
+        settings.collapse_duplicates = (
+            self.collapse_duplicates_checkbox.isChecked()
+        )
         settings.include_metadata = self.include_metadata_checkbox.isChecked()
         settings.watermark_text = self.watermark_text_line_edit.text()
         settings.save_folder = self.save_folder_line_edit.text()
 
     def _updatePreviewDisplay(self, preview_image):
-        """Update the preview display with the given image."""
+        """Update the preview display with the given QImage."""
         self.preview_graphics_scene.clear()
-        pixmap = self.image_processor.image_to_pixmap(preview_image)
+        pixmap = QPixmap.fromImage(preview_image)
         self.preview_graphics_scene.addPixmap(pixmap)
         self.preview_graphics_view.fitInView(
             self.preview_graphics_scene.sceneRect(),
@@ -585,17 +1000,64 @@ class ContactSheetCreatorGUI(QWidget):
         self.preview_graphics_view.scale(0.8, 0.8)
 
     def createContactSheet(self):
-        """Create the contact sheet."""
+        """Start a background export, or cancel the one running."""
+        if self.export_task:
+            self.cancelExport()
+            return
         if not self._validateContactSheetCreation():
             return
 
         self._updateSettings()
         self.settings_manager.save_settings()
 
-        selected_items = self.image_list_widget.selectedItems()
-        selected_images = [item.data(Qt.UserRole) for item in selected_items]
+        task = ExportTask(self.image_processor, self._sheetImages())
+        task.signals.progress.connect(self._onExportProgress)
+        task.signals.finished.connect(self._onExportFinished)
+        self.export_task = task
+        self.export_progress = ExportProgress()
+        self.export_progress_bar.setValue(0)
+        self.export_progress_bar.show()
+        self.create_button.setText('CANCEL')
+        self.showStatusMessage("Exporting...")
+        self.export_thread_pool.start(task)
+
+    def cancelExport(self):
+        """Ask whether to keep partial output and cancel the export."""
+        answer = QMessageBox.question(
+            self,
+            "Cancel Export",
+            "Keep the pages written so far? Kept pages are reused when "
+            "the same export is run again.",
+            QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel,
+            QMessageBox.Yes
+        )
+        if answer == QMessageBox.Cancel or not self.export_task:
+            return
+        self.export_task.cancel(keep_partial=answer == QMessageBox.Yes)
+        self.create_button.setEnabled(False)
+        self.showStatusMessage("Cancelling export after the current page...")
+
+    def _onExportProgress(self, pages_done, total_pages, images_done):
+        """Show the progress of the running export."""
+        self.export_progress_bar.setMaximum(max(1, total_pages))
+        self.export_progress_bar.setValue(pages_done)
+        self.showStatusMessage(
+            self.export_progress.describe(
+                pages_done,
+                total_pages,
+                images_done
+            )
+        )
 
-        if self.image_processor.create_contact_sheet(selected_images):
+    def _onExportFinished(self, success, cancelled):
+        """Reset the export controls and report the outcome."""
+        self.export_task = None
+        self.export_progress_bar.hide()
+        self.create_button.setText('CREATE')
+        self.create_button.setEnabled(True)
+        if cancelled:
+            self.showStatusMessage("Export cancelled.", 5000)
+        elif success:
             self._showSuccessMessage()
         else:
             self._showErrorMessage()
@@ -614,7 +1076,15 @@ class ContactSheetCreatorGUI(QWidget):
             )
             return False
 
-        if not self.image_list_widget.selectedItems():
+        if self.filtered_images is not None:
+            if not self.filtered_images:
+                QMessageBox.warning(
+                    self,
+                    "No Images Matched",
+                    "No images match the filter."
+                )
+                return False
+        elif not self.image_list_view.selectionModel().hasSelection():
             QMessageBox.warning(
                 self,
                 "No Images Selected",
@@ -655,7 +1125,9 @@ class ContactSheetCreatorGUI(QWidget):
             filepath = url.toLocalFile()
             if os.path.isfile(filepath):
                 self.image_processor.add_image(filepath)
-        self.loadImages()
+        self.image_list_model.images_appended()
+        if self.filtered_images is not None:
+            self.applyFilter()
 
     def toggleTheme(self):
         """Toggle between light and dark themes."""
@@ -681,5 +1153,13 @@ class ContactSheetCreatorGUI(QWidget):
 
     def closeEvent(self, event):
         """Handle application close event."""
+        self._cancelPreview()
+        self._cancelPrefetches()
+        # Let rotations finish rewriting their files
+        self.rotation_batch.wait()
+        if self.export_task:
+            # Keep the written pages so the export can be resumed
+            self.export_task.cancel(keep_partial=True)
+            self.export_thread_pool.waitForDone()
         self.settings_manager.save_settings()
         event.accept()
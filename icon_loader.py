@@ -0,0 +1,141 @@
+import itertools
+from typing import Dict, Tuple
+
+from PyQt5.QtCore import (
+    QObject, QRunnable, QThreadPool, QTimer, Qt, pyqtSignal
+)
+from PyQt5.QtGui import QImage, QTransform
+
+
+class IconSignals(QObject):
+    """Signals emitted by an IconTask back to the GUI thread."""
+
+    # generation, (thumbnail path, rotation) and the scaled QImage (null
+    # on failure)
+    loaded = pyqtSignal(int, object, object)
+
+
+class IconTask(QRunnable):
+    """Decodes and scales one list thumbnail on a worker thread.
+
+    QImage is used instead of QPixmap because pixmaps may only be
+    created on the GUI thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        rotation: int,
+        size: int,
+        generation: int
+    ):
+        """Initialize with the thumbnail to load and the icon size."""
+        super().__init__()
+        self.path = path
+        self.rotation = rotation
+        self.size = size
+        self.generation = generation
+        self.signals = IconSignals()
+        # The loader keeps the task so it can re-queue or drop it
+        self.setAutoDelete(False)
+
+    def run(self) -> None:
+        """Load the thumbnail and hand the scaled image to the GUI thread."""
+        image = QImage(self.path)
+        if not image.isNull():
+            if self.rotation:
+                # Negated: PIL angles are counter-clockwise, Qt's clockwise
+                image = image.transformed(QTransform().rotate(-self.rotation))
+            image = image.scaled(self.size, self.size, Qt.KeepAspectRatio)
+        self.signals.loaded.emit(
+            self.generation,
+            (self.path, self.rotation),
+            image
+        )
+
+
+class IconLoader(QObject):
+    """Loads list icons in the background, most recently requested first.
+
+    The view only asks for rows it is painting, so the newest requests
+    are the visible ones: each request is queued above every earlier
+    one, and asking again for a queued path moves it to the front.
+    Finished icons are collected for BATCH_MS and delivered together in
+    icons_ready, so a fast scroll repaints the list a few times instead
+    of once per row.
+    """
+
+    BATCH_MS = 30
+
+    # {(thumbnail path, rotation): QImage}
+    icons_ready = pyqtSignal(object)
+
+    def __init__(self, size: int, parent=None):
+        """Initialize an idle loader producing size x size icons."""
+        super().__init__(parent)
+        self.size = size
+        self.generation = 0
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(
+            max(1, QThreadPool.globalInstance().maxThreadCount() // 2)
+        )
+        self._pending: Dict[Tuple[str, int], IconTask] = {}
+        # Tasks of earlier generations that were already running when the
+        # loader was cleared, kept alive until they report back
+        self._stale: Dict[Tuple[int, Tuple[str, int]], IconTask] = {}
+        self._ready: Dict[Tuple[str, int], QImage] = {}
+        self._priority = itertools.count()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.BATCH_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def request(self, path: str, rotation: int = 0) -> None:
+        """Queue a thumbnail ahead of everything requested before it."""
+        key = (path, rotation)
+        task = self._pending.get(key)
+        if task is None:
+            task = IconTask(path, rotation, self.size, self.generation)
+            task.signals.loaded.connect(self._onLoaded)
+            self._pending[key] = task
+        elif not self.thread_pool.tryTake(task):
+            # Already running
+            return
+        self.thread_pool.start(task, next(self._priority))
+
+    def clear(self) -> None:
+        """Drop queued requests and ignore results still in flight.
+
+        Tasks that have started keep running, so they are held until
+        their result arrives instead of being freed under the worker.
+        """
+        for key, task in self._pending.items():
+            if not self.thread_pool.tryTake(task):
+                self._stale[(task.generation, key)] = task
+        self.generation += 1
+        self._pending.clear()
+        self._ready.clear()
+        self._timer.stop()
+
+    def _onLoaded(
+        self,
+        generation: int,
+        key: Tuple[str, int],
+        image: QImage
+    ) -> None:
+        """Collect a finished icon for the next batch."""
+        if generation != self.generation:
+            self._stale.pop((generation, key), None)
+            return
+        self._pending.pop(key, None)
+        self._ready[key] = image
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Deliver the icons finished since the last batch."""
+        self._timer.stop()
+        ready = self._ready
+        self._ready = {}
+        if ready:
+            self.icons_ready.emit(ready)
@@ -0,0 +1,149 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt5.QtGui import QColor, QIcon, QPixmap
+
+from icon_loader import IconLoader
+
+
+class ImageListModel(QAbstractListModel):
+    """Lazy list model over ImageProcessor.images_info for a QListView.
+
+    Rows are thin views over the image records, so nothing is copied into
+    items. Icons are only requested when the view asks for a row it is
+    about to paint; they are decoded by an IconLoader off the GUI thread
+    while the row shows a placeholder, and kept in a bounded LRU so
+    off-screen thumbnails are evicted instead of staying in memory for
+    the whole folder.
+    """
+
+    ICON_CACHE_SIZE = 400
+    ICON_SIZE = 100
+
+    def __init__(self, image_processor, parent=None):
+        """Initialize an empty model over the processor's images."""
+        super().__init__(parent)
+        self.image_processor = image_processor
+        self.show_thumbnails = True
+        self._row_count = 0
+        self._icons: OrderedDict = OrderedDict()
+        # Row last painted for each icon still being loaded, keyed like
+        # the icons by thumbnail path and rotation
+        self._waiting_rows: Dict[Tuple[str, int], int] = {}
+        self._placeholder = self._createPlaceholder()
+        self.icon_loader = IconLoader(self.ICON_SIZE, self)
+        self.icon_loader.icons_ready.connect(self._onIconsReady)
+
+    @property
+    def images_info(self) -> List[Dict]:
+        """Return the image records backing the model."""
+        return self.image_processor.images_info
+
+    def rowCount(self, parent=QModelIndex()):
+        """Return the number of rows known to the view."""
+        if parent.isValid():
+            return 0
+        return self._row_count
+
+    def data(self, index, role=Qt.DisplayRole):
+        """Return the filename, icon or image record for a row."""
+        if not index.isValid() or index.row() >= self._row_count:
+            return None
+        info = self.images_info[index.row()]
+        if role == Qt.DisplayRole:
+            return info['filename']
+        if role == Qt.UserRole:
+            return info
+        if role == Qt.DecorationRole and self.show_thumbnails:
+            return self._icon(index.row(), info)
+        return None
+
+    def image_at(self, row: int) -> Dict:
+        """Return the image record shown in a row."""
+        return self.images_info[row]
+
+    def _icon(self, row: int, info: Dict) -> QIcon:
+        """Return the cached icon for a row, or a placeholder while loading."""
+        key = (info['thumbnail_path'], info['rotation'])
+        icon = self._icons.get(key)
+        if icon is not None:
+            self._icons.move_to_end(key)
+            return icon
+
+        self._waiting_rows[key] = row
+        self.icon_loader.request(*key)
+        return self._placeholder
+
+    def _createPlaceholder(self) -> QIcon:
+        """Create the blank icon shown until a thumbnail is loaded."""
+        pixmap = QPixmap(self.ICON_SIZE, self.ICON_SIZE)
+        pixmap.fill(QColor(200, 200, 200))
+        return QIcon(pixmap)
+
+    def _onIconsReady(self, images: Dict) -> None:
+        """Cache a batch of loaded icons and repaint the rows showing them."""
+        rows = []
+        for key, image in images.items():
+            self._icons[key] = QIcon(QPixmap.fromImage(image))
+            self._icons.move_to_end(key)
+            row = self._waiting_rows.pop(key, None)
+            if row is not None and row < self._row_count:
+                rows.append(row)
+        while len(self._icons) > self.ICON_CACHE_SIZE:
+            self._icons.popitem(last=False)
+
+        # One signal per run of adjacent rows
+        rows.sort()
+        start = 0
+        for i in range(1, len(rows) + 1):
+            if i == len(rows) or rows[i] != rows[i - 1] + 1:
+                self.dataChanged.emit(
+                    self.index(rows[start]),
+                    self.index(rows[i - 1]),
+                    [Qt.DecorationRole]
+                )
+                start = i
+
+    def reload(self) -> None:
+        """Start over after the image records were replaced."""
+        self.beginResetModel()
+        self._row_count = len(self.images_info)
+        self._icons.clear()
+        self._waiting_rows.clear()
+        self.icon_loader.clear()
+        self.endResetModel()
+
+    def images_appended(self) -> None:
+        """Expose records that were appended to images_info."""
+        count = len(self.images_info)
+        if count <= self._row_count:
+            return
+        self.beginInsertRows(QModelIndex(), self._row_count, count - 1)
+        self._row_count = count
+        self.endInsertRows()
+
+    def rows_changed(self, rows: Iterable[int]) -> None:
+        """Refresh the given rows after their images changed."""
+        for row in rows:
+            if row >= self._row_count:
+                continue
+            # The thumbnail file itself may have been rewritten
+            info = self.images_info[row]
+            self._icons.pop((info['thumbnail_path'], info['rotation']), None)
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def set_show_thumbnails(self, show: bool) -> None:
+        """Switch icons on or off without rebuilding the rows."""
+        self.show_thumbnails = show
+        if not show:
+            self._icons.clear()
+            self._waiting_rows.clear()
+            self.icon_loader.clear()
+        if self._row_count:
+            self.dataChanged.emit(
+                self.index(0),
+                self.index(self._row_count - 1),
+                [Qt.DecorationRole]
+            )
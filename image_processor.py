@@ -1,14 +1,32 @@
+import copy
 import os
-import io
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
 
 from PIL import (
     Image, ImageDraw, ImageFont, ImageOps
 )
 import pillow_heif
 import piexif
-from PyQt5.QtGui import QPixmap
+from PyQt5.QtGui import QImage, QPixmap
+
+from catalog import ImageCatalog
+from colour_stats import ColourStats, ContentOrder
+from date_resolver import CaptureDateResolver
+from duplicates import FileHash, NearDuplicateIndex, PerceptualHash
+from edit_catalog import EditCatalog
+from export_job import ExportJob
+from file_rotation import FileRotator
+from page_layers import PageLayerCache
+from query import FilterQuery
+from thumbnail_cache import ThumbnailCache
+from timeline import TimestampIndex
+from exporters import (
+    ArchivePageSink, DeepZoomExporter, GalleryExporter, ImageFilePageSink,
+    PageSink, PdfPageSink
+)
 
 
 class ImageProcessor:
@@ -16,14 +34,26 @@ class ImageProcessor:
 
     THUMBNAIL_SIZE = (150, 150)
     IMAGE_FORMATS = ('.jpg', '.jpeg', '.png', '.heic', '.bmp', '.gif')
-    DATE_FORMAT = '%Y:%m:%d %H:%M:%S'
     DISPLAY_DATE_FORMAT = '%m/%d/%Y %H:%M:%S'
-    IMAGES_PER_PAGE = 6  # Default value, will be updated by layout
+    IMAGES_PER_PAGE = 6  # Default value when no layout is given
+    INGEST_WORKERS = min(8, os.cpu_count() or 1)
+    # Date sources that describe the file rather than its contents
+    PER_FILE_DATE_SOURCES = (
+        None,
+        CaptureDateResolver.FILENAME,
+        CaptureDateResolver.FILE_MODIFIED
+    )
 
     def __init__(self, settings_manager):
         """Initialize with settings manager."""
         self.settings_manager = settings_manager
         self.images_info: List[Dict] = []
+        self.thumbnail_cache = ThumbnailCache()
+        self.edit_catalog = EditCatalog()
+        self.date_resolver = CaptureDateResolver()
+        self.catalog = ImageCatalog()
+        self.file_rotator = FileRotator()
+        self.page_layers = PageLayerCache()
 
     def _get_font(self, font_name: str, size: int) -> ImageFont.FreeTypeFont:
         """Get a PIL ImageFont object, using system defaults."""
@@ -44,87 +74,420 @@ class ImageProcessor:
 
     def load_images_from_folder(self, folder_path: str) -> None:
         """Load all supported images from the specified folder."""
-        self.images_info.clear()
-        for filename in os.listdir(folder_path):
-            if filename.lower().endswith(self.IMAGE_FORMATS):
-                self._process_image_file(folder_path, filename)
+        folder_path = os.path.abspath(folder_path)
+        filenames = [
+            filename for filename in os.listdir(folder_path)
+            if self._is_image_file(filename)
+        ]
+        self.images_info = self._ingest(folder_path, filenames)
+        self.catalog.remove_missing(folder_path, filenames)
+
+    def _ingest(self, folder_path: str, filenames: List[str]) -> List[Dict]:
+        """Return the records of image files in a folder, in listed order.
+
+        Files whose size and modification time match their catalog row
+        are taken from the catalog without being opened. Exact copies of
+        catalogued or earlier listed files share that file's metadata and
+        thumbnail. The rest are decoded on a pool of threads, and every
+        new record is written back to the catalog in a single upsert.
+        """
+        known = self.catalog.folder_records(folder_path)
+        records: Dict[str, Dict] = {}
+        pending = []
+        for filename in filenames:
+            info = known.get(filename)
+            try:
+                stat = os.stat(os.path.join(folder_path, filename))
+            except OSError as e:
+                print(f"Error loading image {filename}: {e}")
+                continue
+            if (
+                info is not None
+                and info['size'] == stat.st_size
+                and info['mtime_ns'] == stat.st_mtime_ns
+                and os.path.exists(info['thumbnail_path'])
+            ):
+                records[filename] = info
+            else:
+                pending.append(filename)
+
+        pillow_heif.register_heif_opener()
+        with ThreadPoolExecutor(max_workers=self.INGEST_WORKERS) as pool:
+            fingerprints = dict(zip(pending, pool.map(
+                partial(self._fingerprint_file, folder_path),
+                pending
+            )))
+            copies, sources, content_hashes = self._find_copies(
+                folder_path,
+                fingerprints,
+                pool
+            )
+            decode = [
+                filename for filename in pending
+                if filename not in copies and fingerprints[filename]
+            ]
+            ingested = [
+                result for result in pool.map(
+                    partial(self._process_image_file, folder_path),
+                    decode,
+                    [fingerprints[filename] for filename in decode]
+                )
+                if result is not None
+            ]
+        for info, _ in ingested:
+            info['content_hash'] = content_hashes.get(info['path'])
+        ingested.extend(
+            self._copy_records(folder_path, copies, sources, ingested)
+        )
+        for info, _ in ingested:
+            records[info['filename']] = info
+
+        # The sidecar travels with the folder, so it wins over the catalog
+        changed, unanalysed, undated = [], [], []
+        for info in known.values():
+            if records.get(info['filename']) is info:
+                rotation = self.edit_catalog.rotation(info)
+                if rotation != info['rotation']:
+                    info['rotation'] = rotation
+                    changed.append(info)
+                if info['dhash'] is None or info['lab_l'] is None:
+                    unanalysed.append(info)
+                if info['date_source'] is None:
+                    undated.append(info)
+        self.catalog.update_edits(changed)
+        self._analyse_thumbnails(unanalysed)
+        self._resolve_dates(undated)
+        self.catalog.upsert_many(
+            [info for info, _ in ingested],
+            {info['path']: exif_bytes for info, exif_bytes in ingested}
+        )
+        return [records[f] for f in filenames if f in records]
+
+    def _fingerprint_file(
+        self,
+        folder_path: str,
+        filename: str
+    ) -> Optional[str]:
+        """Return the size and head/tail fingerprint of a file."""
+        try:
+            return FileHash.fingerprint(os.path.join(folder_path, filename))
+        except OSError as e:
+            print(f"Error loading image {filename}: {e}")
+            return None
+
+    def _find_copies(
+        self,
+        folder_path: str,
+        fingerprints: Dict[str, Optional[str]],
+        pool: ThreadPoolExecutor
+    ) -> Tuple[Dict[str, str], Dict[str, Dict], Dict[str, str]]:
+        """Find new files that are byte-for-byte copies of other files.
+
+        Files whose size and head/tail fingerprint are unique cannot
+        have a copy, so the full content is only hashed, streaming from
+        disk, for files whose fingerprints collide. Returns the source
+        path each copy can share, the catalogued source records by path
+        and the content hashes computed along the way.
+        """
+        by_fingerprint: Dict[str, List[str]] = {}
+        for filename, fingerprint in fingerprints.items():
+            if fingerprint:
+                by_fingerprint.setdefault(fingerprint, []).append(filename)
+
+        new_paths = {
+            os.path.join(folder_path, filename) for filename in fingerprints
+        }
+        catalogued = {
+            fingerprint: [
+                info for info in matches
+                if info['path'] not in new_paths
+                and os.path.exists(info['thumbnail_path'])
+            ]
+            for fingerprint, matches in self.catalog.by_fingerprints(
+                by_fingerprint
+            ).items()
+        }
+        colliding = [
+            fingerprint for fingerprint, filenames in by_fingerprint.items()
+            if len(filenames) > 1 or catalogued.get(fingerprint)
+        ]
+
+        to_hash = [
+            os.path.join(folder_path, filename)
+            for fingerprint in colliding
+            for filename in by_fingerprint[fingerprint]
+        ] + [
+            info['path']
+            for fingerprint in colliding
+            for info in catalogued.get(fingerprint, [])
+            if info['content_hash'] is None
+        ]
+        content_hashes = dict(zip(
+            to_hash,
+            pool.map(self._content_hash_file, to_hash)
+        ))
+        hashed = []
+        for fingerprint in colliding:
+            for info in catalogued.get(fingerprint, []):
+                if info['content_hash'] is None:
+                    info['content_hash'] = content_hashes[info['path']]
+                    hashed.append(info)
+        self.catalog.update_content_hashes(
+            [info for info in hashed if info['content_hash']]
+        )
+
+        copies: Dict[str, str] = {}
+        sources: Dict[str, Dict] = {}
+        for fingerprint in colliding:
+            # Content hash -> path of the first file seen with it
+            originals: Dict[str, str] = {}
+            for info in catalogued.get(fingerprint, []):
+                if info['content_hash']:
+                    originals.setdefault(info['content_hash'], info['path'])
+                    sources[info['path']] = info
+            for filename in by_fingerprint[fingerprint]:
+                path = os.path.join(folder_path, filename)
+                content_hash = content_hashes[path]
+                if not content_hash:
+                    continue
+                if content_hash in originals:
+                    copies[filename] = originals[content_hash]
+                else:
+                    originals[content_hash] = path
+        return copies, sources, content_hashes
+
+    @staticmethod
+    def _content_hash_file(path: str) -> Optional[str]:
+        """Return the full content hash of a file, None if unreadable."""
+        try:
+            return FileHash.content_hash(path)
+        except OSError as e:
+            print(f"Error hashing {path}: {e}")
+            return None
+
+    def _copy_records(
+        self,
+        folder_path: str,
+        copies: Dict[str, str],
+        sources: Dict[str, Dict],
+        ingested: List[Tuple[Dict, bytes]]
+    ) -> List[Tuple[Dict, bytes]]:
+        """Build the records of copies from the files they duplicate."""
+        exif_blobs = {info['path']: exif for info, exif in ingested}
+        exif_blobs.update(self.catalog.exif_blobs(
+            path for path in set(copies.values()) if path in sources
+        ))
+        sources = dict(sources)
+        sources.update((info['path'], info) for info, _ in ingested)
+
+        results = []
+        for filename, source_path in copies.items():
+            source = sources.get(source_path)
+            if source is None:
+                # The original failed to load, so its copy would too
+                continue
+            path = os.path.join(folder_path, filename)
+            thumb_path = os.path.join(folder_path, f".thumbnail_{filename}")
+            try:
+                stat = os.stat(path)
+                shutil.copyfile(source['thumbnail_path'], thumb_path)
+            except OSError as e:
+                print(f"Error loading image {filename}: {e}")
+                continue
+            info = dict(
+                source,
+                filename=filename,
+                path=path,
+                thumbnail_path=thumb_path,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns
+            )
+            if info['date_source'] in self.PER_FILE_DATE_SOURCES:
+                # The original had no embedded date, so neither does this
+                info.update(
+                    self._capture_date({}, None, filename, stat.st_mtime)
+                )
+            info['rotation'] = self.edit_catalog.rotation(info)
+            results.append((info, exif_blobs.get(source_path)))
+        return results
+
+    def _analyse_thumbnails(self, images: List[Dict]) -> None:
+        """Hash and measure catalogued images from their saved thumbnails."""
+        analysed = []
+        for info in images:
+            try:
+                with Image.open(info['thumbnail_path']) as thumb:
+                    info.update(self._thumbnail_stats(thumb))
+                analysed.append(info)
+            except Exception as e:
+                print(f"Error analysing {info['filename']}: {e}")
+        self.catalog.update_thumbnail_stats(analysed)
 
-    def _create_thumbnail(self, img: Image.Image, thumb_path: str) -> None:
-        """Create and save a thumbnail image."""
+    @staticmethod
+    def _thumbnail_stats(thumb: Optional[Image.Image]) -> Dict:
+        """Return the perceptual hash and colour statistics of a thumbnail."""
+        if thumb is None:
+            return dict.fromkeys(('dhash',) + ColourStats.KEYS)
+        return {
+            'dhash': PerceptualHash.dhash(thumb),
+            **ColourStats.compute(thumb)
+        }
+
+    def _resolve_dates(self, images: List[Dict]) -> None:
+        """Resolve catalogued capture dates again from the file headers."""
+        for info in images:
+            try:
+                with Image.open(info['path']) as img:
+                    info.update(self._capture_date(
+                        self.extract_exif_data(img),
+                        self.get_xmp(img),
+                        info['filename'],
+                        info['mtime_ns'] / 1e9
+                    ))
+            except Exception as e:
+                print(f"Error reading date of {info['filename']}: {e}")
+        self.catalog.update_dates(
+            [info for info in images if info['date_source'] is not None]
+        )
+
+    def _is_image_file(self, filename: str) -> bool:
+        """Check for a supported image that is not one of our thumbnails."""
+        return (
+            filename.lower().endswith(self.IMAGE_FORMATS)
+            and not filename.startswith(ThumbnailCache.PREFIX)
+        )
+
+    def _create_thumbnail(
+        self,
+        img: Image.Image,
+        thumb_path: str,
+        orientation: int = 1
+    ) -> Optional[Image.Image]:
+        """Create and save a thumbnail image, upright per its orientation.
+
+        Returns the thumbnail, or None if a blank one had to be saved.
+        """
         try:
             # Convert RGBA to RGB if necessary
             if img.mode == 'RGBA':
                 img = img.convert('RGB')
             
-            # Create thumbnail
+            # Create thumbnail, turning it only once it is small
             thumb = img.copy()
             thumb.thumbnail(self.THUMBNAIL_SIZE)
+            thumb = FileRotator.apply_orientation(thumb, orientation)
             thumb.save(thumb_path, 'JPEG')
             
             # Verify thumbnail was created
             if not os.path.exists(thumb_path):
                 raise Exception("Thumbnail file was not created")
+            return thumb
         except Exception as e:
             print(f"Error creating thumbnail: {e}")
             # Create a blank thumbnail as fallback
             blank = Image.new('RGB', self.THUMBNAIL_SIZE, 'gray')
             blank.save(thumb_path, 'JPEG')
+            return None
 
-    def _process_image_file(self, folder_path: str, filename: str) -> None:
-        """Process a single image file and add it to images_info."""
+    def _process_image_file(
+        self,
+        folder_path: str,
+        filename: str,
+        fingerprint: str
+    ) -> Optional[Tuple[Dict, bytes]]:
+        """Read one image file into a record and its raw EXIF block."""
         try:
             file_path = os.path.join(folder_path, filename)
-            pillow_heif.register_heif_opener()
-            
+            stat = os.stat(file_path)
+
             with Image.open(file_path) as img:
+                # Extract metadata
+                exif_bytes = img.info.get('exif', b'')
+                exif_dict = self.extract_exif_data(img)
+                orientation = self.get_orientation_from_exif(exif_dict)
+
                 # Create thumbnail
                 thumb_path = os.path.join(
                     folder_path,
                     f".thumbnail_{filename}"
                 )
-                self._create_thumbnail(img, thumb_path)
-                
-                # Extract metadata
-                exif_dict = self.extract_exif_data(img)
-                date_time = self.get_datetime_from_exif(exif_dict)
-                date_str = (
-                    date_time.strftime(self.DISPLAY_DATE_FORMAT)
-                    if date_time else 'Unknown Date'
-                )
+                thumb = self._create_thumbnail(img, thumb_path, orientation)
                 
                 # Store image info
-                self.images_info.append({
+                info = {
                     'filename': filename,
                     'path': file_path,
                     'thumbnail_path': thumb_path,
-                    'exif': exif_dict,
-                    'date_time': date_str,
-                    'rotation': 0
-                })
+                    **self._capture_date(
+                        exif_dict,
+                        self.get_xmp(img),
+                        filename,
+                        stat.st_mtime
+                    ),
+                    'camera_model': self.get_camera_model_from_exif(
+                        exif_dict
+                    ),
+                    'width': img.width,
+                    'height': img.height,
+                    'orientation': orientation,
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'fingerprint': fingerprint,
+                    **self._thumbnail_stats(thumb)
+                }
+                info['rotation'] = self.edit_catalog.rotation(info)
+                return info, exif_bytes
         except Exception as e:
             print(f"Error loading image {filename}: {e}")
+            return None
 
     def add_image(self, file_path: str) -> None:
         """Add a single image to the collection."""
+        file_path = os.path.abspath(file_path)
         filename = os.path.basename(file_path)
-        if filename.lower().endswith(self.IMAGE_FORMATS):
-            self._process_image_file(
-                os.path.dirname(file_path),
-                filename
+        if self._is_image_file(filename):
+            self.images_info.extend(
+                self._ingest(os.path.dirname(file_path), [filename])
             )
 
     def rotate_image(self, info: Dict, angle: int) -> None:
-        """Rotate an image and its thumbnail by the specified angle."""
+        """Rotate an image by the specified angle."""
+        self.rotate_images([info], angle)
+
+    def rotate_images(self, images: List[Dict], angle: int) -> None:
+        """Rotate images by the specified angle without touching the files.
+
+        The rotation is recorded in the edit catalog and applied to the
+        downscaled cell when a page is rendered.
+        """
+        for info in images:
+            info['rotation'] = (info['rotation'] + angle) % 360
+        self.edit_catalog.set_rotations(images)
+        self.catalog.update_edits(images)
+
+    def rotate_file(self, info: Dict, angle: int, mode: str) -> None:
+        """Rotate an image in a FileRotator mode.
+
+        The EXIF orientation and lossless JPEG modes read and rewrite the
+        file, so the GUI runs this on a worker thread. In the default
+        mode, and for a file the mode cannot handle, the rotation is
+        recorded in the edit catalog instead.
+        """
+        fingerprint = info['fingerprint']
+        if not self.file_rotator.rotate(info, angle, mode):
+            self.rotate_images([info], angle)
+            return
         try:
-            with Image.open(info['path']) as img:
-                rotated = img.rotate(angle, expand=True)
-                rotated.save(info['path'])
-                
-                # Update thumbnail
-                self._create_thumbnail(rotated, info['thumbnail_path'])
-                info['rotation'] = (info['rotation'] + angle) % 360
-        except Exception as e:
-            print(f"Error rotating image {info['filename']}: {e}")
+            stat = os.stat(info['path'])
+            info['size'] = stat.st_size
+            info['mtime_ns'] = stat.st_mtime_ns
+            info['fingerprint'] = FileHash.fingerprint(info['path'])
+        except OSError as e:
+            print(f"Error reading rotated file {info['filename']}: {e}")
+            return
+        info['content_hash'] = None
+        self.edit_catalog.rekey(info, fingerprint)
+        self.catalog.update_edits([info])
 
     def extract_exif_data(self, image: Image.Image) -> Dict:
         """Extract EXIF data from an image."""
@@ -137,24 +500,124 @@ class ImageProcessor:
             print(f"Error extracting EXIF data: {e}")
         return exif_dict
 
-    def get_datetime_from_exif(self, exif_dict: Dict) -> Optional[datetime]:
-        """Extract datetime from EXIF data."""
-        try:
-            exif = exif_dict.get('Exif', {})
-            date_time_str = exif.get(piexif.ExifIFD.DateTimeOriginal)
-            if date_time_str:
-                date_time_str = date_time_str.decode('utf-8')
-                return datetime.strptime(
-                    date_time_str,
-                    self.DATE_FORMAT
+    def get_orientation_from_exif(self, exif_dict: Dict) -> int:
+        """Extract the EXIF Orientation tag, 1 (upright) if missing."""
+        orientation = exif_dict.get('0th', {}).get(
+            piexif.ImageIFD.Orientation,
+            1
+        )
+        return orientation if orientation in range(1, 9) else 1
+
+    def get_camera_model_from_exif(self, exif_dict: Dict) -> str:
+        """Extract the camera model name, empty if missing."""
+        model = exif_dict.get('0th', {}).get(piexif.ImageIFD.Model, b'')
+        if isinstance(model, bytes):
+            model = model.decode('utf-8', errors='replace')
+        return model.strip('\x00 ')
+
+    def get_xmp(self, image: Image.Image) -> Optional[str]:
+        """Return the XMP packet read with the image header, if any."""
+        xmp = image.info.get('xmp') or image.info.get('XML:com.adobe.xmp')
+        if isinstance(xmp, bytes):
+            xmp = xmp.decode('utf-8', errors='replace')
+        return xmp or None
+
+    def _capture_date(
+        self,
+        exif_dict: Dict,
+        xmp: Optional[str],
+        filename: str,
+        mtime: Optional[float]
+    ) -> Dict:
+        """Return the capture date fields of a record.
+
+        The timestamp is exact when the date's source records its UTC
+        offset. Otherwise the time is taken to be local to this computer
+        and the offset is None.
+        """
+        date_time, source = self.date_resolver.resolve(
+            exif_dict,
+            xmp,
+            filename,
+            mtime
+        )
+        timestamp = utc_offset = None
+        if date_time is not None:
+            if date_time.utcoffset() is not None:
+                utc_offset = int(date_time.utcoffset().total_seconds())
+            try:
+                timestamp = date_time.timestamp()
+            except (OverflowError, OSError, ValueError) as e:
+                print(f"Error converting capture date of {filename}: {e}")
+        return {
+            'date_time': (
+                date_time.strftime(self.DISPLAY_DATE_FORMAT)
+                if date_time else 'Unknown Date'
+            ),
+            'timestamp': timestamp,
+            'utc_offset': utc_offset,
+            'date_source': source
+        }
+
+    def filter_images(self, expression: str) -> List[Dict]:
+        """Return the loaded images matching a filter expression.
+
+        The expression is compiled to an indexed catalog query; raises
+        QueryError if it cannot be parsed.
+        """
+        where, params = FilterQuery.compile(expression)
+        by_path = {info['path']: info for info in self.images_info}
+        folders = {os.path.dirname(path) for path in by_path}
+        return [
+            by_path[path]
+            for path in self.catalog.paths(where, params, folders)
+            if path in by_path
+        ]
+
+    def order_images(self, images_info: List[Dict]) -> List[Dict]:
+        """Return images in sheet order.
+
+        Images are sorted by capture time, unknown dates last. With
+        collapse_duplicates set, each cluster of near duplicates is
+        reduced to its largest image. A brightness or colour sort_by
+        then reorders them, within each group when group_by is set so
+        that pages still follow the calendar.
+        """
+        settings = self.settings_manager
+        images_info = TimestampIndex(images_info).sorted_images()
+        if settings.collapse_duplicates:
+            images_info = NearDuplicateIndex.collapse(images_info)
+        if settings.sort_by != ContentOrder.TIME:
+            images_info = [
+                info
+                for group in TimestampIndex.group(
+                    images_info,
+                    settings.group_by
                 )
-        except Exception as e:
-            print(f"Error parsing EXIF date: {e}")
-        return None
+                for info in ContentOrder.sort(group, settings.sort_by)
+            ]
+        return images_info
+
+    def paginate(
+        self,
+        images_info: List[Dict],
+        images_per_page: int
+    ) -> List[List[Dict]]:
+        """Split ordered images into pages, honouring the group_by setting."""
+        return TimestampIndex.paginate(
+            images_info,
+            images_per_page,
+            self.settings_manager.group_by
+        )
 
-    def get_total_pages(self, total_images: int) -> int:
+    def get_total_pages(
+        self,
+        total_images: int,
+        images_per_page: Optional[int] = None
+    ) -> int:
         """Calculate total number of pages needed."""
-        return (total_images + self.IMAGES_PER_PAGE - 1) // self.IMAGES_PER_PAGE
+        per_page = images_per_page or self.IMAGES_PER_PAGE
+        return (total_images + per_page - 1) // per_page
 
     def _calculate_layout(
         self,
@@ -177,23 +640,62 @@ class ImageProcessor:
         cols = max(2, min(max_cols, 3))
         rows = max(2, min(max_rows, 3))
         
-        self.IMAGES_PER_PAGE = cols * rows
+        # Kept local: previews and background exports lay out
+        # different page sizes at the same time
+        images_per_page = cols * rows
         
         # Calculate thumbnail dimensions
         thumb_width = (width - (cols + 1) * margin) // cols
         thumb_height = (usable_height - (rows + 1) * margin - rows * 50) // rows
         
-        return self.IMAGES_PER_PAGE, cols, thumb_width, thumb_height
+        return images_per_page, cols, thumb_width, thumb_height
 
-    def create_contact_sheet(self, images_info: List[Dict]) -> bool:
-        """Create contact sheets from the provided images."""
+    def create_contact_sheet(
+        self,
+        images_info: List[Dict],
+        progress: Optional[Callable[[int, int, int], None]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        keep_partial: Optional[Callable[[], bool]] = None,
+        stream: Optional[BinaryIO] = None
+    ) -> bool:
+        """Create contact sheets from the provided images.
+
+        progress is called with (pages done, total pages, images done)
+        before the first page and after every page. When is_cancelled
+        reports True the export stops after the current page and returns
+        False; the pages written so far are left in place to be resumed
+        unless keep_partial returns False, in which case they are removed.
+        An export that fails part way closes its output the same way, so
+        the pages written so far can be resumed. DZI and HTML exports
+        count tile rows, pyramid levels or atlases as pages and are not
+        resumed.
+
+        With a binary stream such as sys.stdout.buffer, JPEG or PNG pages
+        are written to it as a ZIP or TAR archive instead of to the save
+        folder.
+        """
+        sink = None
         try:
             settings = self.settings_manager
+            if stream is not None and (
+                settings.export_format.lower() in ('pdf', 'dzi', 'html')
+                or settings.archive_format
+                not in ArchivePageSink.ARCHIVE_FORMATS
+            ):
+                raise ValueError("Only ZIP or TAR archives can be streamed")
             save_folder = settings.save_folder
             os.makedirs(save_folder, exist_ok=True)
 
-            # Sort images by date_time
-            images_info.sort(key=lambda x: x['date_time'])
+            images_info = self.order_images(images_info)
+
+            if settings.export_format.lower() == 'dzi':
+                return DeepZoomExporter(self).export(
+                    images_info,
+                    save_folder,
+                    progress,
+                    is_cancelled,
+                    keep_partial
+                )
 
             # Page setup (8.5 x 11 inches at 300 DPI)
             page_size = (2550, 3300)
@@ -204,29 +706,136 @@ class ImageProcessor:
                 page_size,
                 margin
             )
+            images_per_page = layout[0]
+            page_batches = self.paginate(images_info, images_per_page)
+            if settings.export_format.lower() == 'html':
+                return GalleryExporter(self).export(
+                    page_batches,
+                    save_folder,
+                    layout[1],
+                    images_per_page,
+                    progress,
+                    is_cancelled,
+                    keep_partial
+                )
+
             font = self._get_font('Arial', settings.font_size)
-            
-            # Generate all pages
-            pages = []
-            
-            for i in range(0, len(images_info), self.IMAGES_PER_PAGE):
-                batch = images_info[i:i + self.IMAGES_PER_PAGE]
+            total_pages = len(page_batches)
+            sink = self._create_page_sink(settings, stream)
+            job = ExportJob(
+                os.path.join(
+                    save_folder,
+                    f".{settings.filename_pattern.replace('{number}', 'job')}"
+                    ".json"
+                ),
+                self._export_plan(images_info, page_size, margin, layout)
+            )
+            if not sink.resume(job.committed_pages, job.sink_state):
+                # The earlier output cannot be continued; start afresh
+                job.reset()
+                sink.resume([], {})
+
+            def report(pages_done: int) -> None:
+                if progress:
+                    images_done = sum(
+                        len(page_batches[page_num - 1])
+                        for page_num in job.committed_pages
+                    )
+                    progress(pages_done, total_pages, images_done)
+
+            report(len(job.committed_pages))
+
+            # Render and write one page at a time, checkpointing each
+            for page_num in range(1, total_pages + 1):
+                if job.is_committed(page_num):
+                    continue
+                if is_cancelled and is_cancelled():
+                    sink.close()
+                    if keep_partial and not keep_partial():
+                        sink.discard(job.committed_pages)
+                        job.finish()
+                    return False
                 page = self._generate_page(
-                    batch,
+                    page_batches[page_num - 1],
                     page_size,
                     layout,
                     margin,
                     font,
-                    i // self.IMAGES_PER_PAGE + 1,
-                    (len(images_info) + self.IMAGES_PER_PAGE - 1) // self.IMAGES_PER_PAGE
+                    page_num,
+                    total_pages
                 )
-                pages.append(page)
-            
-            return self._save_pages(pages, settings)
+                sink.write_page(page, page_num)
+                job.commit_page(page_num, sink.checkpoint())
+                report(len(job.committed_pages))
+
+            sink.close()
+            sink.write_index(page_batches)
+            job.finish()
+            return True
         except Exception as e:
             print(f"Error creating contact sheet: {e}")
+            if sink is not None:
+                try:
+                    sink.close()
+                except Exception as close_error:
+                    print(f"Error closing export output: {close_error}")
             return False
 
+    def snapshot(self) -> 'ImageProcessor':
+        """Return a processor bound to a frozen copy of the settings.
+
+        Background exports and preview renders run on a snapshot so that
+        editing settings or loading another folder in the GUI does not
+        change a job that is already running.
+        """
+        processor = copy.copy(self)
+        processor.settings_manager = copy.copy(self.settings_manager)
+        processor.images_info = []
+        return processor
+
+    def _create_page_sink(
+        self,
+        settings,
+        stream: Optional[BinaryIO] = None
+    ) -> PageSink:
+        """Create the page sink for the configured export format."""
+        if stream is not None:
+            return ArchivePageSink(settings, stream)
+        if settings.export_format.lower() == 'pdf':
+            return PdfPageSink(settings)
+        if settings.archive_format in ArchivePageSink.ARCHIVE_FORMATS:
+            return ArchivePageSink(settings)
+        return ImageFilePageSink(settings)
+
+    def _export_plan(
+        self,
+        images_info: List[Dict],
+        page_size: Tuple[int, int],
+        margin: int,
+        layout: Tuple[int, int, int, int]
+    ) -> Dict:
+        """Describe everything that determines the exported pages."""
+        settings = self.settings_manager
+        return {
+            'page_size': page_size,
+            'margin': margin,
+            'layout': layout,
+            'image_count': len(images_info),
+            'inputs': ExportJob.fingerprint_inputs(images_info),
+            'export_format': settings.export_format,
+            'quality': settings.quality,
+            'filename_pattern': settings.filename_pattern,
+            'archive_format': settings.archive_format,
+            'pdf_max_pages': settings.pdf_max_pages,
+            'pdf_max_mb': settings.pdf_max_mb,
+            'group_by': settings.group_by,
+            'collapse_duplicates': settings.collapse_duplicates,
+            'sort_by': settings.sort_by,
+            'font_size': settings.font_size,
+            'context_text': settings.context_text,
+            'watermark_text': settings.watermark_text
+        }
+
     def _generate_page(
         self,
         images: List[Dict],
@@ -240,27 +849,16 @@ class ImageProcessor:
         """Generate a single contact sheet page."""
         page = Image.new('RGB', page_size, 'white')
         draw = ImageDraw.Draw(page)
-        y_offset = margin
 
-        # Add page number
-        page_text = f"Page {page_num} of {total_pages}"
-        text_width = draw.textlength(page_text, font=font)
-        draw.text(
-            (page_size[0] - margin - text_width, y_offset),
-            page_text,
-            fill='black',
-            font=font
+        y_offset = self._draw_header(
+            draw,
+            page_size,
+            margin,
+            font,
+            page_num,
+            total_pages
         )
 
-        if self.settings_manager.context_text:
-            draw.text(
-                (margin, y_offset),
-                self.settings_manager.context_text,
-                fill='black',
-                font=font
-            )
-            y_offset += self.settings_manager.font_size + margin
-
         self._add_images_to_page(
             page,
             images,
@@ -282,6 +880,209 @@ class ImageProcessor:
 
         return page
 
+    def _generate_layered_page(
+        self,
+        images: List[Dict],
+        page_size: Tuple[int, int],
+        layout_params: Tuple[int, int, int, int],
+        margin: int,
+        font: ImageFont.FreeTypeFont,
+        page_num: int,
+        total_pages: int,
+        is_cancelled: Optional[Callable[[], bool]] = None
+    ) -> Optional[Image.Image]:
+        """Compose a preview page from cached layers.
+
+        The image layer is drawn from the thumbnail cache and only
+        rebuilt when the images or the grid change; captions, header and
+        watermark are separate overlays. is_cancelled is polled between
+        cells, and None is returned if the render was cancelled.
+        """
+        settings = self.settings_manager
+        grid = (
+            page_size,
+            layout_params[1],  # cols
+            layout_params[2],  # thumb_width
+            layout_params[3],  # thumb_height
+            margin,
+            self._grid_top(margin)
+        )
+        layers = self.page_layers
+
+        base = layers.get(
+            'images',
+            (grid, tuple(
+                (
+                    info['path'],
+                    info['mtime_ns'],
+                    info['rotation'],
+                    info['orientation'],
+                    info['width'],
+                    info['height']
+                )
+                for info in images
+            )),
+            lambda: self._build_image_layer(images, grid, is_cancelled)
+        )
+        if base is None:
+            return None
+
+        captions = layers.get(
+            'captions',
+            (grid, tuple(
+                (info['filename'], info['date_time']) for info in images
+            )),
+            lambda: layers.build_overlay(
+                page_size,
+                (0, 0, 0),
+                lambda draw: self._draw_captions(draw, images, *grid[1:])
+            )
+        )
+        header = layers.get(
+            'header',
+            (
+                page_size,
+                margin,
+                page_num,
+                total_pages,
+                settings.context_text,
+                settings.font_size
+            ),
+            lambda: layers.build_overlay(
+                page_size,
+                (0, 0, 0),
+                lambda draw: self._draw_header(
+                    draw,
+                    page_size,
+                    margin,
+                    font,
+                    page_num,
+                    total_pages
+                )
+            )
+        )
+        watermark = None
+        if settings.watermark_text:
+            watermark = layers.get(
+                'watermark',
+                (page_size, margin, settings.watermark_text),
+                lambda: layers.build_overlay(
+                    page_size,
+                    (128, 128, 128),
+                    lambda draw: self._add_watermark(
+                        None,
+                        draw,
+                        page_size[0],
+                        page_size[1],
+                        margin
+                    )
+                )
+            )
+
+        return layers.compose(base, [captions, header, watermark])
+
+    def _build_image_layer(
+        self,
+        images: List[Dict],
+        grid: Tuple,
+        is_cancelled: Optional[Callable[[], bool]] = None
+    ) -> Optional[Image.Image]:
+        """Paste cached-thumbnail cells onto a blank page."""
+        page = Image.new('RGB', grid[0], 'white')
+        if not self._paste_cell_images(
+            page,
+            images,
+            *grid[1:],
+            is_cancelled=is_cancelled,
+            use_thumbnail_cache=True
+        ):
+            return None
+        return page
+
+    def _grid_top(self, margin: int) -> int:
+        """Return the y position where the image grid starts."""
+        if self.settings_manager.context_text:
+            return margin + self.settings_manager.font_size + margin
+        return margin
+
+    def _draw_header(
+        self,
+        draw: ImageDraw.ImageDraw,
+        page_size: Tuple[int, int],
+        margin: int,
+        font: ImageFont.FreeTypeFont,
+        page_num: int,
+        total_pages: int
+    ) -> int:
+        """Draw the page number and context text; return the grid top."""
+        # Add page number
+        page_text = f"Page {page_num} of {total_pages}"
+        text_width = draw.textlength(page_text, font=font)
+        draw.text(
+            (page_size[0] - margin - text_width, margin),
+            page_text,
+            fill='black',
+            font=font
+        )
+
+        if self.settings_manager.context_text:
+            draw.text(
+                (margin, margin),
+                self.settings_manager.context_text,
+                fill='black',
+                font=font
+            )
+        return self._grid_top(margin)
+
+    def _load_cell_image(
+        self,
+        info: Dict,
+        width: int,
+        height: int,
+        use_thumbnail_cache: bool = False
+    ) -> Image.Image:
+        """Load an image scaled to fit inside a width x height cell.
+
+        With use_thumbnail_cache the smallest cached level that fills the
+        cell is used, and the original is only decoded when no level is
+        large enough. The file orientation and user rotation are applied
+        after scaling, so they only ever turn a cell-sized image; the list
+        thumbnail level is already upright and only gets the rotation.
+        """
+        if use_thumbnail_cache:
+            level = self.thumbnail_cache.load(info, width, height)
+            if level is not None:
+                img, upright = level
+                return self._fit_cell(img, info, width, height, upright)
+
+        with Image.open(info['path']) as img:
+            return self._fit_cell(img, info, width, height)
+
+    @staticmethod
+    def _fit_cell(
+        img: Image.Image,
+        info: Dict,
+        width: int,
+        height: int,
+        upright: bool = False
+    ) -> Image.Image:
+        """Scale pixels to fit a cell once turned, then turn them.
+
+        upright pixels already have the file orientation applied.
+        """
+        if upright:
+            sideways = info['rotation'] % 180 == 90
+        else:
+            sideways = FileRotator.is_sideways(info)
+        # The cell as seen by the pixels before they are turned
+        box = (height, width) if sideways else (width, height)
+        img = ImageOps.contain(img, box)
+        if not upright:
+            img = FileRotator.apply_orientation(img, info['orientation'])
+        if info['rotation']:
+            img = img.rotate(info['rotation'], expand=True)
+        return img
+
     def _add_images_to_page(
         self,
         page: Image.Image,
@@ -293,29 +1094,114 @@ class ImageProcessor:
         y_offset: int
     ) -> None:
         """Add images to a contact sheet page."""
-        caption_font = self._get_font('Arial', 20)
-        
+        self._paste_cell_images(
+            page,
+            images,
+            cols,
+            thumb_width,
+            thumb_height,
+            margin,
+            y_offset
+        )
+        self._draw_captions(
+            ImageDraw.Draw(page),
+            images,
+            cols,
+            thumb_width,
+            thumb_height,
+            margin,
+            y_offset
+        )
+
+    @staticmethod
+    def _cell_origin(
+        idx: int,
+        cols: int,
+        thumb_width: int,
+        thumb_height: int,
+        margin: int,
+        y_offset: int
+    ) -> Tuple[int, int]:
+        """Return the top-left corner of the idx-th cell on a page."""
+        row = idx // cols
+        col = idx % cols
+        return (
+            margin + col * (thumb_width + margin),
+            y_offset + row * (thumb_height + margin + 50)
+        )
+
+    def _paste_cell_images(
+        self,
+        page: Image.Image,
+        images: List[Dict],
+        cols: int,
+        thumb_width: int,
+        thumb_height: int,
+        margin: int,
+        y_offset: int,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        use_thumbnail_cache: bool = False
+    ) -> bool:
+        """Paste each image centred in its cell.
+
+        Identical files on the page are loaded and scaled only once.
+        Returns False if is_cancelled stopped the loop early.
+        """
+        cells: Dict[Tuple, Image.Image] = {}
         for idx, info in enumerate(images):
-            row = idx // cols
-            col = idx % cols
-            x = margin + col * (thumb_width + margin)
-            y = y_offset + row * (thumb_height + margin + 50)
-
-            with Image.open(info['path']) as img:
-                if info['rotation']:
-                    img = img.rotate(info['rotation'], expand=True)
-                
-                img_resized = ImageOps.contain(
-                    img,
-                    (thumb_width, thumb_height)
+            if is_cancelled and is_cancelled():
+                return False
+            x, y = self._cell_origin(
+                idx,
+                cols,
+                thumb_width,
+                thumb_height,
+                margin,
+                y_offset
+            )
+
+            key = (
+                info.get('content_hash') or info['path'],
+                info['orientation'],
+                info['rotation']
+            )
+            img_resized = cells.get(key)
+            if img_resized is None:
+                img_resized = self._load_cell_image(
+                    info,
+                    thumb_width,
+                    thumb_height,
+                    use_thumbnail_cache
                 )
-                paste_x = x + (thumb_width - img_resized.width) // 2
-                paste_y = y + (thumb_height - img_resized.height) // 2
-                page.paste(img_resized, (paste_x, paste_y))
+                cells[key] = img_resized
+            paste_x = x + (thumb_width - img_resized.width) // 2
+            paste_y = y + (thumb_height - img_resized.height) // 2
+            page.paste(img_resized, (paste_x, paste_y))
+        return True
 
-            # Add image caption
+    def _draw_captions(
+        self,
+        draw: ImageDraw.ImageDraw,
+        images: List[Dict],
+        cols: int,
+        thumb_width: int,
+        thumb_height: int,
+        margin: int,
+        y_offset: int
+    ) -> None:
+        """Draw the filename and date below each cell."""
+        caption_font = self._get_font('Arial', 20)
+
+        for idx, info in enumerate(images):
+            x, y = self._cell_origin(
+                idx,
+                cols,
+                thumb_width,
+                thumb_height,
+                margin,
+                y_offset
+            )
             text = f"{info['filename']}\n{info['date_time']}"
-            draw = ImageDraw.Draw(page)
             draw.text(
                 (x, y + thumb_height + 5),
                 text,
@@ -325,7 +1211,7 @@ class ImageProcessor:
 
     def _add_watermark(
         self,
-        page: Image.Image,
+        page: Optional[Image.Image],
         draw: ImageDraw.ImageDraw,
         width: int,
         height: int,
@@ -349,69 +1235,45 @@ class ImageProcessor:
             font=watermark_font
         )
 
-    def _save_pages(
-        self,
-        pages: List[Image.Image],
-        settings
-    ) -> bool:
-        """Save contact sheet pages to files."""
-        try:
-            if settings.export_format.lower() == 'pdf':
-                # Save all pages to a single PDF
-                output_path = os.path.join(
-                    settings.save_folder,
-                    f"{settings.filename_pattern.replace('{number}', '001')}.pdf"
-                )
-                # Convert all pages to RGB mode
-                rgb_pages = [page.convert('RGB') for page in pages]
-                # Save first page and append others
-                rgb_pages[0].save(
-                    output_path,
-                    'PDF',
-                    resolution=300,
-                    save_all=True,
-                    append_images=rgb_pages[1:]
-                )
-            else:
-                # Save individual image files
-                for idx, page in enumerate(pages):
-                    page_number = str(idx + 1).zfill(3)
-                    filename = settings.filename_pattern.replace(
-                        '{number}',
-                        page_number
-                    )
-                    output_path = os.path.join(
-                        settings.save_folder,
-                        f"{filename}.{settings.export_format.lower()}"
-                    )
-                    
-                    if settings.export_format.lower() in ['jpg', 'jpeg']:
-                        page.save(output_path, 'JPEG', quality=settings.quality)
-                    elif settings.export_format.lower() == 'png':
-                        compress = int((100 - settings.quality) / 10)
-                        page.save(output_path, 'PNG', compress_level=compress)
-                    else:
-                        page.save(output_path)
-            return True
-        except Exception as e:
-            print(f"Error saving pages: {e}")
-            return False
+    def _preview_page_setup(self) -> Tuple[Tuple[int, int], int]:
+        """Return the page size and margin used for previews."""
+        # Preview setup (scaled down from full size)
+        preview_width = 800
+        preview_height = int(preview_width * (11/8.5))
+        return (preview_width, preview_height), 10
+
+    def get_preview_pages(self, images_info: List[Dict]) -> List[List[Dict]]:
+        """Split ordered images into the pages of the preview."""
+        return self.paginate(
+            images_info,
+            self.get_preview_images_per_page(len(images_info))
+        )
+
+    def get_preview_total_pages(self, images_info: List[Dict]) -> int:
+        """Calculate the number of preview pages for images_info."""
+        return len(self.get_preview_pages(images_info))
+
+    def get_preview_images_per_page(self, total_images: int) -> int:
+        """Return how many images fit on one preview page."""
+        page_size, margin = self._preview_page_setup()
+        return self._calculate_layout(total_images, page_size, margin)[0]
 
     def generate_preview(
         self,
         images_info: List[Dict],
-        page_num: int = 1
+        page_num: int = 1,
+        is_cancelled: Optional[Callable[[], bool]] = None
     ) -> Optional[Image.Image]:
-        """Generate a preview of the contact sheet for a specific page."""
+        """Generate a preview of the contact sheet for a specific page.
+
+        Returns None when is_cancelled reports that the render is no
+        longer wanted.
+        """
         if not images_info:
             return None
 
         try:
-            # Preview setup (scaled down from full size)
-            preview_width = 800
-            preview_height = int(preview_width * (11/8.5))
-            page_size = (preview_width, preview_height)
-            margin = 10
+            page_size, margin = self._preview_page_setup()
             
             layout = self._calculate_layout(
                 len(images_info),
@@ -419,34 +1281,52 @@ class ImageProcessor:
                 margin
             )
             
-            # Calculate start and end indices for requested page
-            start_idx = (page_num - 1) * self.IMAGES_PER_PAGE
-            end_idx = min(start_idx + self.IMAGES_PER_PAGE, len(images_info))
+            pages = self.paginate(images_info, layout[0])
             
             # Generate preview of requested page
-            if start_idx < len(images_info):
-                page_images = images_info[start_idx:end_idx]
-                total_pages = self.get_total_pages(len(images_info))
+            if 1 <= page_num <= len(pages):
+                total_pages = len(pages)
                 
-                preview = self._generate_page(
-                    page_images,
+                return self._generate_layered_page(
+                    pages[page_num - 1],
                     page_size,
                     layout,
                     margin,
                     self._get_font('Arial', self.settings_manager.font_size),
                     page_num,
-                    total_pages
+                    total_pages,
+                    is_cancelled
                 )
-                return preview
             return None
         except Exception as e:
             print(f"Error generating preview: {e}")
             return None
 
+    def image_to_qimage(self, image: Image.Image) -> QImage:
+        """Wrap a PIL image's pixels in a QImage without re-encoding.
+
+        The raw RGB/RGBA buffer is handed to Qt with an explicit stride,
+        so the only cost is the tobytes() copy. The QImage does not own
+        that buffer, so it is kept alive as an attribute. Safe to call off
+        the GUI thread.
+        """
+        if image.mode == 'RGBA':
+            qformat, channels = QImage.Format_RGBA8888, 4
+        else:
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            qformat, channels = QImage.Format_RGB888, 3
+        data = image.tobytes('raw', image.mode)
+        qimage = QImage(
+            data,
+            image.width,
+            image.height,
+            image.width * channels,
+            qformat
+        )
+        qimage.pil_buffer = data
+        return qimage
+
     def image_to_pixmap(self, image: Image.Image) -> QPixmap:
         """Convert PIL Image to QPixmap."""
-        buffer = io.BytesIO()
-        image.save(buffer, format='PNG')
-        pixmap = QPixmap()
-        pixmap.loadFromData(buffer.getvalue())
-        return pixmap
+        return QPixmap.fromImage(self.image_to_qimage(image))
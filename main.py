@@ -1,11 +1,75 @@
 # main.py
 
+import argparse
+import contextlib
+import os
 import sys
+
 from PyQt5.QtWidgets import QApplication
+
+from exporters import ArchivePageSink
 from gui import ContactSheetCreatorGUI
+from image_processor import ImageProcessor
+from settings_manager import SettingsManager
+
+
+def parse_args(argv):
+    """Parse the command line; without a folder the window is opened."""
+    parser = argparse.ArgumentParser(
+        description='Create contact sheets from a folder of images.'
+    )
+    parser.add_argument(
+        'folder',
+        nargs='?',
+        help='export this folder with the saved settings, without the window'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        help="folder to save into, or '-' to write an archive to stdout"
+    )
+    parser.add_argument(
+        '--archive',
+        choices=ArchivePageSink.ARCHIVE_FORMATS,
+        help='put the JPEG or PNG pages into one archive'
+    )
+    return parser.parse_args(argv)
+
+
+def export_folder(args) -> int:
+    """Export a folder without the GUI and return the exit status."""
+    settings = SettingsManager()
+    if args.archive:
+        settings.archive_format = args.archive
+    stream = None
+    if args.output == '-':
+        stream = sys.stdout.buffer
+        # Only the export job file goes to the save folder
+        settings.save_folder = settings.save_folder or os.getcwd()
+    elif args.output:
+        settings.save_folder = args.output
+    elif not settings.save_folder:
+        settings.save_folder = os.getcwd()
+
+    processor = ImageProcessor(settings)
+    # Messages go to stderr so they never mix with an archive on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        processor.load_images_from_folder(args.folder)
+        if not processor.images_info:
+            print(f"Error: no images found in {args.folder}")
+            return 1
+        if not processor.create_contact_sheet(
+            processor.images_info,
+            stream=stream
+        ):
+            return 1
+    return 0
 
 
 def main():
+    args = parse_args(sys.argv[1:])
+    if args.folder:
+        sys.exit(export_folder(args))
+
     app = QApplication(sys.argv)
     window = ContactSheetCreatorGUI()
     window.show()
@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+# An overlay is the drawn part of a transparent layer and where it goes
+Overlay = Tuple[Image.Image, Tuple[int, int]]
+
+
+class PageLayerCache:
+    """Keeps the separately drawn layers of recently shown preview pages.
+
+    A preview page is the image layer (pasted cells on white) with the
+    caption, header and watermark overlays pasted on top. Each kind of
+    layer is cached under a key describing only what it depends on, so
+    editing the context or watermark text rebuilds one small overlay and
+    recomposites instead of decoding and pasting every image again.
+    """
+
+    CAPACITY = 6
+
+    def __init__(self):
+        """Initialize empty per-kind caches."""
+        self._layers: Dict[str, OrderedDict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, key: Hashable, build: Callable[[], object]):
+        """Return the cached layer for key, building it on a miss.
+
+        A builder returning None (for example a cancelled render) is not
+        cached.
+        """
+        with self._lock:
+            layers = self._layers.setdefault(kind, OrderedDict())
+            if key in layers:
+                layers.move_to_end(key)
+                return layers[key]
+
+        layer = build()
+        if layer is None:
+            return None
+
+        with self._lock:
+            layers[key] = layer
+            layers.move_to_end(key)
+            while len(layers) > self.CAPACITY:
+                layers.popitem(last=False)
+        return layer
+
+    @staticmethod
+    def build_overlay(
+        page_size: Tuple[int, int],
+        color: Tuple[int, int, int],
+        draw_layer: Callable[[ImageDraw.ImageDraw], None]
+    ) -> Overlay:
+        """Draw onto a transparent page and keep only the drawn region.
+
+        The transparent pixels carry the ink colour so that anti-aliased
+        edges blend exactly as if drawn directly onto the page. Returns
+        an empty overlay when nothing was drawn.
+        """
+        layer = Image.new('RGBA', page_size, color + (0,))
+        draw_layer(ImageDraw.Draw(layer))
+        bbox = layer.getchannel('A').getbbox()
+        if not bbox:
+            return Image.new('RGBA', (1, 1), color + (0,)), (0, 0)
+        return layer.crop(bbox), bbox[:2]
+
+    @staticmethod
+    def compose(
+        base: Image.Image,
+        overlays: List[Optional[Overlay]]
+    ) -> Image.Image:
+        """Paste overlays, in order, onto a copy of the base layer."""
+        page = base.copy()
+        for overlay in overlays:
+            if overlay is not None:
+                image, offset = overlay
+                page.paste(image, offset, image)
+        return page
@@ -0,0 +1,210 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Set
+
+from PyQt5.QtCore import QObject, QRunnable, QTimer, pyqtSignal
+
+
+class PreviewSignals(QObject):
+    """Signals emitted by a PreviewTask back to the GUI thread."""
+
+    # generation, page number, total pages, QImage (None if nothing to
+    # show) and the page's cache key
+    finished = pyqtSignal(int, int, int, object, object)
+
+
+class PreviewTask(QRunnable):
+    """Renders one preview page on a worker thread.
+
+    Every request carries the generation number it was issued with. The
+    GUI only paints the result of the newest generation, and cancelling
+    a task makes it stop at the next cell so a newer request can start.
+
+    Like an export, the task renders from a snapshot of the processor
+    and copies of the image records, so settings edited while it runs
+    cannot leak into layers cached under the key it was started with.
+    """
+
+    def __init__(
+        self,
+        image_processor,
+        images_info: List[Dict],
+        page_num: int,
+        generation: int,
+        key: Optional[Hashable] = None
+    ):
+        """Initialize with the images and page to render."""
+        super().__init__()
+        self.image_processor = image_processor.snapshot()
+        self.images_info = [dict(info) for info in images_info]
+        self.page_num = page_num
+        self.generation = generation
+        self.key = key
+        self.signals = PreviewSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Ask the task to stop; its result will not be delivered."""
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        """Check whether the task has been cancelled."""
+        return self._cancelled.is_set()
+
+    def run(self) -> None:
+        """Render the page and hand a QImage back to the GUI thread."""
+        if self.is_cancelled():
+            return
+        processor = self.image_processor
+        total_pages = processor.get_preview_total_pages(self.images_info)
+        page_num = min(self.page_num, total_pages)
+
+        preview = processor.generate_preview(
+            self.images_info,
+            page_num,
+            self.is_cancelled
+        )
+        if self.is_cancelled():
+            return
+        image = processor.image_to_qimage(preview) if preview else None
+        self.signals.finished.emit(
+            self.generation,
+            page_num,
+            total_pages,
+            image,
+            self.key
+        )
+
+
+class PreviewLayoutSignals(QObject):
+    """Signals emitted by a PreviewLayoutTask back to the GUI thread."""
+
+    # generation, ordered images and their preview pages
+    finished = pyqtSignal(int, object, object)
+
+
+class PreviewLayoutTask(QRunnable):
+    """Orders and paginates the sheet images on a worker thread.
+
+    Sorting by capture time, collapsing near duplicates and content
+    ordering all walk the whole selection, which is too slow for the GUI
+    thread on large folders. Unlike a PreviewTask the image records are
+    not copied: the pages hold the GUI's own records, so rotations made
+    later still show up in them.
+    """
+
+    def __init__(
+        self,
+        image_processor,
+        images_info: List[Dict],
+        generation: int
+    ):
+        """Initialize with the selected images in selection order."""
+        super().__init__()
+        self.image_processor = image_processor.snapshot()
+        self.images_info = list(images_info)
+        self.generation = generation
+        self.signals = PreviewLayoutSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Ask the task to stop; its result will not be delivered."""
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        """Check whether the task has been cancelled."""
+        return self._cancelled.is_set()
+
+    def run(self) -> None:
+        """Order and paginate the images and hand them to the GUI."""
+        if self.is_cancelled():
+            return
+        processor = self.image_processor
+        images = processor.order_images(self.images_info)
+        pages = processor.get_preview_pages(images) if images else []
+        if self.is_cancelled():
+            return
+        self.signals.finished.emit(self.generation, images, pages)
+
+
+class PreviewPageCache:
+    """Least-recently-used store of rendered preview pages.
+
+    Pages are keyed by everything that affects their pixels (the images
+    on the page and the text settings), so flipping back to a page whose
+    content has not changed needs no render and stale entries simply age
+    out.
+    """
+
+    def __init__(self, capacity: int = 12):
+        """Initialize an empty cache holding at most capacity pages."""
+        self.capacity = capacity
+        self._pages: OrderedDict = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Check for a page without changing its recency."""
+        return key in self._pages
+
+    def get(self, key: Hashable):
+        """Return a cached page and mark it most recently used."""
+        image = self._pages.get(key)
+        if image is not None:
+            self._pages.move_to_end(key)
+        return image
+
+    def put(self, key: Hashable, image) -> None:
+        """Store a page, evicting the least recently used beyond capacity."""
+        self._pages[key] = image
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.capacity:
+            self._pages.popitem(last=False)
+
+
+class PreviewScheduler(QObject):
+    """Coalesces bursts of setting changes into a single preview render.
+
+    Controls report the stage they affect instead of re-rendering
+    directly. Changes arriving within WINDOW_MS of each other are merged,
+    and render_requested carries the set of dirty stages so the GUI can
+    redo only the work that changed. Output-only settings never trigger
+    a render.
+    """
+
+    # Which images are shown and how they are paginated
+    LAYOUT = 'layout'
+    # Which page is shown
+    PAGE = 'page'
+    # The pixels of the images themselves, e.g. after a rotation
+    IMAGES = 'images'
+    # Header, caption and watermark text and fonts
+    TEXT = 'text'
+    # Export-only settings that do not change the preview raster
+    OUTPUT = 'output'
+
+    WINDOW_MS = 120
+
+    render_requested = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        """Initialize with an idle timer and no dirty stages."""
+        super().__init__(parent)
+        self.dirty: Set[str] = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.WINDOW_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def invalidate(self, stage: str) -> None:
+        """Mark a stage dirty and (re)start the coalescing window."""
+        if stage == self.OUTPUT:
+            return
+        self.dirty.add(stage)
+        self._timer.start()
+
+    def flush(self) -> None:
+        """Emit the pending render request immediately."""
+        self._timer.stop()
+        stages = self.dirty
+        self.dirty = set()
+        if stages:
+            self.render_requested.emit(stages)
@@ -0,0 +1,266 @@
+import re
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+
+class QueryError(ValueError):
+    """A filter expression that cannot be understood."""
+
+
+class FilterQuery:
+    """Compiles a filter expression to an SQL condition over the catalog.
+
+    An expression is a list of terms that must all match. Terms can be
+    joined with OR, grouped in parentheses and negated with a leading
+    '-' or NOT. A term is a field, an operator (':', '=', '<', '<=',
+    '>', '>=') and a value; a bare word matches part of the filename.
+
+        date:2024-05          taken in May 2024
+        date:2024-01..2024-03 taken from January to the end of March
+        date>=2023 date:none  taken in or after 2023; undated
+        camera:canon          camera model containing "canon"
+        name:IMG_*.jpg        filename glob ('*' and '?')
+        folder:holiday        folder path containing "holiday"
+        orientation:portrait  portrait, landscape, square or a tag 1-8
+        width>=3000 mp>12     pixel dimensions and megapixels
+        filesize>2MB          file size with an optional KB/MB/GB unit
+        rotated:yes           rotated in Contact Sheet Pro
+        datesource:filename   dated from the filename; also xmp,
+                              "file modified" or an EXIF tag name
+
+    Every value is passed as a parameter, never spliced into the SQL.
+    """
+
+    TOKEN = re.compile(r'\(|\)|[^\s()"]*"[^"]*"|[^\s()]+')
+    TERM = re.compile(r'^(\w+)(:|>=|<=|=|>|<)(.*)$')
+    SIZE_UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+    # Whether the displayed image is turned a quarter from the stored one
+    SIDEWAYS = (
+        "((orientation BETWEEN 5 AND 8) != (rotation % 180 = 90))"
+    )
+
+    def __init__(self, expression: str):
+        """Parse expression into an SQL condition and its parameters."""
+        self.expression = expression
+        self.params: List = []
+        self.tokens = self.TOKEN.findall(expression)
+        self.position = 0
+        self.where = self._parse_or() if self.tokens else ''
+        if self.position < len(self.tokens):
+            raise QueryError(f"Unexpected '{self.tokens[self.position]}'")
+
+    @classmethod
+    def compile(cls, expression: str) -> Tuple[str, List]:
+        """Return the SQL condition and parameters of an expression."""
+        query = cls(expression)
+        return query.where, query.params
+
+    def _peek(self) -> Optional[str]:
+        """Return the next token without consuming it."""
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def _next(self) -> str:
+        """Consume and return the next token."""
+        token = self._peek()
+        if token is None:
+            raise QueryError("Filter ends unexpectedly")
+        self.position += 1
+        return token
+
+    def _parse_or(self) -> str:
+        """Parse terms joined by OR."""
+        parts = [self._parse_and()]
+        while self._peek() is not None and self._peek().upper() == 'OR':
+            self._next()
+            parts.append(self._parse_and())
+        return parts[0] if len(parts) == 1 else f"({' OR '.join(parts)})"
+
+    def _parse_and(self) -> str:
+        """Parse a run of terms that must all match."""
+        parts = []
+        while self._peek() is not None and self._peek() != ')':
+            if self._peek().upper() == 'OR':
+                break
+            if self._peek().upper() == 'AND':
+                self._next()
+                continue
+            parts.append(self._parse_unary())
+        if not parts:
+            raise QueryError("Expected a filter term")
+        return parts[0] if len(parts) == 1 else f"({' AND '.join(parts)})"
+
+    def _parse_unary(self) -> str:
+        """Parse a negated, parenthesised or single term."""
+        token = self._next()
+        # A '-' on its own is left over from '-(' or '- term'
+        if token.upper() == 'NOT' or token == '-':
+            return f"NOT {self._parse_unary()}"
+        if token == '(':
+            condition = self._parse_or()
+            if self._peek() != ')':
+                raise QueryError("Missing ')'")
+            self._next()
+            return condition
+        if token == ')':
+            raise QueryError("Unexpected ')'")
+        if token.startswith('-') and len(token) > 1:
+            return f"NOT {self._term(token[1:])}"
+        return self._term(token)
+
+    def _term(self, token: str) -> str:
+        """Compile a single field term."""
+        match = self.TERM.match(token)
+        if not match:
+            return self._text('filename', self._unquote(token), ':')
+        field, op, value = match.groups()
+        field = field.lower()
+        value = self._unquote(value)
+        if not value:
+            raise QueryError(f"Missing value in '{token}'")
+
+        if field in ('name', 'filename'):
+            return self._text('filename', value, op)
+        if field in ('camera', 'model'):
+            return self._text('camera_model', value, op)
+        if field == 'folder':
+            return self._text('folder', value, op)
+        if field == 'datesource':
+            return self._text('date_source', value, op)
+        if field in ('date', 'taken'):
+            return self._date(value, op)
+        if field in ('width', 'height', 'rotation'):
+            return self._number(field, value, op, int)
+        if field == 'mp':
+            return self._number(
+                'width * height', value, op, lambda v: float(v) * 1e6
+            )
+        if field == 'filesize':
+            return self._number('size', value, op, self._bytes)
+        if field == 'orientation':
+            return self._orientation(value, op)
+        if field == 'rotated':
+            return self._flag('rotation != 0', value)
+        raise QueryError(f"Unknown filter field '{field}'")
+
+    @staticmethod
+    def _unquote(value: str) -> str:
+        """Strip the double quotes around a value."""
+        if len(value) >= 2 and value[0] == value[-1] == '"':
+            return value[1:-1]
+        return value
+
+    def _param(self, value) -> str:
+        """Add a parameter and return its placeholder."""
+        self.params.append(value)
+        return '?'
+
+    def _text(self, column: str, value: str, op: str) -> str:
+        """Match a text column by glob, or by substring without wildcards."""
+        if op not in (':', '='):
+            raise QueryError(f"'{op}' cannot be used on text")
+        pattern = re.sub(r'([\\%_])', r'\\\1', value)
+        if '*' in value or '?' in value:
+            pattern = pattern.replace('*', '%').replace('?', '_')
+        else:
+            pattern = f"%{pattern}%"
+        return f"{column} LIKE {self._param(pattern)} ESCAPE '\\'"
+
+    def _number(self, column: str, value: str, op: str, convert) -> str:
+        """Compare a numeric column with a value or a 'low..high' range."""
+        is_range = '..' in value and op in (':', '=')
+        try:
+            if is_range:
+                low, high = (convert(v) for v in value.split('..', 1))
+            else:
+                number = convert(value)
+        except ValueError:
+            raise QueryError(f"'{value}' is not a number")
+        if is_range:
+            if low > high:
+                raise QueryError(f"Range '{value}' ends before it starts")
+            return (
+                f"{column} BETWEEN {self._param(low)} "
+                f"AND {self._param(high)}"
+            )
+        sql_op = '=' if op == ':' else op
+        return f"{column} {sql_op} {self._param(number)}"
+
+    @classmethod
+    def _bytes(cls, value: str) -> float:
+        """Convert a file size with an optional unit to bytes."""
+        match = re.match(r'^([\d.]+)\s*([KMG]?B?)$', value.upper())
+        if not match:
+            raise ValueError(value)
+        return float(match.group(1)) * cls.SIZE_UNITS[match.group(2)]
+
+    @staticmethod
+    def _period(value: str) -> Tuple[float, float]:
+        """Return the local epoch start and end of a year, month or day."""
+        parts = value.split('-')
+        try:
+            numbers = [int(part) for part in parts]
+            if not 1 <= len(numbers) <= 3:
+                raise ValueError(value)
+            start = datetime(*(numbers + [1, 1][:3 - len(numbers)]))
+            if len(numbers) == 1:
+                end = start.replace(year=start.year + 1)
+            elif len(numbers) == 2:
+                end = (
+                    start.replace(year=start.year + 1, month=1)
+                    if start.month == 12
+                    else start.replace(month=start.month + 1)
+                )
+            else:
+                end = datetime.fromordinal(start.toordinal() + 1)
+        except (ValueError, OverflowError):
+            raise QueryError(f"'{value}' is not a date (YYYY[-MM[-DD]])")
+        return start.timestamp(), end.timestamp()
+
+    def _date(self, value: str, op: str) -> str:
+        """Compare the capture time with a period, range or 'none'."""
+        if value.lower() in ('none', 'unknown'):
+            if op not in (':', '='):
+                raise QueryError(f"'{op}' cannot be used with '{value}'")
+            return "timestamp IS NULL"
+        if '..' in value and op in (':', '='):
+            low, high = value.split('..', 1)
+            start, end = self._period(low)[0], self._period(high)[1]
+            if start >= end:
+                raise QueryError(f"Range '{value}' ends before it starts")
+        else:
+            start, end = self._period(value)
+        if op in (':', '='):
+            return (
+                f"(timestamp >= {self._param(start)} "
+                f"AND timestamp < {self._param(end)})"
+            )
+        bound = {'<': start, '>=': start, '<=': end, '>': end}[op]
+        sql_op = {'<': '<', '>=': '>=', '<=': '<', '>': '>='}[op]
+        return f"timestamp {sql_op} {self._param(bound)}"
+
+    def _orientation(self, value: str, op: str) -> str:
+        """Match portrait, landscape or square display, or an EXIF tag."""
+        shape = value.lower()
+        if shape in ('portrait', 'landscape'):
+            tall = shape == 'portrait'
+            return (
+                f"(CASE WHEN {self.SIDEWAYS} "
+                f"THEN width {'>' if tall else '<'} height "
+                f"ELSE height {'>' if tall else '<'} width END)"
+            )
+        if shape == 'square':
+            return "width = height"
+        return self._number('orientation', value, op, int)
+
+    @staticmethod
+    def _flag(condition: str, value: str) -> str:
+        """Match a condition for yes/true or its negation for no/false."""
+        answer = value.lower()
+        if answer in ('yes', 'true', '1'):
+            return f"({condition})"
+        if answer in ('no', 'false', '0'):
+            return f"NOT ({condition})"
+        raise QueryError(f"Expected yes or no, not '{value}'")
@@ -0,0 +1,108 @@
+from typing import Dict, List
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class RotationSignals(QObject):
+    """Signals emitted by a RotationTask back to the GUI thread."""
+
+    # list row and the image record that was rotated
+    rotated = pyqtSignal(int, object)
+
+
+class RotationTask(QRunnable):
+    """Rotates one image on a worker thread."""
+
+    def __init__(
+        self,
+        image_processor,
+        row: int,
+        info: Dict,
+        angle: int,
+        mode: str
+    ):
+        """Initialize with the image to rotate and its list row."""
+        super().__init__()
+        self.image_processor = image_processor
+        self.row = row
+        self.info = info
+        self.angle = angle
+        self.mode = mode
+        self.signals = RotationSignals()
+
+    def run(self) -> None:
+        """Rotate the image and report its row to the GUI thread."""
+        try:
+            self.image_processor.rotate_file(self.info, self.angle, self.mode)
+        except Exception as e:
+            print(f"Error rotating {self.info['filename']}: {e}")
+        self.signals.rotated.emit(self.row, self.info)
+
+
+class RotationBatch(QObject):
+    """Rotates a multi-selection in parallel and reports progress.
+
+    Every image is its own task on the batch's thread pool, so the EXIF
+    orientation and lossless JPEG modes, which read and rewrite whole
+    files, stay off the GUI thread. Finished rows are reported one by
+    one through row_rotated so the list can refresh just those rows, and
+    finished is emitted once the whole batch is done. Images already
+    being rotated are left out of later batches until they finish, so
+    two workers never rewrite one file.
+    """
+
+    # list row and image record
+    row_rotated = pyqtSignal(int, object)
+    # images done, images in the batch
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal()
+
+    def __init__(self, parent=None):
+        """Initialize an idle batch."""
+        super().__init__(parent)
+        self.thread_pool = QThreadPool(self)
+        self.total = 0
+        self.done = 0
+        self._in_flight = set()
+
+    def is_running(self) -> bool:
+        """Check whether any rotation is still pending."""
+        return bool(self._in_flight)
+
+    def start(
+        self,
+        image_processor,
+        rows: List[int],
+        images: List[Dict],
+        angle: int,
+        mode: str
+    ) -> int:
+        """Queue rotations for the given rows; return how many were queued."""
+        if not self._in_flight:
+            self.total = 0
+            self.done = 0
+
+        queued = 0
+        for row, info in zip(rows, images):
+            if info['path'] in self._in_flight:
+                continue
+            self._in_flight.add(info['path'])
+            task = RotationTask(image_processor, row, info, angle, mode)
+            task.signals.rotated.connect(self._onRotated)
+            self.thread_pool.start(task)
+            queued += 1
+        self.total += queued
+        return queued
+
+    def _onRotated(self, row: int, info: Dict) -> None:
+        """Forward a finished row and report the batch progress."""
+        self._in_flight.discard(info['path'])
+        self.done += 1
+        self.row_rotated.emit(row, info)
+        self.progress.emit(self.done, self.total)
+        if not self._in_flight:
+            self.finished.emit()
+
+    def wait(self) -> None:
+        """Block until every queued rotation has been written."""
+        self.thread_pool.waitForDone()
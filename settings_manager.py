@@ -17,6 +17,14 @@ class SettingsManager:
         self.export_format = 'JPEG'
         self.quality = 80
         self.filename_pattern = 'contact_sheet_{number}'
+        self.archive_format = 'None'
+        self.pdf_max_pages = 0
+        self.pdf_max_mb = 0
+        self.pdf_split_index = False
+        self.rotation_mode = 'Non-destructive'
+        self.group_by = 'None'
+        self.collapse_duplicates = False
+        self.sort_by = 'Capture Time'
         self.include_metadata = True
         self.watermark_text = ''
         self.save_folder = ''
@@ -47,6 +55,23 @@ class SettingsManager:
                         'filename_pattern',
                         'contact_sheet_{number}'
                     )
+                    self.archive_format = data.get(
+                        'archive_format',
+                        'None'
+                    )
+                    self.pdf_max_pages = data.get('pdf_max_pages', 0)
+                    self.pdf_max_mb = data.get('pdf_max_mb', 0)
+                    self.pdf_split_index = data.get('pdf_split_index', False)
+                    self.rotation_mode = data.get(
+                        'rotation_mode',
+                        'Non-destructive'
+                    )
+                    self.group_by = data.get('group_by', 'None')
+                    self.collapse_duplicates = data.get(
+                        'collapse_duplicates',
+                        False
+                    )
+                    self.sort_by = data.get('sort_by', 'Capture Time')
                     self.include_metadata = data.get(
                         'include_metadata',
                         True
@@ -68,6 +93,14 @@ class SettingsManager:
         self.export_format = 'JPEG'
         self.quality = 80
         self.filename_pattern = 'contact_sheet_{number}'
+        self.archive_format = 'None'
+        self.pdf_max_pages = 0
+        self.pdf_max_mb = 0
+        self.pdf_split_index = False
+        self.rotation_mode = 'Non-destructive'
+        self.group_by = 'None'
+        self.collapse_duplicates = False
+        self.sort_by = 'Capture Time'
         self.include_metadata = True
         self.watermark_text = ''
         self.save_folder = ''
@@ -80,6 +113,14 @@ class SettingsManager:
             'export_format': self.export_format,
             'quality': self.quality,
             'filename_pattern': self.filename_pattern,
+            'archive_format': self.archive_format,
+            'pdf_max_pages': self.pdf_max_pages,
+            'pdf_max_mb': self.pdf_max_mb,
+            'pdf_split_index': self.pdf_split_index,
+            'rotation_mode': self.rotation_mode,
+            'group_by': self.group_by,
+            'collapse_duplicates': self.collapse_duplicates,
+            'sort_by': self.sort_by,
             'include_metadata': self.include_metadata,
             'watermark_text': self.watermark_text,
             'save_folder': self.save_folder
@@ -110,6 +151,14 @@ class SettingsManager:
             'export_format': self.export_format,
             'quality': self.quality,
             'filename_pattern': self.filename_pattern,
+            'archive_format': self.archive_format,
+            'pdf_max_pages': self.pdf_max_pages,
+            'pdf_max_mb': self.pdf_max_mb,
+            'pdf_split_index': self.pdf_split_index,
+            'rotation_mode': self.rotation_mode,
+            'group_by': self.group_by,
+            'collapse_duplicates': self.collapse_duplicates,
+            'sort_by': self.sort_by,
             'include_metadata': self.include_metadata,
             'watermark_text': self.watermark_text,
             'save_folder': self.save_folder
@@ -135,6 +184,17 @@ class SettingsManager:
                 'filename_pattern',
                 'contact_sheet_{number}'
             )
+            self.archive_format = preset.get('archive_format', 'None')
+            self.pdf_max_pages = preset.get('pdf_max_pages', 0)
+            self.pdf_max_mb = preset.get('pdf_max_mb', 0)
+            self.pdf_split_index = preset.get('pdf_split_index', False)
+            self.rotation_mode = preset.get('rotation_mode', 'Non-destructive')
+            self.group_by = preset.get('group_by', 'None')
+            self.collapse_duplicates = preset.get(
+                'collapse_duplicates',
+                False
+            )
+            self.sort_by = preset.get('sort_by', 'Capture Time')
             self.include_metadata = preset.get('include_metadata', True)
             self.watermark_text = preset.get('watermark_text', '')
             self.save_folder = preset.get('save_folder', '')
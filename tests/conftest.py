@@ -0,0 +1,21 @@
+import os
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    """Run in an empty folder with the catalog kept under it."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('XDG_DATA_HOME', str(tmp_path / 'data'))
+    monkeypatch.setenv('LOCALAPPDATA', str(tmp_path / 'data'))
+    os.makedirs(tmp_path / 'images')
+    return tmp_path
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    """Return the Qt application that timers and queued signals need."""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,187 @@
+import os
+import shutil
+import sys
+import threading
+
+import pytest
+from PIL import Image
+
+from catalog import ImageCatalog
+from edit_catalog import EditCatalog
+from image_processor import ImageProcessor
+from settings_manager import SettingsManager
+
+
+def record(folder, filename, **values):
+    info = {
+        'path': os.path.join(str(folder), filename),
+        'filename': filename,
+        'fingerprint': 'f-' + filename,
+        'size': 10,
+        'mtime_ns': 20,
+        'thumbnail_path': os.path.join(str(folder), '.thumbnail_' + filename),
+        'date_time': 'Unknown Date',
+        'timestamp': None,
+        'utc_offset': None,
+        'camera_model': '',
+        'width': 40,
+        'height': 30,
+        'orientation': 1,
+        'rotation': 0,
+        'dhash': None,
+        'content_hash': None,
+        'date_source': None,
+        'lab_l': None,
+        'lab_a': None,
+        'lab_b': None,
+        'exposure': None,
+        'histogram': None
+    }
+    info.update(values)
+    return info
+
+
+@pytest.fixture
+def processor(isolated):
+    for i in range(3):
+        Image.new('RGB', (120, 80), (60 * i, 90, 150)).save(
+            isolated / 'images' / f'IMG_{i:03d}.jpg'
+        )
+    processor = ImageProcessor(SettingsManager())
+    decoded = []
+    process = processor._process_image_file
+    processor._process_image_file = lambda folder, filename, *args: (
+        decoded.append(filename) or process(folder, filename, *args)
+    )
+    processor.decoded = decoded
+    return processor
+
+
+def test_upsert_and_update_edits(tmp_path):
+    catalog = ImageCatalog(str(tmp_path / 'catalog.db'))
+    catalog.upsert_many([record(tmp_path, 'a.jpg'), record(tmp_path, 'b.jpg')])
+    catalog.upsert_many([record(tmp_path, 'a.jpg', camera_model='X100')])
+
+    rows = catalog.folder_records(str(tmp_path))
+    assert sorted(rows) == ['a.jpg', 'b.jpg']
+    assert rows['a.jpg'] == record(tmp_path, 'a.jpg', camera_model='X100')
+
+    turned = dict(rows['b.jpg'], rotation=90, width=30, height=40, size=11)
+    catalog.update_edits([turned])
+    assert catalog.folder_records(str(tmp_path))['b.jpg'] == turned
+
+
+def test_each_thread_reads_and_writes_the_same_catalog(tmp_path):
+    catalog = ImageCatalog(str(tmp_path / 'catalog.db'))
+    threads = [
+        threading.Thread(
+            target=catalog.upsert_many,
+            args=([record(tmp_path, f'{i}.jpg')],)
+        )
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(catalog.folder_records(str(tmp_path))) == 4
+
+
+@pytest.mark.skipif(sys.platform == 'darwin', reason='fixed folder')
+def test_default_catalog_lives_in_the_user_data_folder(isolated, processor):
+    processor.load_images_from_folder(str(isolated / 'images'))
+    assert processor.catalog.db_path == ImageCatalog.default_path()
+    assert os.path.exists(
+        isolated / 'data' / ImageCatalog.APP_NAME / ImageCatalog.FILENAME
+    )
+    # No database is left in the folder the app was started in
+    assert not [name for name in os.listdir(isolated) if '.db' in name]
+
+
+def test_reload_reuses_rows_of_unchanged_files(isolated, processor):
+    folder = str(isolated / 'images')
+    processor.load_images_from_folder(folder)
+    assert sorted(processor.decoded) == [
+        'IMG_000.jpg', 'IMG_001.jpg', 'IMG_002.jpg'
+    ]
+    first = processor.images_info
+
+    processor.decoded.clear()
+    processor.load_images_from_folder(folder)
+    assert processor.decoded == []
+    assert processor.images_info == first
+
+    # A rewritten file is decoded again
+    Image.new('RGB', (60, 90), 'white').save(isolated / 'images' / 'IMG_001.jpg')
+    processor.load_images_from_folder(folder)
+    assert processor.decoded == ['IMG_001.jpg']
+    changed = next(
+        info for info in processor.images_info
+        if info['filename'] == 'IMG_001.jpg'
+    )
+    assert (changed['width'], changed['height']) == (60, 90)
+
+
+def test_deleted_files_leave_the_catalog(isolated, processor):
+    folder = str(isolated / 'images')
+    processor.load_images_from_folder(folder)
+    os.remove(isolated / 'images' / 'IMG_002.jpg')
+    processor.load_images_from_folder(folder)
+    assert sorted(processor.catalog.folder_records(folder)) == [
+        'IMG_000.jpg', 'IMG_001.jpg'
+    ]
+
+
+def test_sidecar_rotation_wins_over_the_catalog(isolated, processor):
+    folder = str(isolated / 'images')
+    processor.load_images_from_folder(folder)
+    info = processor.images_info[0]
+    processor.rotate_images([info], 90)
+    assert processor.catalog.folder_records(folder)[info['filename']][
+        'rotation'
+    ] == 90
+
+    # The sidecar was changed elsewhere, e.g. on another machine
+    edited = dict(info, rotation=180)
+    EditCatalog().set_rotations([edited])
+    processor.edit_catalog = EditCatalog()
+    processor.load_images_from_folder(folder)
+    assert processor.decoded.count(info['filename']) == 1
+    reloaded = processor.catalog.folder_records(folder)[info['filename']]
+    assert reloaded['rotation'] == 180
+    assert next(
+        i for i in processor.images_info if i['filename'] == info['filename']
+    )['rotation'] == 180
+
+
+def test_exact_copies_are_not_decoded(isolated, processor):
+    folder = isolated / 'images'
+    shutil.copyfile(folder / 'IMG_000.jpg', folder / 'copy_a.jpg')
+    processor.load_images_from_folder(str(folder))
+    # Only one file of the identical pair is decoded
+    assert sorted(processor.decoded) == sorted(
+        ['IMG_001.jpg', 'IMG_002.jpg', 'IMG_000.jpg']
+        if 'IMG_000.jpg' in processor.decoded
+        else ['IMG_001.jpg', 'IMG_002.jpg', 'copy_a.jpg']
+    )
+    records = {info['filename']: info for info in processor.images_info}
+    original, copy = records['IMG_000.jpg'], records['copy_a.jpg']
+    assert copy['content_hash'] == original['content_hash'] is not None
+    assert (copy['width'], copy['height']) == (120, 80)
+    assert copy['path'] == str(folder / 'copy_a.jpg')
+    assert (
+        (folder / '.thumbnail_copy_a.jpg').read_bytes()
+        == (folder / '.thumbnail_IMG_000.jpg').read_bytes()
+    )
+    # Files without a colliding fingerprint are never fully hashed
+    assert records['IMG_001.jpg']['content_hash'] is None
+
+    # A copy of an already catalogued file is not decoded either
+    processor.decoded.clear()
+    shutil.copyfile(folder / 'IMG_002.jpg', folder / 'copy_b.jpg')
+    processor.load_images_from_folder(str(folder))
+    assert processor.decoded == []
+    stored = processor.catalog.folder_records(str(folder))
+    assert stored['copy_b.jpg']['content_hash'] == (
+        stored['IMG_002.jpg']['content_hash']
+    )
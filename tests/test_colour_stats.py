@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from colour_stats import ColourStats, ContentOrder
+from image_processor import ImageProcessor
+from settings_manager import SettingsManager
+
+
+@pytest.mark.parametrize('colour, lab', [
+    ((255, 255, 255), (100, 0, 0)),
+    ((0, 0, 0), (0, 0, 0)),
+    ((255, 0, 0), (53.2, 80.1, 67.2)),
+    ((0, 0, 255), (32.3, 79.2, -107.9)),
+])
+def test_mean_lab_colour(colour, lab):
+    stats = ColourStats.compute(Image.new('RGB', (8, 8), colour))
+    measured = (stats['lab_l'], stats['lab_a'], stats['lab_b'])
+    assert measured == pytest.approx(lab, abs=0.5)
+
+
+def test_exposure_and_histogram():
+    grey = ColourStats.compute(Image.new('RGB', (8, 8), (119, 119, 119)))
+    # sRGB 119 is about 18 % luminance
+    assert grey['exposure'] == pytest.approx(0, abs=0.05)
+    brighter = ColourStats.compute(Image.new('RGB', (8, 8), (163, 163, 163)))
+    assert brighter['exposure'] == pytest.approx(1, abs=0.1)
+
+    half = Image.new('RGB', (8, 8), 'black')
+    half.paste((255, 255, 255), (0, 0, 8, 4))
+    histogram = ColourStats.compute(half)['histogram']
+    assert len(histogram) == ColourStats.HISTOGRAM_BINS
+    assert histogram[0] == histogram[-1] == 128
+    assert sum(histogram[1:-1]) == 0
+
+
+def image(name, colour):
+    return dict(
+        ColourStats.compute(Image.new('RGB', (4, 4), colour)),
+        filename=name
+    )
+
+
+def test_brightness_order_keeps_unknown_images_last():
+    images = [
+        image('grey', (128, 128, 128)),
+        {'filename': 'unknown', 'lab_l': None},
+        image('white', (255, 255, 255)),
+        image('black', (0, 0, 0)),
+    ]
+    ordered = ContentOrder.sort(images, ContentOrder.BRIGHTNESS)
+    assert [info['filename'] for info in ordered] == [
+        'black', 'grey', 'white', 'unknown'
+    ]
+    assert ContentOrder.sort(images, ContentOrder.TIME) is images
+
+
+def test_colour_order_keeps_similar_colours_together():
+    images = [
+        image('red', (220, 20, 20)),
+        image('blue', (20, 20, 220)),
+        image('dark red', (200, 30, 30)),
+        image('dark blue', (30, 30, 200)),
+        image('light red', (240, 40, 40)),
+    ]
+    ordered = [
+        info['filename']
+        for info in ContentOrder.sort(images, ContentOrder.COLOUR)
+    ]
+    reds = [i for i, name in enumerate(ordered) if 'red' in name]
+    assert reds in ([0, 1, 2], [2, 3, 4])
+
+
+def test_hilbert_keys_visit_neighbouring_cells():
+    side = 4
+    coords = [
+        (x, y, z) for x in range(side) for y in range(side) for z in range(side)
+    ]
+    keys = ContentOrder._hilbert_keys(np.array(coords), 2)
+    assert sorted(keys.tolist()) == list(range(side ** 3))
+    walk = [coords[i] for i in np.argsort(keys)]
+    for a, b in zip(walk, walk[1:]):
+        assert sum(abs(p - q) for p, q in zip(a, b)) == 1
+
+
+def test_sheets_follow_the_sort_setting(isolated):
+    colours = {
+        'a.jpg': (250, 250, 250),
+        'b.jpg': (10, 10, 10),
+        'c.jpg': (130, 130, 130)
+    }
+    for name, colour in colours.items():
+        Image.new('RGB', (60, 40), colour).save(isolated / 'images' / name)
+    processor = ImageProcessor(SettingsManager())
+    processor.load_images_from_folder(str(isolated / 'images'))
+    assert all(info['lab_l'] is not None for info in processor.images_info)
+
+    processor.settings_manager.sort_by = ContentOrder.BRIGHTNESS
+    ordered = processor.order_images(processor.images_info)
+    assert [info['filename'] for info in ordered] == ['b.jpg', 'c.jpg', 'a.jpg']
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+
+import piexif
+import pytest
+
+from date_resolver import CaptureDateResolver
+
+
+@pytest.fixture
+def resolver():
+    return CaptureDateResolver()
+
+
+@pytest.mark.parametrize('filename, expected', [
+    ('IMG_20230914_101112.jpg', datetime(2023, 9, 14, 10, 11, 12)),
+    ('PXL_20230914_101112345.jpg', datetime(2023, 9, 14, 10, 11, 12)),
+    ('IMG-20230914-WA0001.jpg', datetime(2023, 9, 14)),
+    ('Screenshot_2023-09-14-10-11-12.png', datetime(2023, 9, 14, 10, 11, 12)),
+    ('Screenshot 2023-09-14 at 10.11.12.png',
+     datetime(2023, 9, 14, 10, 11, 12)),
+    ('2023-09-14 10.11.12.jpg', datetime(2023, 9, 14, 10, 11, 12)),
+    ('VID_20231231_235959.jpg', datetime(2023, 12, 31, 23, 59, 59)),
+    ('holiday_1999.07.04.jpg', datetime(1999, 7, 4)),
+    # An impossible first candidate is skipped for a later valid one
+    ('20231345_IMG_20230101.jpg', datetime(2023, 1, 1)),
+])
+def test_filename_dates(resolver, filename, expected):
+    assert resolver.resolve({}, None, filename, None) == (
+        expected,
+        CaptureDateResolver.FILENAME
+    )
+
+
+@pytest.mark.parametrize('filename', [
+    'DSC01234.jpg',
+    'IMG_1234.jpg',
+    '12345678901.jpg',
+    'IMG_20231301.jpg',
+    'IMG_20230230.jpg',
+    'x120230914.jpg',
+])
+def test_filenames_without_dates(resolver, filename):
+    assert resolver.resolve({}, None, filename, None) == (None, None)
+
+
+def exif(**tags):
+    """Build a piexif dict from '0th'/'Exif' tag values."""
+    exif_dict = {'0th': {}, 'Exif': {}}
+    for name, value in tags.items():
+        if name == 'DateTime':
+            exif_dict['0th'][piexif.ImageIFD.DateTime] = value
+        else:
+            exif_dict['Exif'][getattr(piexif.ExifIFD, name)] = value
+    return exif_dict
+
+
+def test_exif_sources_in_order(resolver):
+    tags = {
+        'DateTimeOriginal': b'2020:01:02 03:04:05',
+        'DateTimeDigitized': b'2021:01:02 03:04:05',
+        'DateTime': b'2022:01:02 03:04:05'
+    }
+    assert resolver.resolve(exif(**tags), None, 'IMG_20230914.jpg', 0) == (
+        datetime(2020, 1, 2, 3, 4, 5),
+        CaptureDateResolver.EXIF_ORIGINAL
+    )
+    del tags['DateTimeOriginal']
+    assert resolver.resolve(exif(**tags), None, 'a.jpg', 0)[1] == (
+        CaptureDateResolver.EXIF_DIGITIZED
+    )
+    del tags['DateTimeDigitized']
+    assert resolver.resolve(exif(**tags), None, 'a.jpg', 0)[1] == (
+        CaptureDateResolver.EXIF_MODIFIED
+    )
+
+
+def test_unset_exif_date_falls_through(resolver):
+    exif_dict = exif(DateTimeOriginal=b'0000:00:00 00:00:00')
+    assert resolver.resolve(exif_dict, None, 'IMG_20230914.jpg', None) == (
+        datetime(2023, 9, 14),
+        CaptureDateResolver.FILENAME
+    )
+
+
+def test_exif_offset(resolver):
+    exif_dict = exif(
+        DateTimeOriginal=b'2020:01:02 03:04:05\x00',
+        OffsetTimeOriginal=b'+09:30'
+    )
+    taken, _ = resolver.resolve(exif_dict, None, 'a.jpg', None)
+    assert taken == datetime(
+        2020, 1, 2, 3, 4, 5,
+        tzinfo=timezone(timedelta(hours=9, minutes=30))
+    )
+
+
+@pytest.mark.parametrize('xmp, expected', [
+    ('<x exif:DateTimeOriginal="2019-06-01T12:00:00"/>',
+     datetime(2019, 6, 1, 12)),
+    ('<xmp:CreateDate>2019-06-01T12:00:00Z</xmp:CreateDate>',
+     datetime(2019, 6, 1, 12, tzinfo=timezone.utc)),
+    ("<x photoshop:DateCreated='2019-06-01'/>", datetime(2019, 6, 1)),
+])
+def test_xmp_dates(resolver, xmp, expected):
+    assert resolver.resolve({}, xmp, 'IMG_20230914.jpg', None) == (
+        expected,
+        CaptureDateResolver.XMP
+    )
+
+
+def test_file_modified_is_last_resort(resolver):
+    mtime = datetime(2018, 3, 4, 5, 6, 7).timestamp()
+    assert resolver.resolve({}, '<x/>', 'scan.png', mtime) == (
+        datetime(2018, 3, 4, 5, 6, 7),
+        CaptureDateResolver.FILE_MODIFIED
+    )
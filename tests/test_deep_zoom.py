@@ -0,0 +1,141 @@
+import os
+import re
+
+import pytest
+from PIL import Image
+
+from exporters import DeepZoomExporter
+from image_processor import ImageProcessor
+from settings_manager import SettingsManager
+
+
+COLOURS = [(200, 30, 30), (30, 200, 30), (30, 30, 200), (200, 200, 30)]
+
+
+@pytest.fixture
+def processor(isolated):
+    processor = ImageProcessor(SettingsManager())
+    for i, colour in enumerate(COLOURS * 2):
+        Image.new('RGB', (400, 300), colour).save(
+            isolated / 'images' / f'IMG_{i:03d}.jpg'
+        )
+    processor.load_images_from_folder(str(isolated / 'images'))
+    processor.images_info.sort(key=lambda info: info['filename'])
+    return processor
+
+
+def test_descriptor_and_pyramid(isolated, processor):
+    out = isolated / 'out'
+    exporter = DeepZoomExporter(processor)
+    assert exporter.export(processor.images_info, str(out))
+
+    with open(out / 'contact_sheet_001.dzi', encoding='utf-8') as f:
+        descriptor = f.read()
+    width, height = map(
+        int,
+        re.search(r'Width="(\d+)" Height="(\d+)"', descriptor).groups()
+    )
+    cols = exporter._calculate_columns(len(processor.images_info))
+    assert (width, height) == exporter._mosaic_size(
+        len(processor.images_info),
+        cols
+    )
+    assert 'TileSize="256"' in descriptor
+
+    tiles_dir = out / 'contact_sheet_001_files'
+    max_level = exporter._max_level((width, height))
+    assert sorted(map(int, os.listdir(tiles_dir))) == list(
+        range(max_level + 1)
+    )
+    for level in range(max_level + 1):
+        level_width, level_height = exporter._level_size(
+            (width, height),
+            level,
+            max_level
+        )
+        tile_cols, tile_rows = exporter._tile_count(
+            (level_width, level_height)
+        )
+        names = os.listdir(tiles_dir / str(level))
+        assert len(names) == tile_cols * tile_rows
+        # Edge tiles are cut to the level size
+        with Image.open(
+            tiles_dir / str(level) / f'{tile_cols - 1}_{tile_rows - 1}.jpg'
+        ) as tile:
+            assert tile.size == (
+                level_width - (tile_cols - 1) * 256,
+                level_height - (tile_rows - 1) * 256
+            )
+    with Image.open(tiles_dir / '0' / '0_0.jpg') as top:
+        assert top.size == (1, 1)
+
+
+def test_base_tiles_show_the_cells(isolated, processor):
+    out = isolated / 'out'
+    exporter = DeepZoomExporter(processor)
+    exporter.export(processor.images_info, str(out))
+    cols = exporter._calculate_columns(len(processor.images_info))
+    size = exporter._mosaic_size(len(processor.images_info), cols)
+    base = out / 'contact_sheet_001_files' / str(exporter._max_level(size))
+    pitch_x, pitch_y = exporter._cell_pitch()
+
+    for idx, info in enumerate(processor.images_info):
+        # Centre of the image inside its cell
+        x = exporter.MARGIN + (idx % cols) * pitch_x + exporter.CELL_SIZE // 2
+        y = exporter.MARGIN + (idx // cols) * pitch_y + exporter.CELL_SIZE // 2
+        with Image.open(base / f'{x // 256}_{y // 256}.jpg') as tile:
+            pixel = tile.convert('RGB').getpixel((x % 256, y % 256))
+        expected = COLOURS[int(info['filename'][4:7]) % len(COLOURS)]
+        assert all(abs(a - b) < 40 for a, b in zip(pixel, expected))
+
+
+def test_cells_come_from_the_thumbnail_cache(isolated, processor):
+    big = isolated / 'images' / 'IMG_008.jpg'
+    Image.new('RGB', (2400, 1800), COLOURS[0]).save(big)
+    processor.load_images_from_folder(str(isolated / 'images'))
+    DeepZoomExporter(processor).export(
+        processor.images_info,
+        str(isolated / 'out')
+    )
+    # The 256 px cells are drawn from the 300 px level, not the original
+    assert (isolated / 'images' / '.thumbnail_300_IMG_008.jpg').exists()
+
+
+def test_progress_counts_tile_rows_and_levels(isolated, processor):
+    exporter = DeepZoomExporter(processor)
+    reports = []
+    assert exporter.export(
+        processor.images_info,
+        str(isolated / 'out'),
+        progress=lambda *args: reports.append(args)
+    )
+    cols = exporter._calculate_columns(len(processor.images_info))
+    size = exporter._mosaic_size(len(processor.images_info), cols)
+    total = exporter._tile_count(size)[1] + exporter._max_level(size)
+    assert [done for done, _, _ in reports] == list(range(total + 1))
+    assert {steps for _, steps, _ in reports} == {total}
+    images_done = [images for _, _, images in reports]
+    assert images_done == sorted(images_done)
+    assert images_done[-1] == len(processor.images_info)
+
+
+@pytest.mark.parametrize('keep', [True, False])
+def test_cancel_stops_between_tile_rows(isolated, processor, keep):
+    processor.settings_manager.export_format = 'DZI'
+    processor.settings_manager.save_folder = str(isolated / 'out')
+    checks = iter([False, True])
+    assert not processor.create_contact_sheet(
+        processor.images_info,
+        is_cancelled=lambda: next(checks),
+        keep_partial=lambda: keep
+    )
+    out = isolated / 'out'
+    assert not (out / 'contact_sheet_001.dzi').exists()
+    tiles = out / 'contact_sheet_001_files'
+    if keep:
+        # Only the first row of full-resolution tiles was written
+        (level,) = os.listdir(tiles)
+        rows = {name.split('_')[1] for name in os.listdir(tiles / level)}
+        assert rows == {'0.jpg'}
+    else:
+        assert not tiles.exists()
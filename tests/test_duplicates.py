@@ -0,0 +1,143 @@
+import hashlib
+import random
+
+import numpy as np
+from PIL import Image
+
+from duplicates import FileHash, NearDuplicateIndex, PerceptualHash
+
+
+def signed(value):
+    """Store an unsigned 64-bit hash as SQLite does."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def flip(value, bits):
+    """Return value with the given bit positions flipped."""
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+# Half the bits set, far from the flat hashes skipped as featureless
+BASE = 0x5A5A_F0F0_3C3C_A5A5
+
+
+def test_near_hashes_cluster_and_far_ones_do_not():
+    other = flip(BASE, range(0, 64, 2))
+    hashes = [
+        signed(BASE),
+        signed(other),
+        signed(flip(BASE, [1, 9, 17, 33, 41, 63])),
+        None,
+        signed(BASE),
+        signed(flip(BASE, range(7)))
+    ]
+    assert NearDuplicateIndex(hashes).clusters() == [
+        [0, 2, 4], [1], [3], [5]
+    ]
+
+
+def test_matches_brute_force_on_separated_groups():
+    rng = random.Random(1)
+    hashes = []
+    for _ in range(200):
+        base = rng.getrandbits(64)
+        for _ in range(rng.randint(1, 4)):
+            hashes.append(signed(flip(base, rng.sample(range(64), 3))))
+    rng.shuffle(hashes)
+
+    parent = list(range(len(hashes)))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i in range(len(hashes)):
+        for j in range(i + 1, len(hashes)):
+            distance = bin((hashes[i] ^ hashes[j]) & ((1 << 64) - 1))
+            if distance.count('1') <= NearDuplicateIndex.THRESHOLD:
+                a, b = find(i), find(j)
+                parent[max(a, b)] = min(a, b)
+    expected = {}
+    for i in range(len(hashes)):
+        expected.setdefault(find(i), []).append(i)
+
+    assert NearDuplicateIndex(hashes).clusters() == list(expected.values())
+
+
+def test_dense_bucket_forms_one_cluster():
+    rng = random.Random(4)
+    hashes = [
+        signed(flip(BASE, rng.sample(range(64), rng.randint(0, 3))))
+        for _ in range(2000)
+    ]
+    assert NearDuplicateIndex(hashes).clusters() == [list(range(2000))]
+
+
+def test_flat_hashes_are_not_clustered():
+    hashes = [0, 0, signed(flip(0, [3])), -1, signed(flip(BASE, [5]))]
+    assert NearDuplicateIndex(hashes).clusters() == [
+        [0], [1], [2], [3], [4]
+    ]
+
+
+def test_chaining_is_bounded_by_the_seed():
+    rng = random.Random(3)
+    value, chain = BASE, []
+    for _ in range(30):
+        value = flip(value, rng.sample(range(64), 3))
+        chain.append(signed(value))
+    clusters = NearDuplicateIndex(chain).clusters()
+    assert len(clusters) > 1
+    for cluster in clusters:
+        seed = chain[cluster[0]] & ((1 << 64) - 1)
+        for i in cluster:
+            distance = bin(seed ^ (chain[i] & ((1 << 64) - 1))).count('1')
+            assert distance <= 4 * NearDuplicateIndex.THRESHOLD
+
+
+def test_collapse_keeps_largest_image_in_first_place():
+    images = [
+        {'name': 'a', 'dhash': signed(BASE), 'width': 100, 'height': 100},
+        {'name': 'b', 'dhash': signed(flip(BASE, range(0, 64, 2))),
+         'width': 100, 'height': 100},
+        {'name': 'a-large', 'dhash': signed(flip(BASE, [4])),
+         'width': 400, 'height': 300},
+        {'name': 'unhashed', 'dhash': None, 'width': 10, 'height': 10}
+    ]
+    kept = NearDuplicateIndex.collapse(images)
+    assert [info['name'] for info in kept] == ['a-large', 'b', 'unhashed']
+
+
+def test_dhash_survives_resizing():
+    rng = np.random.default_rng(5)
+    pixels = rng.integers(0, 255, (64, 72), dtype=np.uint8)
+    img = Image.fromarray(pixels).resize((720, 640), Image.Resampling.BICUBIC)
+    original = PerceptualHash.dhash(img)
+    resized = PerceptualHash.dhash(img.resize((300, 267)))
+    assert -(1 << 63) <= original < 1 << 63
+    assert bin((original ^ resized) & ((1 << 64) - 1)).count('1') <= 6
+
+
+def test_fingerprint_reads_head_and_tail(tmp_path):
+    path = tmp_path / 'big.bin'
+    block = FileHash.BLOCK_SIZE
+    data = bytearray(3 * block)
+    path.write_bytes(bytes(data))
+    before = FileHash.fingerprint(str(path))
+    assert before.startswith(f'{3 * block}-')
+
+    data[-1] = 1
+    path.write_bytes(bytes(data))
+    assert FileHash.fingerprint(str(path)) != before
+
+
+def test_content_hash_covers_the_whole_file(tmp_path):
+    path = tmp_path / 'big.bin'
+    data = bytes(range(256)) * (FileHash.BLOCK_SIZE // 8)
+    path.write_bytes(data)
+    assert FileHash.content_hash(str(path)) == (
+        hashlib.sha1(data).hexdigest()
+    )
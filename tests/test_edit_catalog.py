@@ -0,0 +1,96 @@
+import json
+import os
+
+import pytest
+from PIL import Image
+
+from duplicates import FileHash
+from edit_catalog import EditCatalog
+from image_processor import ImageProcessor
+from settings_manager import SettingsManager
+
+
+def record(path):
+    return {
+        'path': str(path),
+        'fingerprint': FileHash.fingerprint(str(path)),
+        'rotation': 0
+    }
+
+
+@pytest.fixture
+def folder(isolated):
+    folder = isolated / 'images'
+    for i in range(3):
+        Image.new('RGB', (120, 80), (60 * i, 90, 150)).save(
+            folder / f'IMG_{i:03d}.jpg'
+        )
+    return folder
+
+
+def test_rotations_are_stored_once_per_folder(folder):
+    images = [record(folder / f'IMG_{i:03d}.jpg') for i in range(3)]
+    images[0]['rotation'] = 90
+    images[2]['rotation'] = 270
+    EditCatalog().set_rotations(images)
+
+    with open(folder / EditCatalog.FILENAME, encoding='utf-8') as f:
+        edits = json.load(f)['edits']
+    assert edits == {
+        images[0]['fingerprint']: {'rotation': 90},
+        images[2]['fingerprint']: {'rotation': 270}
+    }
+    reloaded = EditCatalog()
+    assert [reloaded.rotation(info) for info in images] == [90, 0, 270]
+    # No temporary files are left behind
+    assert not [name for name in os.listdir(folder) if name.endswith('.tmp')]
+
+
+def test_turning_back_to_zero_drops_the_entry(folder):
+    info = record(folder / 'IMG_000.jpg')
+    catalog = EditCatalog()
+    info['rotation'] = 180
+    catalog.set_rotations([info])
+    info['rotation'] = 0
+    catalog.set_rotations([info])
+    with open(folder / EditCatalog.FILENAME, encoding='utf-8') as f:
+        assert json.load(f)['edits'] == {}
+
+
+def test_rotation_follows_a_renamed_file(folder):
+    info = record(folder / 'IMG_000.jpg')
+    info['rotation'] = 90
+    EditCatalog().set_rotations([info])
+
+    os.rename(folder / 'IMG_000.jpg', folder / 'renamed.jpg')
+    assert EditCatalog().rotation(record(folder / 'renamed.jpg')) == 90
+    # A different file taking over the name is not rotated
+    Image.new('RGB', (50, 50), 'white').save(folder / 'IMG_000.jpg')
+    assert EditCatalog().rotation(record(folder / 'IMG_000.jpg')) == 0
+
+
+def test_unreadable_sidecar_means_no_edits(folder):
+    (folder / EditCatalog.FILENAME).write_text('{broken')
+    assert EditCatalog().rotation(record(folder / 'IMG_000.jpg')) == 0
+
+
+def test_processor_rotates_without_touching_the_file(folder):
+    processor = ImageProcessor(SettingsManager())
+    processor.load_images_from_folder(str(folder))
+    info = next(
+        info for info in processor.images_info
+        if info['filename'] == 'IMG_001.jpg'
+    )
+    original = (folder / 'IMG_001.jpg').read_bytes()
+
+    processor.rotate_images([info], 90)
+    assert (folder / 'IMG_001.jpg').read_bytes() == original
+    assert processor._load_cell_image(info, 200, 200).size == (133, 200)
+
+    processor.load_images_from_folder(str(folder))
+    rotations = {
+        info['filename']: info['rotation'] for info in processor.images_info
+    }
+    assert rotations == {
+        'IMG_000.jpg': 0, 'IMG_001.jpg': 90, 'IMG_002.jpg': 0
+    }
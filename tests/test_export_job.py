@@ -0,0 +1,267 @@
+import io
+import json
+import os
+import tarfile
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from export_job import ExportJob
+from exporters import ArchivePageSink, ImageFilePageSink, PdfPageSink
+
+
+PLAN = {'layout': (4, 2, 100, 100), 'inputs': 'abc', 'quality': 80}
+
+
+def test_committed_pages_survive_a_restart(tmp_path):
+    manifest = str(tmp_path / '.job.json')
+    job = ExportJob(manifest, PLAN)
+    job.commit_page(1, {'bytes': 10})
+    job.commit_page(2, {'bytes': 20})
+
+    resumed = ExportJob(manifest, dict(PLAN))
+    assert resumed.committed_pages == [1, 2]
+    assert resumed.sink_state == {'bytes': 20}
+    assert resumed.is_committed(2) and not resumed.is_committed(3)
+    # The manifest is replaced by renaming, never left half written
+    assert os.listdir(tmp_path) == ['.job.json']
+
+
+def test_changed_plan_starts_over(tmp_path):
+    manifest = str(tmp_path / '.job.json')
+    ExportJob(manifest, PLAN).commit_page(1, {})
+    changed = ExportJob(manifest, dict(PLAN, quality=90))
+    assert changed.committed_pages == []
+    assert changed.sink_state == {}
+
+
+def test_unreadable_manifest_starts_over(tmp_path):
+    manifest = tmp_path / '.job.json'
+    manifest.write_text('{not json')
+    assert ExportJob(str(manifest), PLAN).committed_pages == []
+
+
+def test_reset_and_finish(tmp_path):
+    manifest = str(tmp_path / '.job.json')
+    job = ExportJob(manifest, PLAN)
+    job.commit_page(1, {'bytes': 1})
+    job.reset()
+    assert job.committed_pages == [] and job.sink_state == {}
+    job.finish()
+    assert not os.path.exists(manifest)
+    job.finish()
+
+
+def test_fingerprint_tracks_files_and_rotation(tmp_path):
+    path = tmp_path / 'a.jpg'
+    path.write_bytes(b'one')
+    images = [{'path': str(path), 'rotation': 0}]
+    before = ExportJob.fingerprint_inputs(images)
+    assert ExportJob.fingerprint_inputs([dict(images[0])]) == before
+    assert ExportJob.fingerprint_inputs(
+        [dict(images[0], rotation=90)]
+    ) != before
+    path.write_bytes(b'three')
+    assert ExportJob.fingerprint_inputs(images) != before
+
+
+def settings(tmp_path, **overrides):
+    values = {
+        'save_folder': str(tmp_path),
+        'filename_pattern': 'sheet_{number}',
+        'export_format': 'JPEG',
+        'quality': 80,
+        'archive_format': 'ZIP',
+        'pdf_max_pages': 0,
+        'pdf_max_mb': 0,
+        'pdf_split_index': False
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def page(shade):
+    return Image.new('RGB', (60, 80), (shade, shade, shade))
+
+
+def write(sink, page_nums):
+    states = {}
+    for page_num in page_nums:
+        sink.write_page(page(page_num * 20), page_num)
+        states[page_num] = sink.checkpoint()
+    return states
+
+
+def test_image_files_resume_only_while_pages_exist(tmp_path):
+    config = settings(tmp_path, export_format='PNG')
+    sink = ImageFilePageSink(config)
+    assert sink.resume([], {})
+    write(sink, [1, 2])
+    assert sorted(os.listdir(tmp_path)) == ['sheet_001.png', 'sheet_002.png']
+    assert ImageFilePageSink(config).resume([1, 2], {})
+    os.remove(tmp_path / 'sheet_002.png')
+    assert not ImageFilePageSink(config).resume([1, 2], {})
+
+
+@pytest.mark.parametrize('archive_format', ['ZIP', 'ZIP (Stored)', 'TAR'])
+def test_refused_archive_resume_opens_a_fresh_archive(
+    tmp_path,
+    archive_format
+):
+    config = settings(tmp_path, archive_format=archive_format)
+    sink = ArchivePageSink(config)
+    assert sink.resume([], {})
+    states = write(sink, [1, 2])
+    sink.close()
+    if archive_format == 'TAR':
+        # A TAR file can only be resumed while it is still there
+        os.remove(sink.output_path)
+
+    # What create_contact_sheet does when the output cannot be resumed
+    sink = ArchivePageSink(config)
+    assert not sink.resume([1, 2], states[2])
+    assert sink.resume([], {})
+    write(sink, [1, 2, 3])
+    sink.close()
+
+    if archive_format == 'TAR':
+        names = tarfile.open(sink.output_path).getnames()
+    else:
+        names = zipfile.ZipFile(sink.output_path).namelist()
+    assert names == ['sheet_001.jpeg', 'sheet_002.jpeg', 'sheet_003.jpeg']
+
+
+def test_pdf_is_complete_and_resumes_from_checkpoint(tmp_path):
+    config = settings(tmp_path, export_format='PDF')
+    sink = PdfPageSink(config)
+    sink.resume([], {})
+    states = write(sink, range(1, 71))
+    sink.close()
+    path = str(tmp_path / 'sheet_001.pdf')
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert data.startswith(b'%PDF-1.4') and data.endswith(b'%%EOF\n')
+    assert b'/Count 70' in data
+
+    # Resume after page 40 of a run that went further, e.g. a crash
+    sink = PdfPageSink(config)
+    assert sink.resume(list(range(1, 41)), states[40])
+    write(sink, range(41, 46))
+    sink.close()
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert b'/Count 45' in data and b'/Count 70' not in data
+    assert data.count(b'/Type /Page ') == 45
+
+
+def test_pdf_refuses_a_checkpoint_inside_an_object(tmp_path):
+    config = settings(tmp_path, export_format='PDF')
+    sink = PdfPageSink(config)
+    sink.resume([], {})
+    states = write(sink, [1, 2])
+    sink.close()
+    broken = dict(states[2], bytes=states[2]['bytes'] - 3)
+    assert not PdfPageSink(config).resume([1, 2], broken)
+
+
+class Pipe(io.RawIOBase):
+    """A write-only stream that cannot seek, like stdout into a pipe."""
+
+    def __init__(self):
+        super().__init__()
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+
+def test_tar_resumes_after_last_committed_member(tmp_path):
+    config = settings(tmp_path, archive_format='TAR')
+    sink = ArchivePageSink(config)
+    sink.resume([], {})
+    states = write(sink, [1, 2, 3])
+    sink.close()
+
+    sink = ArchivePageSink(config)
+    assert sink.resume([1, 2], states[2])
+    write(sink, [3, 4])
+    sink.close()
+    assert tarfile.open(sink.output_path).getnames() == [
+        'sheet_001.jpeg', 'sheet_002.jpeg', 'sheet_003.jpeg', 'sheet_004.jpeg'
+    ]
+
+
+@pytest.mark.parametrize('archive_format', ['ZIP', 'ZIP (Stored)', 'TAR'])
+def test_archive_streams_to_an_unseekable_output(tmp_path, archive_format):
+    config = settings(tmp_path, archive_format=archive_format)
+    pipe = Pipe()
+    sink = ArchivePageSink(config, stream=pipe)
+    assert not sink.resume([1], {})
+    assert sink.resume([], {})
+    write(sink, [1, 2])
+    sink.close()
+    assert os.listdir(tmp_path) == []
+
+    data = io.BytesIO(bytes(pipe.data))
+    if archive_format == 'TAR':
+        names = tarfile.open(fileobj=data).getnames()
+    else:
+        names = zipfile.ZipFile(data).namelist()
+    assert names == ['sheet_001.jpeg', 'sheet_002.jpeg']
+
+
+def test_pdf_splits_by_page_count_with_an_index(tmp_path):
+    config = settings(
+        tmp_path,
+        export_format='PDF',
+        pdf_max_pages=3,
+        pdf_split_index=True
+    )
+    sink = PdfPageSink(config)
+    sink.resume([], {})
+    write(sink, range(1, 8))
+    sink.close()
+    assert sink.parts == [[1, 3], [4, 6], [7, 7]]
+    for part, count in ((1, 3), (2, 3), (3, 1)):
+        with open(tmp_path / f'sheet_001_part{part:03d}.pdf', 'rb') as f:
+            assert f.read().count(b'/Type /Page ') == count
+    assert sorted(os.listdir(tmp_path)) == [
+        'sheet_001_part001.pdf',
+        'sheet_001_part002.pdf',
+        'sheet_001_part003.pdf'
+    ]
+
+    batches = [[{'filename': f'{n}.jpg', 'path': f'/x/{n}.jpg'}]
+               for n in range(1, 8)]
+    sink.write_index(batches)
+    with open(tmp_path / 'sheet_001_index.json', encoding='utf-8') as f:
+        parts = json.load(f)['parts']
+    assert [part['file'] for part in parts] == [
+        'sheet_001_part001.pdf',
+        'sheet_001_part002.pdf',
+        'sheet_001_part003.pdf'
+    ]
+    assert [image['filename'] for image in parts[1]['images']] == [
+        '4.jpg', '5.jpg', '6.jpg'
+    ]
+
+
+def test_pdf_splits_before_a_part_would_grow_too_large(tmp_path):
+    config = settings(tmp_path, export_format='PDF', pdf_max_mb=1)
+    sink = PdfPageSink(config)
+    sink.resume([], {})
+    write(sink, [1])
+    # Room for about two and a half pages per part
+    sink.max_bytes = int(sink.bytes_written * 2.5)
+    write(sink, range(2, 7))
+    sink.close()
+    assert sink.parts == [[1, 2], [3, 4], [5, 6]]
+    for part in range(1, 4):
+        path = tmp_path / f'sheet_001_part{part:03d}.pdf'
+        assert os.path.getsize(path) <= sink.max_bytes
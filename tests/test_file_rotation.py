@@ -0,0 +1,176 @@
+import os
+import subprocess
+
+import piexif
+import pytest
+from PIL import Image, ImageChops
+
+import file_rotation
+from duplicates import FileHash
+from file_rotation import FileRotator
+from image_processor import ImageProcessor
+from settings_manager import SettingsManager
+
+
+def save_photo(path, size=(120, 80), orientation=1):
+    """Save a JPEG whose left half is blue and right half red."""
+    img = Image.new('RGB', size, (255, 0, 0))
+    img.paste((0, 0, 255), (0, 0, size[0] // 2, size[1]))
+    exif = piexif.dump({'0th': {piexif.ImageIFD.Orientation: orientation}})
+    img.save(path, 'JPEG', exif=exif)
+
+
+def scan_data(path):
+    """Return the compressed image data after the JPEG headers."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return data[data.index(b'\xff\xda'):]
+
+
+def orientation_of(path):
+    with open(path, 'rb') as f:
+        return piexif.load(f.read())['0th'].get(piexif.ImageIFD.Orientation)
+
+
+@pytest.fixture
+def processor(isolated):
+    return ImageProcessor(SettingsManager())
+
+
+def loaded(processor, folder, filename):
+    processor.load_images_from_folder(str(folder))
+    return next(
+        info for info in processor.images_info
+        if info['filename'] == filename
+    )
+
+
+@pytest.mark.parametrize('orientation', range(1, 9))
+def test_four_quarter_turns_restore_the_orientation(orientation):
+    turned = orientation
+    for _ in range(4):
+        turned = FileRotator.rotated_orientation(turned, 90)
+        assert turned != orientation or _ == 3
+    assert turned == orientation
+    assert FileRotator.rotated_orientation(orientation, 180) == (
+        FileRotator.rotated_orientation(orientation, -180)
+    )
+
+
+@pytest.mark.parametrize('orientation', range(1, 9))
+def test_rotated_tag_shows_the_turned_image(orientation):
+    stored = Image.new('RGB', (4, 2), 'white')
+    stored.putpixel((0, 0), (255, 0, 0))
+    shown = FileRotator.apply_orientation(stored, orientation)
+    turned = FileRotator.rotated_orientation(orientation, 90)
+    expected = shown.rotate(90, expand=True)
+    assert FileRotator.apply_orientation(stored, turned).tobytes() == (
+        expected.tobytes()
+    )
+
+
+def test_orientation_mode_rewrites_only_the_tag(isolated, processor):
+    path = isolated / 'images' / 'photo.jpg'
+    save_photo(path)
+    before = scan_data(path)
+    info = loaded(processor, isolated / 'images', 'photo.jpg')
+
+    processor.rotate_file(info, 90, FileRotator.ORIENTATION)
+    assert orientation_of(path) == 8
+    assert scan_data(path) == before
+    assert info['orientation'] == 8 and info['rotation'] == 0
+
+    cell = processor._load_cell_image(info, 100, 100)
+    assert cell.width < cell.height
+    # Turned counter-clockwise, the blue left half is now at the bottom
+    bottom = cell.getpixel((cell.width // 2, cell.height - 3))
+    assert bottom[2] > 200 and bottom[0] < 50
+
+
+def test_catalog_edits_follow_a_rewritten_file(isolated, processor):
+    path = isolated / 'images' / 'photo.jpg'
+    save_photo(path)
+    info = loaded(processor, isolated / 'images', 'photo.jpg')
+    processor.rotate_file(info, 180, FileRotator.CATALOG)
+    fingerprint = info['fingerprint']
+
+    processor.rotate_file(info, 90, FileRotator.ORIENTATION)
+    assert info['fingerprint'] != fingerprint
+    assert info['fingerprint'] == FileHash.fingerprint(str(path))
+    reloaded = loaded(processor, isolated / 'images', 'photo.jpg')
+    assert reloaded['rotation'] == 180 and reloaded['orientation'] == 8
+
+
+def test_files_a_mode_cannot_rotate_use_the_catalog(isolated, processor):
+    path = isolated / 'images' / 'picture.png'
+    Image.new('RGB', (60, 40), 'white').save(path)
+    before = path.read_bytes()
+    info = loaded(processor, isolated / 'images', 'picture.png')
+
+    processor.rotate_file(info, 90, FileRotator.ORIENTATION)
+    assert path.read_bytes() == before
+    assert info['rotation'] == 90
+    assert loaded(processor, isolated / 'images', 'picture.png')[
+        'rotation'
+    ] == 90
+
+
+def test_lossless_without_jpegtran_falls_back_to_the_tag(
+    isolated,
+    processor,
+    monkeypatch
+):
+    monkeypatch.setattr(file_rotation.shutil, 'which', lambda name: None)
+    path = isolated / 'images' / 'photo.jpg'
+    save_photo(path)
+    before = scan_data(path)
+    info = loaded(processor, isolated / 'images', 'photo.jpg')
+
+    processor.rotate_file(info, -90, FileRotator.LOSSLESS)
+    assert orientation_of(path) == 6
+    assert scan_data(path) == before
+    assert not [n for n in os.listdir(path.parent) if n.endswith('.tmp')]
+
+
+def fake_jpegtran(args, **kwargs):
+    """Turn the stored pixels clockwise like jpegtran, keeping the EXIF."""
+    clockwise = int(args[args.index('-rotate') + 1])
+    with Image.open(args[-1]) as img:
+        turned = img.rotate(-clockwise, expand=True)
+        turned.save(
+            args[args.index('-outfile') + 1],
+            'JPEG',
+            exif=img.info['exif'],
+            quality=95
+        )
+    return subprocess.CompletedProcess(args, 0, b'', b'')
+
+
+@pytest.mark.parametrize('orientation', range(1, 9))
+def test_lossless_mode_turns_the_displayed_image(
+    isolated,
+    processor,
+    monkeypatch,
+    orientation
+):
+    monkeypatch.setattr(file_rotation.shutil, 'which', lambda name: name)
+    monkeypatch.setattr(file_rotation.subprocess, 'run', fake_jpegtran)
+    path = isolated / 'images' / 'photo.jpg'
+    save_photo(path, size=(128, 64), orientation=orientation)
+
+    def shown():
+        with Image.open(path) as img:
+            return FileRotator.apply_orientation(
+                img.convert('RGB'),
+                orientation
+            )
+
+    expected = shown().rotate(90, expand=True)
+    info = loaded(processor, isolated / 'images', 'photo.jpg')
+    processor.rotate_file(info, 90, FileRotator.LOSSLESS)
+    # The tag is copied unchanged; only the pixels were turned
+    assert orientation_of(path) == orientation
+    turned = shown()
+    assert turned.size == expected.size
+    diff = ImageChops.difference(turned, expected)
+    assert max(high for low, high in diff.getextrema()) < 60
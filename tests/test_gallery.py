@@ -0,0 +1,107 @@
+import json
+import os
+
+import pytest
+from PIL import Image
+
+from exporters import GalleryExporter
+from image_processor import ImageProcessor
+from settings_manager import SettingsManager
+
+
+COLOURS = [(200, 30, 30), (30, 200, 30), (30, 30, 200)]
+
+
+@pytest.fixture
+def processor(isolated):
+    processor = ImageProcessor(SettingsManager())
+    for i in range(5):
+        Image.new('RGB', (300, 200), COLOURS[i % 3]).save(
+            isolated / 'images' / f'IMG_{i:03d}.jpg'
+        )
+    processor.load_images_from_folder(str(isolated / 'images'))
+    processor.images_info.sort(key=lambda info: info['filename'])
+    return processor
+
+
+def test_atlases_and_index(isolated, processor, monkeypatch):
+    # Two 150 px slots per atlas row and two rows per atlas
+    monkeypatch.setattr(GalleryExporter, 'ATLAS_SIZE', 300)
+    out = isolated / 'out'
+    out.mkdir()
+    images = processor.images_info
+    assert GalleryExporter(processor).export(
+        [images[:3], images[3:]],
+        str(out),
+        2,
+        3
+    )
+
+    with open(out / 'contact_sheet_001.json', encoding='utf-8') as f:
+        index = json.load(f)
+    assert index['atlases'] == [
+        'contact_sheet_001_atlas_000.jpg',
+        'contact_sheet_001_atlas_001.jpg'
+    ]
+    assert index['cols'] == 2 and index['images_per_page'] == 3
+    assert [cell['filename'] for cell in index['cells']] == [
+        info['filename'] for info in processor.images_info
+    ]
+    assert [cell['atlas'] for cell in index['cells']] == [0, 0, 0, 0, 1]
+    assert [cell['page'] for cell in index['cells']] == [1, 1, 1, 2, 2]
+
+    for i, cell in enumerate(index['cells']):
+        # Thumbnails keep their aspect ratio inside the slot
+        assert (cell['width'], cell['height']) == (150, 100)
+        with Image.open(out / index['atlases'][cell['atlas']]) as atlas:
+            pixel = atlas.getpixel(
+                (cell['x'] + cell['width'] // 2, cell['y'] + cell['height'] // 2)
+            )
+        assert all(abs(a - b) < 40 for a, b in zip(pixel, COLOURS[i % 3]))
+
+
+def test_html_pages_are_escaped(isolated, processor):
+    processor.settings_manager.context_text = 'Trip <2024> & more'
+    out = isolated / 'out'
+    out.mkdir()
+    images = processor.images_info
+    GalleryExporter(processor).export(
+        [images[:2], images[2:3], images[3:]],
+        str(out),
+        2,
+        3
+    )
+
+    page = (out / 'contact_sheet_001.html').read_text(encoding='utf-8')
+    assert '<title>Trip &lt;2024&gt; &amp; more</title>' in page
+    # Every page batch gets its own section, even a short one
+    assert 'Page 1 of 3' in page and 'Page 3 of 3' in page
+    assert '<script' not in page
+    assert page.count('<figure>') == 5
+
+
+@pytest.mark.parametrize('keep', [True, False])
+def test_progress_and_cancel_between_atlases(
+    isolated,
+    processor,
+    monkeypatch,
+    keep
+):
+    # Four slots per atlas, so five images need two atlases
+    monkeypatch.setattr(GalleryExporter, 'ATLAS_SIZE', 300)
+    out = isolated / 'out'
+    out.mkdir()
+    reports = []
+    checks = iter([False, True])
+    assert not GalleryExporter(processor).export(
+        [processor.images_info],
+        str(out),
+        2,
+        5,
+        progress=lambda *args: reports.append(args),
+        is_cancelled=lambda: next(checks),
+        keep_partial=lambda: keep
+    )
+    assert reports == [(0, 2, 0), (1, 2, 4)]
+    expected = ['contact_sheet_001_atlas_000.jpg'] if keep else []
+    assert os.listdir(out) == expected
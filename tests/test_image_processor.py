@@ -0,0 +1,197 @@
+import os
+import zipfile
+
+import piexif
+import pytest
+from PIL import Image, ImageChops, ImageOps
+from PyQt5.QtGui import QColor
+
+from image_processor import ImageProcessor
+from settings_manager import SettingsManager
+
+
+@pytest.fixture
+def processor(isolated):
+    return ImageProcessor(SettingsManager())
+
+
+def save_photo(path, size=(120, 80), orientation=1):
+    """Save a JPEG whose left half is blue and right half red."""
+    img = Image.new('RGB', size, (255, 0, 0))
+    img.paste((0, 0, 255), (0, 0, size[0] // 2, size[1]))
+    exif = piexif.dump({'0th': {piexif.ImageIFD.Orientation: orientation}})
+    img.save(path, 'JPEG', exif=exif)
+
+
+@pytest.mark.parametrize('orientation', range(1, 9))
+def test_cells_and_list_thumbnail_are_upright(
+    isolated,
+    processor,
+    orientation
+):
+    path = isolated / 'images' / 'tagged.jpg'
+    save_photo(path, orientation=orientation)
+    processor.load_images_from_folder(str(isolated / 'images'))
+    info = processor.images_info[0]
+    assert info['orientation'] == orientation
+
+    with Image.open(path) as img:
+        upright = ImageOps.exif_transpose(img)
+    cell = processor._load_cell_image(info, 60, 60)
+    assert cell.size == ImageOps.contain(upright, (60, 60)).size
+    expected = ImageOps.contain(upright, (60, 60))
+    diff = ImageChops.difference(cell.convert('RGB'), expected.convert('RGB'))
+    assert max(high for low, high in diff.getextrema()) < 60
+
+    with Image.open(info['thumbnail_path']) as thumb:
+        assert (thumb.width > thumb.height) == (upright.width > upright.height)
+
+
+@pytest.mark.parametrize('cell', [(100, 100), (250, 250), (300, 600)])
+@pytest.mark.parametrize('rotation', [0, 90])
+def test_cached_cells_match_direct_ones(isolated, processor, cell, rotation):
+    # Orientation 6 stores the pixels turned a quarter clockwise, so the
+    # upright image is portrait with the blue half on top
+    save_photo(isolated / 'images' / 'tagged.jpg', orientation=6)
+    processor.load_images_from_folder(str(isolated / 'images'))
+    info = processor.images_info[0]
+    info['rotation'] = rotation
+
+    direct = processor._load_cell_image(info, *cell)
+    cached = processor._load_cell_image(
+        info,
+        *cell,
+        use_thumbnail_cache=True
+    )
+    assert cached.size == direct.size
+    assert (direct.width < direct.height) == (rotation == 0)
+    for img in (direct, cached):
+        top_middle = img.getpixel((img.width // 2, 2))
+        left_middle = img.getpixel((2, img.height // 2))
+        blue_at = top_middle if rotation == 0 else left_middle
+        assert blue_at[2] > 200 and blue_at[0] < 50
+
+
+@pytest.mark.parametrize('mode', ['RGB', 'RGBA', 'L', 'P'])
+def test_qimage_keeps_the_pixels(processor, mode):
+    # An odd width makes the rows of an RGB buffer unaligned
+    img = Image.new('RGB', (7, 5), (10, 20, 30))
+    img.putpixel((6, 4), (200, 100, 50))
+    img = img.convert(mode)
+    expected = img.convert('RGB')
+
+    qimage = processor.image_to_qimage(img)
+    assert (qimage.width(), qimage.height()) == (7, 5)
+    for x, y in ((0, 0), (6, 4), (3, 2)):
+        colour = QColor(qimage.pixel(x, y))
+        assert (colour.red(), colour.green(), colour.blue()) == (
+            expected.getpixel((x, y))
+        )
+
+
+@pytest.fixture
+def exporting(isolated, processor):
+    """Six loaded images, two per page, exported as JPEG files."""
+    for i in range(6):
+        Image.new('RGB', (120, 80), (40 * i, 90, 150)).save(
+            isolated / 'images' / f'IMG_{i:03d}.jpg'
+        )
+    processor.load_images_from_folder(str(isolated / 'images'))
+    settings = processor.settings_manager
+    settings.save_folder = str(isolated / 'out')
+    settings.export_format = 'JPEG'
+    processor._calculate_layout = lambda count, size, margin: (
+        2, 2, 200, 200
+    )
+    return processor
+
+
+def test_export_reports_progress_and_resumes_after_cancel(exporting):
+    settings = exporting.settings_manager
+    reports = []
+    checks = iter([False, True])
+    assert not exporting.create_contact_sheet(
+        exporting.images_info,
+        progress=lambda *args: reports.append(args),
+        is_cancelled=lambda: next(checks),
+        keep_partial=lambda: True
+    )
+    assert reports == [(0, 3, 0), (1, 3, 2)]
+    assert sorted(os.listdir(settings.save_folder)) == [
+        '.contact_sheet_job.json', 'contact_sheet_001.jpeg'
+    ]
+
+    reports.clear()
+    assert exporting.create_contact_sheet(
+        exporting.images_info,
+        progress=lambda *args: reports.append(args)
+    )
+    assert reports == [(1, 3, 2), (2, 3, 4), (3, 3, 6)]
+    assert sorted(os.listdir(settings.save_folder)) == [
+        'contact_sheet_001.jpeg',
+        'contact_sheet_002.jpeg',
+        'contact_sheet_003.jpeg'
+    ]
+
+
+def test_cancelled_export_can_discard_its_pages(exporting):
+    checks = iter([False, False, True])
+    assert not exporting.create_contact_sheet(
+        exporting.images_info,
+        is_cancelled=lambda: next(checks),
+        keep_partial=lambda: False
+    )
+    assert os.listdir(exporting.settings_manager.save_folder) == []
+
+
+def test_cancelled_zip_export_can_be_run_again(exporting):
+    settings = exporting.settings_manager
+    settings.archive_format = 'ZIP'
+    checks = iter([False, True])
+    assert not exporting.create_contact_sheet(
+        exporting.images_info,
+        is_cancelled=lambda: next(checks),
+        keep_partial=lambda: True
+    )
+    assert '.contact_sheet_job.json' in os.listdir(settings.save_folder)
+
+    # A ZIP cannot be continued, so the second run starts a new archive
+    assert exporting.create_contact_sheet(exporting.images_info)
+    assert os.listdir(settings.save_folder) == ['contact_sheet_pages.zip']
+    archive = zipfile.ZipFile(
+        os.path.join(settings.save_folder, 'contact_sheet_pages.zip')
+    )
+    assert archive.namelist() == [
+        'contact_sheet_001.jpeg',
+        'contact_sheet_002.jpeg',
+        'contact_sheet_003.jpeg'
+    ]
+
+
+def test_failed_export_closes_its_archive(exporting, monkeypatch):
+    settings = exporting.settings_manager
+    settings.archive_format = 'ZIP'
+    generate = exporting._generate_page
+
+    def fail_on_page_2(batch, *args):
+        if args[4] == 2:
+            raise OSError('disk full')
+        return generate(batch, *args)
+
+    sinks = []
+    create_sink = exporting._create_page_sink
+    monkeypatch.setattr(
+        exporting,
+        '_create_page_sink',
+        lambda *args: sinks.append(create_sink(*args)) or sinks[-1]
+    )
+    monkeypatch.setattr(exporting, '_generate_page', fail_on_page_2)
+    assert not exporting.create_contact_sheet(exporting.images_info)
+    assert sinks[0].archive is None
+    path = os.path.join(settings.save_folder, 'contact_sheet_pages.zip')
+    # The archive was finished, so the page written before is readable
+    assert zipfile.ZipFile(path).namelist() == ['contact_sheet_001.jpeg']
+
+    monkeypatch.setattr(exporting, '_generate_page', generate)
+    assert exporting.create_contact_sheet(exporting.images_info)
+    assert len(zipfile.ZipFile(path).namelist()) == 3
@@ -0,0 +1,43 @@
+import io
+import sys
+import tarfile
+
+from PIL import Image
+
+from main import export_folder, parse_args
+
+
+def test_archive_is_streamed_to_stdout(isolated, monkeypatch, capsys):
+    for i in range(3):
+        Image.new('RGB', (120, 80), (60 * i, 90, 150)).save(
+            isolated / 'images' / f'IMG_{i:03d}.jpg'
+        )
+    # Not loadable, so an error message is printed while exporting
+    (isolated / 'images' / 'broken.jpg').write_bytes(b'not an image')
+    stdout = io.TextIOWrapper(io.BytesIO())
+    monkeypatch.setattr(sys, 'stdout', stdout)
+
+    args = parse_args(['images', '--archive', 'TAR', '-o', '-'])
+    assert export_folder(args) == 0
+    stdout.flush()
+    archive = tarfile.open(fileobj=io.BytesIO(stdout.buffer.getvalue()))
+    assert archive.getnames() == ['contact_sheet_001.jpeg']
+    assert 'broken.jpg' in capsys.readouterr().err
+    # The job file kept in the working folder is gone once it is done
+    assert not (isolated / '.contact_sheet_job.json').exists()
+
+
+def test_only_archives_can_be_streamed(isolated, monkeypatch):
+    Image.new('RGB', (120, 80)).save(isolated / 'images' / 'IMG_000.jpg')
+    stdout = io.TextIOWrapper(io.BytesIO())
+    monkeypatch.setattr(sys, 'stdout', stdout)
+    assert export_folder(parse_args(['images', '-o', '-'])) == 1
+    assert stdout.buffer.getvalue() == b''
+
+
+def test_pages_are_saved_to_the_output_folder(isolated):
+    Image.new('RGB', (120, 80)).save(isolated / 'images' / 'IMG_000.jpg')
+    assert export_folder(parse_args(['images', '-o', 'out'])) == 0
+    assert [path.name for path in (isolated / 'out').iterdir()] == [
+        'contact_sheet_001.jpeg'
+    ]
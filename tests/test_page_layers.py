@@ -0,0 +1,116 @@
+import os
+
+import piexif
+from PIL import Image, ImageChops, ImageDraw
+
+from image_processor import ImageProcessor
+from page_layers import PageLayerCache
+from settings_manager import SettingsManager
+
+
+def test_layers_are_built_once_per_key():
+    cache = PageLayerCache()
+    builds = []
+
+    def build(value):
+        return lambda: builds.append(value) or value
+
+    assert cache.get('images', 'a', build('A')) == 'A'
+    assert cache.get('images', 'a', build('other')) == 'A'
+    # Kinds are cached separately
+    assert cache.get('header', 'a', build('H')) == 'H'
+    assert builds == ['A', 'H']
+
+
+def test_failed_builds_are_not_cached():
+    cache = PageLayerCache()
+    assert cache.get('images', 'a', lambda: None) is None
+    assert cache.get('images', 'a', lambda: 'A') == 'A'
+
+
+def test_each_kind_keeps_its_most_recent_layers():
+    cache = PageLayerCache()
+    for i in range(PageLayerCache.CAPACITY + 1):
+        cache.get('captions', i, lambda i=i: i)
+    cache.get('header', 'kept', lambda: 'kept')
+    assert cache.get('captions', 0, lambda: 'rebuilt') == 'rebuilt'
+    assert cache.get('header', 'kept', lambda: 'rebuilt') == 'kept'
+
+
+def test_overlay_composes_like_drawing_on_the_page():
+    def draw(canvas):
+        canvas.text((20, 30), 'Contact sheet', fill=(40, 40, 40))
+        canvas.rectangle((60, 70, 90, 85), fill=(40, 40, 40))
+
+    base = Image.new('RGB', (200, 120), 'white')
+    overlay = PageLayerCache.build_overlay(base.size, (40, 40, 40), draw)
+    image, offset = overlay
+    assert image.size[0] < base.size[0] and offset[0] >= 20
+
+    direct = base.copy()
+    draw(ImageDraw.Draw(direct))
+    composed = PageLayerCache.compose(base, [overlay, None])
+    assert ImageChops.difference(composed, direct).getbbox() is None
+    # The base layer itself is left untouched
+    assert base.getcolors() == [(200 * 120, (255, 255, 255))]
+
+
+def test_empty_overlay_changes_nothing():
+    base = Image.new('RGB', (50, 50), 'white')
+    overlay = PageLayerCache.build_overlay(base.size, (0, 0, 0), lambda d: None)
+    assert overlay[0].size == (1, 1)
+    assert PageLayerCache.compose(base, [overlay]).getcolors() == [
+        (2500, (255, 255, 255))
+    ]
+
+
+def test_text_edits_do_not_reload_images(isolated, monkeypatch):
+    processor = ImageProcessor(SettingsManager())
+    for i in range(4):
+        Image.new('RGB', (120, 90), (60 * i, 80, 160)).save(
+            isolated / 'images' / f'IMG_{i:03d}.jpg'
+        )
+    processor.load_images_from_folder(str(isolated / 'images'))
+    # Adding a header moves the grid down, so start with one
+    processor.settings_manager.context_text = 'Holiday'
+    loaded = []
+    load_cell = processor._load_cell_image
+    monkeypatch.setattr(
+        processor,
+        '_load_cell_image',
+        lambda info, *args, **kwargs: (
+            loaded.append(info) or load_cell(info, *args, **kwargs)
+        )
+    )
+
+    processor.generate_preview(processor.images_info, 1)
+    assert len(loaded) == 4
+    processor.settings_manager.watermark_text = 'Proof'
+    processor.settings_manager.context_text = 'Holiday 2024'
+    first = processor.generate_preview(processor.images_info, 1)
+    assert len(loaded) == 4
+
+    # The recomposited page matches one drawn from scratch
+    processor.page_layers = PageLayerCache()
+    fresh = processor.generate_preview(processor.images_info, 1)
+    assert ImageChops.difference(first, fresh).getbbox() is None
+
+
+def test_rewritten_files_are_drawn_again(isolated):
+    processor = ImageProcessor(SettingsManager())
+    path = isolated / 'images' / 'IMG_000.jpg'
+    # A capture date keeps the caption the same once the file changes
+    exif = piexif.dump(
+        {'Exif': {piexif.ExifIFD.DateTimeOriginal: b'2024:05:01 10:00:00'}}
+    )
+    Image.new('RGB', (120, 120), (200, 30, 30)).save(path, exif=exif)
+    processor.load_images_from_folder(str(isolated / 'images'))
+    before = processor.generate_preview(processor.images_info, 1)
+
+    # Same name, size and orientation, as after a lossless 180° turn
+    Image.new('RGB', (120, 120), (30, 30, 200)).save(path, exif=exif)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    processor.load_images_from_folder(str(isolated / 'images'))
+    after = processor.generate_preview(processor.images_info, 1)
+    assert ImageChops.difference(before, after).getbbox() is not None
@@ -0,0 +1,231 @@
+import pytest
+from PIL import Image
+from PyQt5.QtGui import QColor, QImage
+from PyQt5.QtTest import QTest
+
+from image_processor import ImageProcessor
+from colour_stats import ContentOrder
+from gui import ContactSheetCreatorGUI
+from preview import (
+    PreviewLayoutTask,
+    PreviewPageCache,
+    PreviewScheduler,
+    PreviewTask
+)
+from settings_manager import SettingsManager
+
+
+@pytest.fixture
+def processor(isolated):
+    processor = ImageProcessor(SettingsManager())
+    for i in range(10):
+        Image.new('RGB', (120, 90), (20 * i, 80, 160)).save(
+            isolated / 'images' / f'IMG_{i:03d}.jpg'
+        )
+    processor.load_images_from_folder(str(isolated / 'images'))
+    return processor
+
+
+def run(task):
+    results = []
+    task.signals.finished.connect(lambda *args: results.append(args))
+    task.run()
+    return results
+
+
+def test_task_delivers_the_rendered_page(processor):
+    images = processor.images_info
+    total_pages = processor.get_preview_total_pages(images)
+    assert total_pages > 1
+
+    results = run(PreviewTask(processor, images, 2, 7, key='page-2'))
+    assert len(results) == 1
+    generation, page_num, total, image, key = results[0]
+    assert (generation, page_num, total) == (7, 2, total_pages)
+    assert key == 'page-2'
+    assert isinstance(image, QImage) and not image.isNull()
+
+
+def test_page_past_the_end_shows_the_last_one(processor):
+    total_pages = processor.get_preview_total_pages(processor.images_info)
+    results = run(PreviewTask(processor, processor.images_info, 99, 1))
+    assert results[0][1] == total_pages
+
+
+def test_cancelled_task_delivers_nothing(processor):
+    task = PreviewTask(processor, processor.images_info, 1, 1)
+    task.cancel()
+    assert run(task) == []
+
+
+def test_render_stops_at_the_next_cell(processor, monkeypatch):
+    loaded = []
+    load_cell = processor._load_cell_image
+    monkeypatch.setattr(
+        processor,
+        '_load_cell_image',
+        lambda info, *args, **kwargs: (
+            loaded.append(info) or load_cell(info, *args, **kwargs)
+        )
+    )
+    preview = processor.generate_preview(
+        processor.images_info,
+        1,
+        lambda: len(loaded) >= 2
+    )
+    assert preview is None
+    assert len(loaded) == 2
+
+
+def test_task_renders_the_settings_it_was_started_with(processor):
+    processor.settings_manager.context_text = 'Before'
+    task = PreviewTask(processor, processor.images_info, 1, 1)
+    processor.settings_manager.context_text = 'After'
+    image = run(task)[0][3]
+
+    processor.settings_manager.context_text = 'Before'
+    before = run(PreviewTask(processor, processor.images_info, 1, 2))[0][3]
+    assert image == before
+
+
+def test_layout_task_orders_and_paginates(processor):
+    processor.settings_manager.sort_by = ContentOrder.BRIGHTNESS
+    selection = processor.images_info[::-1]
+    task = PreviewLayoutTask(processor, selection, 4)
+    # Settings edited after the task was started do not reach it
+    processor.settings_manager.sort_by = ContentOrder.TIME
+    results = run(task)
+    assert len(results) == 1
+    generation, images, pages = results[0]
+    assert generation == 4
+    assert [info['filename'] for info in images] == [
+        f'IMG_{i:03d}.jpg' for i in range(10)
+    ]
+    assert [info for page in pages for info in page] == images
+    assert len(pages) == processor.get_preview_total_pages(images)
+    # The pages hold the selection's own records, not copies
+    assert all(
+        any(info is selected for selected in selection) for info in images
+    )
+
+
+def test_cancelled_layout_task_delivers_nothing(processor):
+    task = PreviewLayoutTask(processor, processor.images_info, 1)
+    task.cancel()
+    assert run(task) == []
+
+
+def test_page_cache_evicts_the_least_recently_used():
+    cache = PreviewPageCache(capacity=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'a' in cache and 'c' in cache and 'b' not in cache
+    assert cache.get('b') is None
+
+    # Checking for a page does not make it recent
+    assert 'a' in cache
+    cache.put('d', 4)
+    assert 'a' not in cache and 'c' in cache
+
+
+def test_scheduler_merges_a_burst_into_one_request(qapp):
+    scheduler = PreviewScheduler()
+    requests = []
+    scheduler.render_requested.connect(requests.append)
+
+    scheduler.invalidate(PreviewScheduler.LAYOUT)
+    scheduler.invalidate(PreviewScheduler.TEXT)
+    scheduler.invalidate(PreviewScheduler.OUTPUT)
+    assert requests == []
+    QTest.qWait(PreviewScheduler.WINDOW_MS * 3)
+    assert requests == [{PreviewScheduler.LAYOUT, PreviewScheduler.TEXT}]
+
+
+def test_output_settings_never_render(qapp):
+    scheduler = PreviewScheduler()
+    requests = []
+    scheduler.render_requested.connect(requests.append)
+    scheduler.invalidate(PreviewScheduler.OUTPUT)
+    scheduler.flush()
+    QTest.qWait(PreviewScheduler.WINDOW_MS * 2)
+    assert requests == []
+
+
+def test_flush_renders_at_once(qapp):
+    scheduler = PreviewScheduler()
+    requests = []
+    scheduler.render_requested.connect(requests.append)
+    scheduler.invalidate(PreviewScheduler.PAGE)
+    scheduler.flush()
+    assert requests == [{PreviewScheduler.PAGE}]
+    # The pending window was stopped along with the request
+    QTest.qWait(PreviewScheduler.WINDOW_MS * 2)
+    assert len(requests) == 1
+
+
+class FakeTask:
+    def __init__(self, page_num, generation, key):
+        self.page_num = page_num
+        self.generation = generation
+        self.key = key
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def test_page_change_keeps_the_prefetches_still_needed(
+    qapp,
+    isolated,
+    monkeypatch
+):
+    for i in range(30):
+        Image.new('RGB', (120, 90), (8 * i, 80, 160)).save(
+            isolated / 'images' / f'IMG_{i:03d}.jpg'
+        )
+    window = ContactSheetCreatorGUI()
+    processor = window.image_processor
+    processor.load_images_from_folder(str(isolated / 'images'))
+    window.filtered_images = list(processor.images_info)
+    window.preview_images = processor.order_images(window.filtered_images)
+    started = []
+    monkeypatch.setattr(
+        window,
+        '_startPreviewTask',
+        lambda *args, **kwargs: started.append(FakeTask(*args[:3])) or (
+            started[-1]
+        )
+    )
+    image = QImage(10, 10, QImage.Format_RGB32)
+    image.fill(QColor('white'))
+
+    def finish(task):
+        window._onPreviewRendered(
+            task.generation,
+            task.page_num,
+            window.total_preview_pages,
+            image,
+            task.key
+        )
+
+    window.updatePreview({PreviewScheduler.PAGE})
+    assert window.total_preview_pages > 3
+    finish(started[0])
+    assert [task.page_num for task in started] == [1, 2]
+
+    # Page 2 was being prefetched: it is kept and shown, not rendered again
+    window.current_preview_page = 2
+    window.updatePreview({PreviewScheduler.PAGE})
+    assert len(started) == 2 and not started[1].cancelled
+    finish(started[1])
+    assert window.current_preview_page == 2
+    assert [task.page_num for task in started] == [1, 2, 3]
+
+    # Page 3 is no longer a neighbour once page 1 is shown again
+    window.current_preview_page = 1
+    window.updatePreview({PreviewScheduler.PAGE})
+    assert len(started) == 3 and started[2].cancelled
+    assert window.prefetch_tasks == []
+    window.close()
@@ -0,0 +1,143 @@
+from datetime import datetime
+
+import pytest
+
+from catalog import ImageCatalog
+from query import FilterQuery, QueryError
+
+
+def record(filename, **fields):
+    """Return a catalog record for a file in /photos with defaults."""
+    info = {
+        'path': f'/photos/{filename}',
+        'filename': filename,
+        'fingerprint': filename,
+        'size': 500 * 1024,
+        'mtime_ns': 0,
+        'thumbnail_path': '',
+        'date_time': '',
+        'timestamp': None,
+        'camera_model': '',
+        'width': 4000,
+        'height': 3000,
+        'orientation': 1,
+        'rotation': 0,
+        'date_source': None
+    }
+    info.update(fields)
+    return info
+
+
+def taken(*args):
+    """Return the local epoch timestamp of a date."""
+    return datetime(*args).timestamp()
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = ImageCatalog(str(tmp_path / 'catalog.db'))
+    catalog.upsert_many([
+        record(
+            'IMG_0001.jpg',
+            timestamp=taken(2024, 5, 3, 10),
+            camera_model='Canon EOS R5',
+            size=3 * 1024 * 1024,
+            date_source='DateTimeOriginal'
+        ),
+        record(
+            'IMG_0002.jpg',
+            timestamp=taken(2024, 1, 31, 23, 59),
+            camera_model='Canon EOS R5',
+            width=3000,
+            height=4000
+        ),
+        record(
+            'PXL_20230914.jpg',
+            timestamp=taken(2023, 9, 14),
+            camera_model='Pixel 8',
+            orientation=6,
+            date_source='Filename'
+        ),
+        record('scan.png', width=2000, height=2000, rotation=90),
+        record('50%_off.png', size=100)
+    ])
+    return catalog
+
+
+def matches(catalog, expression):
+    """Return the sorted filenames matching a filter expression."""
+    where, params = FilterQuery.compile(expression)
+    return sorted(
+        path.rsplit('/', 1)[1] for path in catalog.paths(where, params)
+    )
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('', ['50%_off.png', 'IMG_0001.jpg', 'IMG_0002.jpg',
+          'PXL_20230914.jpg', 'scan.png']),
+    ('img', ['IMG_0001.jpg', 'IMG_0002.jpg']),
+    ('name:IMG_*.jpg', ['IMG_0001.jpg', 'IMG_0002.jpg']),
+    ('name:IMG_000?.jpg', ['IMG_0001.jpg', 'IMG_0002.jpg']),
+    ('name:50%', ['50%_off.png']),
+    ('camera:canon', ['IMG_0001.jpg', 'IMG_0002.jpg']),
+    ('camera:"eos r5"', ['IMG_0001.jpg', 'IMG_0002.jpg']),
+    ('date:2024-05', ['IMG_0001.jpg']),
+    ('date:2024', ['IMG_0001.jpg', 'IMG_0002.jpg']),
+    ('date:2024-01-31', ['IMG_0002.jpg']),
+    ('date:2023-09..2024-01', ['IMG_0002.jpg', 'PXL_20230914.jpg']),
+    ('date>=2024-02', ['IMG_0001.jpg']),
+    ('date<2024', ['PXL_20230914.jpg']),
+    ('date<=2024-01', ['IMG_0002.jpg', 'PXL_20230914.jpg']),
+    ('date>2024-01', ['IMG_0001.jpg']),
+    ('date:none', ['50%_off.png', 'scan.png']),
+    ('orientation:portrait', ['IMG_0002.jpg', 'PXL_20230914.jpg']),
+    ('orientation:landscape', ['50%_off.png', 'IMG_0001.jpg']),
+    ('orientation:square', ['scan.png']),
+    ('orientation:6', ['PXL_20230914.jpg']),
+    ('width>=4000', ['50%_off.png', 'IMG_0001.jpg', 'PXL_20230914.jpg']),
+    ('mp<10', ['scan.png']),
+    ('width:2000..3000', ['IMG_0002.jpg', 'scan.png']),
+    ('filesize>2MB', ['IMG_0001.jpg']),
+    ('filesize<1KB', ['50%_off.png']),
+    ('rotated:yes', ['scan.png']),
+    ('datesource:filename', ['PXL_20230914.jpg']),
+    ('camera:canon date:2024-05', ['IMG_0001.jpg']),
+    ('camera:canon AND date:2024-05', ['IMG_0001.jpg']),
+    ('camera:pixel OR rotated:yes', ['PXL_20230914.jpg', 'scan.png']),
+    ('-camera:canon', ['50%_off.png', 'PXL_20230914.jpg', 'scan.png']),
+    ('NOT img', ['50%_off.png', 'PXL_20230914.jpg', 'scan.png']),
+    ('(camera:pixel OR camera:canon) -date:2024-05',
+     ['IMG_0002.jpg', 'PXL_20230914.jpg']),
+    ('-(camera:canon OR rotated:yes)', ['50%_off.png', 'PXL_20230914.jpg']),
+    ('- img', ['50%_off.png', 'PXL_20230914.jpg', 'scan.png']),
+    ('date:2024-01..2024-01', ['IMG_0002.jpg']),
+])
+def test_filter_matches(catalog, expression, expected):
+    assert matches(catalog, expression) == expected
+
+
+def test_values_are_parameters():
+    where, params = FilterQuery.compile('name:"x\' OR 1=1 --"')
+    assert where == "filename LIKE ? ESCAPE '\\'"
+    assert params == ["%x' OR 1=1 --%"]
+
+
+@pytest.mark.parametrize('expression', [
+    'colour:red',
+    '(camera:canon',
+    'camera:canon)',
+    'width>wide',
+    'camera>canon',
+    'date:2024-13',
+    'date:someday',
+    'date>none',
+    'rotated:maybe',
+    'camera:',
+    'camera:canon OR',
+    'camera:canon -',
+    'date:2024-02..2024-01',
+    'width:3000..2000',
+])
+def test_invalid_expressions(expression):
+    with pytest.raises(QueryError):
+        FilterQuery.compile(expression)
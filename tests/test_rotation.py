@@ -0,0 +1,36 @@
+from PIL import Image
+from PyQt5.QtWidgets import QApplication
+
+from file_rotation import FileRotator
+from image_processor import ImageProcessor
+from rotation_task import RotationBatch
+from settings_manager import SettingsManager
+
+
+def test_batch_rotates_every_row_once(qapp, isolated):
+    processor = ImageProcessor(SettingsManager())
+    for i in range(3):
+        Image.new('RGB', (120, 80), (60 * i, 90, 150)).save(
+            isolated / 'images' / f'IMG_{i:03d}.jpg'
+        )
+    processor.load_images_from_folder(str(isolated / 'images'))
+    images = processor.images_info
+
+    batch = RotationBatch()
+    rows, progress, finished = [], [], []
+    batch.row_rotated.connect(lambda row, info: rows.append(row))
+    batch.progress.connect(lambda done, total: progress.append((done, total)))
+    batch.finished.connect(lambda: finished.append(True))
+
+    mode = FileRotator.CATALOG
+    assert batch.start(processor, [0, 1, 2], images, 90, mode) == 3
+    # Images still being rotated are left out of a second batch
+    assert batch.start(processor, [0], images[:1], 90, mode) == 0
+    assert batch.is_running()
+
+    batch.wait()
+    QApplication.processEvents()
+    assert sorted(rows) == [0, 1, 2]
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    assert finished == [True] and not batch.is_running()
+    assert [info['rotation'] for info in images] == [90, 90, 90]
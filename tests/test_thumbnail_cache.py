@@ -0,0 +1,80 @@
+import os
+
+import pytest
+from PIL import Image
+
+from thumbnail_cache import ThumbnailCache
+
+
+@pytest.fixture
+def original(isolated):
+    path = isolated / 'images' / 'photo.jpg'
+    Image.new('RGB', (1600, 1200), (90, 120, 200)).save(path)
+    return {
+        'filename': 'photo.jpg',
+        'path': str(path),
+        'thumbnail_path': str(isolated / 'images' / '.thumbnail_photo.jpg'),
+        'width': 1600,
+        'height': 1200,
+        'orientation': 1,
+        'rotation': 0
+    }
+
+
+@pytest.mark.parametrize('size, cell, orientation, rotation, expected', [
+    ((1600, 1200), (100, 100), 1, 0, 150),
+    ((1600, 1200), (200, 200), 1, 0, 300),
+    ((1600, 1200), (500, 500), 1, 0, 600),
+    ((1600, 1200), (1000, 1000), 1, 0, 1200),
+    ((1600, 1200), (2000, 2000), 1, 0, None),
+    # A tall cell is filled by the long edge once the image is turned
+    ((4000, 1000), (100, 400), 1, 0, 150),
+    ((4000, 1000), (100, 400), 1, 90, 600),
+    ((4000, 1000), (100, 400), 6, 0, 600),
+    ((4000, 1000), (100, 400), 6, 90, 150),
+])
+def test_choose_level(original, size, cell, orientation, rotation, expected):
+    info = dict(
+        original,
+        width=size[0],
+        height=size[1],
+        orientation=orientation,
+        rotation=rotation
+    )
+    assert ThumbnailCache().choose_level(info, *cell) == expected
+
+
+def test_small_originals_are_not_upscaled(original):
+    info = dict(original, width=200, height=100)
+    assert ThumbnailCache().choose_level(info, 1000, 1000) == 300
+
+
+def test_levels_are_created_once_and_rebuilt_when_stale(original):
+    cache = ThumbnailCache()
+    path = cache.level_path(original, 300)
+    assert os.path.basename(path) == '.thumbnail_300_photo.jpg'
+    assert not os.path.exists(path)
+
+    level, upright = cache.load(original, 250, 250)
+    assert level.size == (300, 225)
+    # Only the list thumbnail is saved with the orientation applied
+    assert not upright
+    assert os.path.exists(path)
+
+    # A fresh level is read back rather than written again
+    os.utime(path, (1, os.path.getmtime(original['path']) + 10))
+    written = os.path.getmtime(path)
+    assert cache.load(original, 250, 250)[0].size == (300, 225)
+    assert os.path.getmtime(path) == written
+
+    # A level older than its original is rebuilt
+    os.utime(path, (1, os.path.getmtime(original['path']) - 10))
+    cache.load(original, 250, 250)
+    assert os.path.getmtime(path) > os.path.getmtime(original['path']) - 10
+
+
+def test_smallest_level_is_the_list_thumbnail(original):
+    cache = ThumbnailCache()
+    assert cache.level_path(original, 150) == original['thumbnail_path']
+    level, upright = cache.load(original, 80, 80)
+    assert level.size == (150, 113) and upright
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+
+from timeline import TimestampIndex
+
+
+def image(name, *taken, utc_offset=None):
+    """Return a record taken at a local time, or undated."""
+    if not taken:
+        return {'filename': name, 'timestamp': None, 'utc_offset': None}
+    if utc_offset is None:
+        timestamp = datetime(*taken).timestamp()
+    else:
+        timestamp = datetime(
+            *taken,
+            tzinfo=timezone(timedelta(seconds=utc_offset))
+        ).timestamp()
+    return {'filename': name, 'timestamp': timestamp, 'utc_offset': utc_offset}
+
+
+def names(groups):
+    return [[info['filename'] for info in group] for group in groups]
+
+
+def test_sorted_images_put_undated_last_and_keep_ties():
+    images = [
+        image('undated'),
+        image('b', 2024, 1, 2),
+        image('a', 2024, 1, 1),
+        image('b2', 2024, 1, 2),
+        image('undated2')
+    ]
+    ordered = TimestampIndex(images).sorted_images()
+    assert [info['filename'] for info in ordered] == [
+        'a', 'b', 'b2', 'undated', 'undated2'
+    ]
+
+
+def test_group_by_day_month_and_week():
+    images = [
+        image('mon', 2024, 1, 1, 9),
+        image('mon-late', 2024, 1, 1, 23),
+        image('sun', 2024, 1, 7, 12),
+        image('next-mon', 2024, 1, 8, 8),
+        image('feb', 2024, 2, 1),
+        image('undated')
+    ]
+    assert names(TimestampIndex.group(images, 'Day')) == [
+        ['mon', 'mon-late'], ['sun'], ['next-mon'], ['feb'], ['undated']
+    ]
+    assert names(TimestampIndex.group(images, 'Week')) == [
+        ['mon', 'mon-late', 'sun'], ['next-mon'], ['feb'], ['undated']
+    ]
+    assert names(TimestampIndex.group(images, 'Month')) == [
+        ['mon', 'mon-late', 'sun', 'next-mon'], ['feb'], ['undated']
+    ]
+    assert names(TimestampIndex.group(images, 'None')) == [
+        [info['filename'] for info in images]
+    ]
+    assert TimestampIndex.group([], 'Day') == []
+
+
+def test_group_uses_recorded_offset():
+    # 23:30 in Tokyo and 00:30 the next day in Tokyo are two local days,
+    # whatever the time zone of this computer
+    tokyo = 9 * 3600
+    images = [
+        image('late', 2024, 3, 1, 23, 30, utc_offset=tokyo),
+        image('early', 2024, 3, 2, 0, 30, utc_offset=tokyo)
+    ]
+    assert names(TimestampIndex.group(images, 'Day')) == [
+        ['late'], ['early']
+    ]
+
+
+def test_paginate_starts_a_page_for_every_group():
+    images = (
+        [image(f'd1-{i}', 2024, 1, 1, i) for i in range(5)]
+        + [image(f'd2-{i}', 2024, 1, 2, i) for i in range(2)]
+    )
+    assert names(TimestampIndex.paginate(images, 3, 'Day')) == [
+        ['d1-0', 'd1-1', 'd1-2'],
+        ['d1-3', 'd1-4'],
+        ['d2-0', 'd2-1']
+    ]
+    assert names(TimestampIndex.paginate(images, 3)) == [
+        ['d1-0', 'd1-1', 'd1-2'],
+        ['d1-3', 'd1-4', 'd2-0'],
+        ['d2-1']
+    ]
+    assert TimestampIndex.paginate([], 3, 'Day') == []
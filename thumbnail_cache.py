@@ -0,0 +1,105 @@
+import math
+import os
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+from file_rotation import FileRotator
+
+
+class ThumbnailCache:
+    """Multi-resolution thumbnails stored next to the originals.
+
+    The smallest level is the list thumbnail created when an image is
+    loaded, saved upright with the file orientation applied; larger
+    levels hold the stored, unturned pixels and are written the first
+    time a cell needs them. Cells are drawn from the smallest level that
+    covers them without upscaling, so previews stop decoding full-size
+    originals once the levels exist. A level older than its original is
+    rebuilt.
+    """
+
+    LEVELS = (150, 300, 600, 1200)
+    QUALITY = 90
+    PREFIX = '.thumbnail_'
+
+    def level_path(self, info: Dict, edge: int) -> str:
+        """Return the file holding the level with the given longest edge."""
+        if edge == self.LEVELS[0]:
+            return info['thumbnail_path']
+        folder, filename = os.path.split(info['path'])
+        return os.path.join(folder, f"{self.PREFIX}{edge}_{filename}")
+
+    def choose_level(
+        self,
+        info: Dict,
+        width: int,
+        height: int
+    ) -> Optional[int]:
+        """Pick the smallest level that fills a width x height cell.
+
+        Returns None when the cell needs more pixels than the largest
+        level holds and the original has to be used instead.
+        """
+        src_width = info.get('width') or width
+        src_height = info.get('height') or height
+        if FileRotator.is_sideways(info):
+            src_width, src_height = src_height, src_width
+        scale = min(width / src_width, height / src_height, 1.0)
+        needed = math.ceil(max(src_width, src_height) * scale)
+
+        for edge in self.LEVELS:
+            if edge >= needed:
+                return edge
+        return None
+
+    def is_upright(self, edge: int) -> bool:
+        """Check whether a level already has the file orientation applied."""
+        return edge == self.LEVELS[0]
+
+    def load(
+        self,
+        info: Dict,
+        width: int,
+        height: int
+    ) -> Optional[Tuple[Image.Image, bool]]:
+        """Return the level covering a cell and whether it is upright.
+
+        The level is created if it is missing.
+        """
+        edge = self.choose_level(info, width, height)
+        if edge is None:
+            return None
+
+        path = self.level_path(info, edge)
+        if self._is_fresh(path, info['path']):
+            try:
+                img = Image.open(path)
+                img.load()
+                return img, self.is_upright(edge)
+            except Exception as e:
+                print(f"Error reading cached thumbnail {path}: {e}")
+        return self._create_level(info, edge, path), self.is_upright(edge)
+
+    @staticmethod
+    def _is_fresh(path: str, original_path: str) -> bool:
+        """Check that a cached level exists and is newer than its original."""
+        try:
+            return os.path.getmtime(path) >= os.path.getmtime(original_path)
+        except OSError:
+            return False
+
+    def _create_level(self, info: Dict, edge: int, path: str) -> Image.Image:
+        """Decode the original at reduced scale and store one level."""
+        with Image.open(info['path']) as img:
+            # Lets the JPEG decoder skip straight to a nearby scale
+            img.draft('RGB', (edge, edge))
+            level = img.convert('RGB')
+        level.thumbnail((edge, edge))
+        if self.is_upright(edge):
+            level = FileRotator.apply_orientation(level, info['orientation'])
+        try:
+            level.save(path, 'JPEG', quality=self.QUALITY)
+        except OSError as e:
+            print(f"Error writing cached thumbnail {path}: {e}")
+        return level
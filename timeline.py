@@ -0,0 +1,91 @@
+import math
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Hashable, List, Optional
+
+
+class TimestampIndex:
+    """Chronological order and calendar grouping of image records.
+
+    Capture times are held as epoch seconds in a flat array of doubles,
+    with images of unknown date stored as +inf so that they sort after
+    every dated image. Sorting is a stable argsort over the array, so
+    images taken at the same instant keep their list order.
+    """
+
+    GROUP_PERIODS = ('None', 'Day', 'Week', 'Month')
+
+    def __init__(self, images_info: List[Dict]):
+        """Build the timestamp array for images_info."""
+        self.images_info = images_info
+        self.timestamps = array('d', (
+            math.inf if info.get('timestamp') is None else info['timestamp']
+            for info in images_info
+        ))
+
+    def order(self) -> List[int]:
+        """Return the indices of the images in chronological order."""
+        return sorted(
+            range(len(self.timestamps)),
+            key=self.timestamps.__getitem__
+        )
+
+    def sorted_images(self) -> List[Dict]:
+        """Return the images in chronological order, unknown dates last."""
+        return [self.images_info[i] for i in self.order()]
+
+    @staticmethod
+    def bucket(info: Dict, period: str) -> Optional[Hashable]:
+        """Return the calendar bucket of an image, None if undated.
+
+        Buckets use the local date the photo was taken: the offset
+        recorded with it when known, else this computer's time zone.
+        """
+        if info.get('timestamp') is None:
+            return None
+        if info.get('utc_offset') is None:
+            taken = datetime.fromtimestamp(info['timestamp'])
+        else:
+            taken = datetime.fromtimestamp(
+                info['timestamp'],
+                timezone(timedelta(seconds=info['utc_offset']))
+            )
+        if period == 'Day':
+            return taken.date()
+        if period == 'Week':
+            return tuple(taken.isocalendar())[:2]
+        return taken.year, taken.month
+
+    @classmethod
+    def group(cls, images_info: List[Dict], period: str) -> List[List[Dict]]:
+        """Split chronologically ordered images into runs of one bucket.
+
+        A single linear pass: a new group starts wherever the bucket
+        differs from the previous image's.
+        """
+        if period not in cls.GROUP_PERIODS[1:]:
+            return [images_info] if images_info else []
+
+        groups: List[List[Dict]] = []
+        previous = object()
+        for info in images_info:
+            current = cls.bucket(info, period)
+            if current != previous:
+                groups.append([])
+                previous = current
+            groups[-1].append(info)
+        return groups
+
+    @classmethod
+    def paginate(
+        cls,
+        images_info: List[Dict],
+        images_per_page: int,
+        period: str = 'None'
+    ) -> List[List[Dict]]:
+        """Cut ordered images into pages, starting a page for every group."""
+        return [
+            group[start:start + images_per_page]
+            for group in cls.group(images_info, period)
+            for start in range(0, len(group), images_per_page)
+        ]